@@ -0,0 +1,52 @@
+from typing import Tuple, List, Dict
+
+# All tables are built once at import time and indexed [row][col], like `board.Board.board`.
+# Row 0 is black's back rank: white pawns move towards row 0, black pawns towards row 7.
+
+ORTHOGONAL_DIRECTIONS = [(0, 1), (1, 0), (0, -1), (-1, 0)]
+DIAGONAL_DIRECTIONS = [(1, 1), (1, -1), (-1, -1), (-1, 1)]
+DIRECTIONS = ORTHOGONAL_DIRECTIONS + DIAGONAL_DIRECTIONS
+
+KNIGHT_OFFSETS = [(2, 1), (2, -1), (-2, 1), (-2, -1), (1, 2), (1, -2), (-1, 2), (-1, -2)]
+KING_OFFSETS = [(dr, dc) for dr in (-1, 0, 1) for dc in (-1, 0, 1) if dr or dc]
+PAWN_ATTACK_OFFSETS = {'white': [(-1, -1), (-1, 1)], 'black': [(1, -1), (1, 1)]}
+
+
+def _build_step_table(offsets) -> List[List[Tuple[Tuple[int, int], ...]]]:
+    return [[tuple((row + dr, col + dc) for dr, dc in offsets if 0 <= row + dr < 8 and 0 <= col + dc < 8)
+             for col in range(8)] for row in range(8)]
+
+
+def _build_ray(row: int, col: int, dr: int, dc: int) -> Tuple[Tuple[int, int], ...]:
+    ray = []
+    row, col = row + dr, col + dc
+    while 0 <= row < 8 and 0 <= col < 8:
+        ray.append((row, col))
+        row, col = row + dr, col + dc
+    return tuple(ray)
+
+
+def _build_pawn_pushes(color: str) -> List[List[Tuple[Tuple[int, int], ...]]]:
+    direction, start_row = (-1, 6) if color == 'white' else (1, 1)
+    pushes = [[() for _ in range(8)] for _ in range(8)]
+    for row in range(1, 7):
+        for col in range(8):
+            squares = [(row + direction, col)]
+            if row == start_row:
+                squares.append((row + 2 * direction, col))
+            pushes[row][col] = tuple(squares)
+    return pushes
+
+
+KNIGHT_TARGETS = _build_step_table(KNIGHT_OFFSETS)
+KING_TARGETS = _build_step_table(KING_OFFSETS)
+PAWN_ATTACKS: Dict[str, List[List[Tuple[Tuple[int, int], ...]]]] = {
+    color: _build_step_table(offsets) for color, offsets in PAWN_ATTACK_OFFSETS.items()
+}
+# PAWN_PUSHES[color][row][col]: squares a pawn moves to without capturing, the double step second.
+PAWN_PUSHES = {color: _build_pawn_pushes(color) for color in PAWN_ATTACK_OFFSETS}
+
+# RAYS[row][col][i]: squares met walking from (row, col) in DIRECTIONS[i], nearest first.
+RAYS = [[tuple(_build_ray(row, col, dr, dc) for dr, dc in DIRECTIONS) for col in range(8)] for row in range(8)]
+ORTHOGONAL_RAYS = [[rays[:4] for rays in row] for row in RAYS]
+DIAGONAL_RAYS = [[rays[4:] for rays in row] for row in RAYS]
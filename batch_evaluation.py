@@ -0,0 +1,103 @@
+"""Static evaluation of many positions at once with NumPy, for analysis and dataset jobs.
+
+Positions are rows of an (N, 64) int8 array holding the piece codes of `Board.to_bytes`: 0 for an empty
+square, else 1 + color * 6 + piece type, square row * 8 + col. The score of a row is the one
+`ChessAI.evaluate_board` gives the same position: material and piece-square values, mobility and pawn
+structure, in centipawns.
+
+Mobility is computed on one uint64 bitboard per piece code and row, as in `bitboard.py`. Within one
+direction the rays of different sliders never overlap, nor do the targets of different knights for
+one jump, so summing each direction's popcount counts every piece's squares like the scalar code.
+"""
+from typing import Iterable
+
+import numpy as np
+
+from chess_AI import MOBILITY_WEIGHT, DOUBLED_PAWN_PENALTY, ISOLATED_PAWN_PENALTY
+from piece_square_tables import PIECE_SQUARE_VALUES
+
+PAWN, KNIGHT, BISHOP, ROOK, QUEEN, KING = range(1, 7)
+BLACK_OFFSET = 6
+# Rows evaluated together: bounds the temporary arrays to a few tens of megabytes.
+CHUNK_SIZE = 65536
+
+# PIECE_SQUARE_TABLE[code][square], code 0 (empty) scoring nothing.
+PIECE_SQUARE_TABLE = np.array([[0] * 64] + PIECE_SQUARE_VALUES, dtype=np.int64)
+
+FILE_A = 0x0101010101010101
+FILE_MASKS = [np.uint64(FILE_A << col) for col in range(8)]
+ALL_SQUARES = 0xFFFFFFFFFFFFFFFF
+NOT_A = np.uint64(ALL_SQUARES ^ FILE_A)
+NOT_AB = np.uint64(ALL_SQUARES ^ FILE_A ^ FILE_A << 1)
+NOT_H = np.uint64(ALL_SQUARES ^ FILE_A << 7)
+NOT_GH = np.uint64(ALL_SQUARES ^ FILE_A << 7 ^ FILE_A << 6)
+EVERYWHERE = np.uint64(ALL_SQUARES)
+# (shift, mask of the squares a step can land on without wrapping around the board).
+ORTHOGONAL_STEPS = [(1, NOT_A), (-1, NOT_H), (8, EVERYWHERE), (-8, EVERYWHERE)]
+DIAGONAL_STEPS = [(9, NOT_A), (7, NOT_H), (-7, NOT_A), (-9, NOT_H)]
+KNIGHT_STEPS = [(17, NOT_A), (15, NOT_H), (10, NOT_AB), (6, NOT_GH),
+                (-17, NOT_H), (-15, NOT_A), (-10, NOT_GH), (-6, NOT_AB)]
+
+
+def encode_boards(boards: Iterable) -> np.ndarray:
+    """(N, 64) int8 array of the pieces of `boards` (either backend)."""
+    data = b"".join(bytes(board.to_bytes()[:64]) for board in boards)
+    return np.frombuffer(data, dtype=np.int8).reshape(-1, 64)
+
+
+def _shift(bitboards: np.ndarray, amount: int) -> np.ndarray:
+    return bitboards << np.uint64(amount) if amount > 0 else bitboards >> np.uint64(-amount)
+
+
+def _slider_attacks(sliders: np.ndarray, empty: np.ndarray, amount: int, mask: np.uint64) -> np.ndarray:
+    """Squares reached by `sliders` stepping by `amount` up to and including the first occupied one."""
+    empty = empty & mask
+    sliders = sliders | empty & _shift(sliders, amount)
+    empty = empty & _shift(empty, amount)
+    sliders = sliders | empty & _shift(sliders, 2 * amount)
+    empty = empty & _shift(empty, 2 * amount)
+    sliders = sliders | empty & _shift(sliders, 4 * amount)
+    return _shift(sliders, amount) & mask
+
+
+def _mobility(bitboards: dict, base: int, empty: np.ndarray) -> np.ndarray:
+    """Squares attacked by one color's knights, bishops, rooks and queens that are not its own pieces."""
+    not_own = ~np.bitwise_or.reduce([bitboards[base + code] for code in range(PAWN, KING + 1)])
+    queens = bitboards[base + QUEEN]
+    mobility = np.zeros(len(empty), dtype=np.int64)
+    for sliders, steps in ((bitboards[base + ROOK] | queens, ORTHOGONAL_STEPS),
+                           (bitboards[base + BISHOP] | queens, DIAGONAL_STEPS)):
+        for amount, mask in steps:
+            mobility += np.bitwise_count(_slider_attacks(sliders, empty, amount, mask) & not_own)
+    for amount, mask in KNIGHT_STEPS:
+        mobility += np.bitwise_count(_shift(bitboards[base + KNIGHT], amount) & mask & not_own)
+    return mobility
+
+
+def _pawn_structure(pawns: np.ndarray) -> np.ndarray:
+    """Doubled and isolated pawn penalties of one color, as `chess_AI.pawn_structure_score`."""
+    files = np.stack([np.bitwise_count(pawns & mask) for mask in FILE_MASKS], axis=1).astype(np.int64)
+    padded = np.pad(files, ((0, 0), (1, 1)))
+    isolated = (files > 0) & (padded[:, :-2] == 0) & (padded[:, 2:] == 0)
+    return -(DOUBLED_PAWN_PENALTY * np.maximum(files - 1, 0).sum(axis=1)
+             + ISOLATED_PAWN_PENALTY * (files * isolated).sum(axis=1))
+
+
+def _evaluate_chunk(codes: np.ndarray) -> np.ndarray:
+    # Bit `square` of bitboards[code] is set where that piece stands.
+    bitboards = {code: np.packbits(codes == code, axis=1, bitorder='little').view('<u8')[:, 0]
+                 for code in range(1, 2 * BLACK_OFFSET + 1)}
+    empty = np.packbits(codes == 0, axis=1, bitorder='little').view('<u8')[:, 0]
+    score = PIECE_SQUARE_TABLE[codes, np.arange(64)].sum(axis=1)
+    score += MOBILITY_WEIGHT * (_mobility(bitboards, 0, empty) - _mobility(bitboards, BLACK_OFFSET, empty))
+    score += _pawn_structure(bitboards[PAWN]) - _pawn_structure(bitboards[BLACK_OFFSET + PAWN])
+    return score
+
+
+def evaluate_batch(positions: np.ndarray, color: str = 'white') -> np.ndarray:
+    """(N,) int64 scores in centipawns of an (N, 64) array of positions, for `color`."""
+    codes = np.asarray(positions).astype(np.intp).reshape(-1, 64)
+    scores = np.empty(len(codes), dtype=np.int64)
+    for start in range(0, len(codes), CHUNK_SIZE):
+        scores[start:start + CHUNK_SIZE] = _evaluate_chunk(codes[start:start + CHUNK_SIZE])
+    return scores if color == 'white' else -scores
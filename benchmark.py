@@ -0,0 +1,87 @@
+"""Moves-per-second comparison between the list-of-lists board and the bitboard backend.
+
+Usage: python benchmark.py [--seconds 2.0] [--depth 2]
+"""
+import argparse
+import time
+from typing import Tuple
+
+from board import Board
+from bitboard import convert_board, BACKENDS
+
+# Italian game, used as a busier middlegame position than the initial setup.
+MIDDLEGAME_MOVES = [
+    ((6, 4), (4, 4)), ((1, 4), (3, 4)),
+    ((7, 6), (5, 5)), ((0, 1), (2, 2)),
+    ((7, 5), (4, 2)), ((0, 5), (3, 2)),
+    ((6, 2), (5, 2)), ((0, 6), (2, 5)),
+    ((6, 3), (4, 3)), ((3, 4), (4, 3)),
+]
+
+
+def start_position() -> Board:
+    board = Board([[None for _ in range(8)] for _ in range(8)])
+    board.start_classic_setup()
+    return board
+
+
+def middlegame_position() -> Board:
+    board = start_position()
+    for from_pos, to_pos in MIDDLEGAME_MOVES:
+        board.move_piece(from_pos, to_pos)
+    return board
+
+
+def bench_move_generation(board, color: str, seconds: float) -> Tuple[float, float]:
+    """Return (legal moves generated per second, get_all_moves calls per second)."""
+    calls = 0
+    moves = 0
+    start = time.perf_counter()
+    elapsed = 0.0
+    while elapsed < seconds:
+        moves += len(board.get_all_moves(color))
+        calls += 1
+        elapsed = time.perf_counter() - start
+    return moves / elapsed, calls / elapsed
+
+
+def bench_tree_walk(board, color: str, depth: int) -> Tuple[int, float]:
+    """Play every line `depth` plies deep with copy + move_piece; return (moves played, seconds)."""
+    start = time.perf_counter()
+    played = _walk(board, color, depth)
+    return played, time.perf_counter() - start
+
+
+def _walk(board, color: str, depth: int) -> int:
+    if depth == 0:
+        return 0
+    played = 0
+    for move in board.get_all_moves(color):
+        child = board.copy()
+        child.move_piece(*move)
+        played += 1 + _walk(child, board.get_opponent_color(color), depth - 1)
+    return played
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--seconds", type=float, default=2.0, help="time spent per generation benchmark")
+    parser.add_argument("--depth", type=int, default=2, help="plies played by the tree walk benchmark")
+    args = parser.parse_args()
+
+    positions = {"start": start_position(), "middlegame": middlegame_position()}
+    for name, position in positions.items():
+        print(f"== {name} position ==")
+        results = {}
+        for backend in BACKENDS:
+            board = convert_board(position, backend)
+            moves_per_second, calls_per_second = bench_move_generation(board, 'white', args.seconds)
+            played, seconds = bench_tree_walk(board, 'white', args.depth)
+            results[backend] = moves_per_second
+            print(f"{backend:>9}: {moves_per_second:10.0f} legal moves/s ({calls_per_second:7.1f} get_all_moves/s), "
+                  f"depth {args.depth} walk: {played} moves in {seconds:.2f}s ({played / seconds:.0f} moves/s)")
+        print(f"  speedup: x{results['bitboard'] / results['list']:.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,763 @@
+from chess_pieces import ChessPiece, Pawn, Rook, Knight, Bishop, Queen, King
+from board import (Board, WHITE, BLACK, WHITE_KINGSIDE, WHITE_QUEENSIDE, BLACK_KINGSIDE, BLACK_QUEENSIDE,
+                   ALL_CASTLING_RIGHTS, infer_castling_rights, SIDE_BYTE, CASTLING_BYTE, EN_PASSANT_BYTE,
+                   HALFMOVE_BYTE, LAST_FROM_BYTE, LAST_TO_BYTE, NO_SQUARE)
+from move_generator import LegalityInfo, analyse_position
+from zobrist import PIECE_KEYS, state_key
+from piece_square_tables import PIECE_SQUARE_VALUES
+from attack_tables import (KNIGHT_TARGETS, KING_TARGETS, PAWN_ATTACKS, RAYS, DIRECTIONS,
+                           ORTHOGONAL_DIRECTIONS, DIAGONAL_DIRECTIONS)
+from typing import Tuple, List
+
+# Bitboard layout: bit `row * 8 + col` is set when the square is occupied.
+# Row 0 is black's back rank, exactly like `board.Board.board[row][col]`.
+COLORS = [WHITE, BLACK]
+PIECE_TYPES = [Pawn, Knight, Bishop, Rook, Queen, King]
+PAWN, KNIGHT, BISHOP, ROOK, QUEEN, KING = range(6)
+PIECE_INDEX = {piece_type: index for index, piece_type in enumerate(PIECE_TYPES)}
+# Shared piece instance of each bitboard index.
+PIECES = [piece_type(color) for color in COLORS for piece_type in PIECE_TYPES]
+PROMOTION_INDEX = {'Q': QUEEN, 'R': ROOK, 'B': BISHOP, 'N': KNIGHT}
+PROMOTION_LETTERS = {index: letter for letter, index in PROMOTION_INDEX.items()}
+
+BACKENDS = ("list", "bitboard")
+FILE_MASKS = [0x0101010101010101 << col for col in range(8)]
+
+
+def _mask(squares) -> int:
+    mask = 0
+    for row, col in squares:
+        mask |= 1 << (row * 8 + col)
+    return mask
+
+
+def _table_masks(table) -> List[int]:
+    return [_mask(table[square // 8][square % 8]) for square in range(64)]
+
+
+def _ray_masks(direction: int) -> List[int]:
+    return [_mask(RAYS[square // 8][square % 8][direction]) for square in range(64)]
+
+
+KNIGHT_MASKS = _table_masks(KNIGHT_TARGETS)
+KING_MASKS = _table_masks(KING_TARGETS)
+PAWN_ATTACK_MASKS = [_table_masks(PAWN_ATTACKS[WHITE]), _table_masks(PAWN_ATTACKS[BLACK])]
+
+# (ray masks, True when the ray runs towards higher square indexes)
+ROOK_RAYS = [(_ray_masks(DIRECTIONS.index(direction)), direction > (0, 0)) for direction in ORTHOGONAL_DIRECTIONS]
+BISHOP_RAYS = [(_ray_masks(DIRECTIONS.index(direction)), direction > (0, 0)) for direction in DIAGONAL_DIRECTIONS]
+# (ray masks, True when the ray runs towards higher square indexes, slider types moving along it)
+KING_RAYS = ([(masks, positive, (ROOK, QUEEN)) for masks, positive in ROOK_RAYS]
+             + [(masks, positive, (BISHOP, QUEEN)) for masks, positive in BISHOP_RAYS])
+ALL_SQUARES = (1 << 64) - 1
+
+# Castling rights kept after a move touching a square (king and rook home squares).
+CASTLING_MASKS = [ALL_CASTLING_RIGHTS] * 64
+CASTLING_MASKS[60] &= ~(WHITE_KINGSIDE | WHITE_QUEENSIDE)
+CASTLING_MASKS[63] &= ~WHITE_KINGSIDE
+CASTLING_MASKS[56] &= ~WHITE_QUEENSIDE
+CASTLING_MASKS[4] &= ~(BLACK_KINGSIDE | BLACK_QUEENSIDE)
+CASTLING_MASKS[7] &= ~BLACK_KINGSIDE
+CASTLING_MASKS[0] &= ~BLACK_QUEENSIDE
+
+# (right, king square, king target, rook square, squares to be empty, squares not attacked)
+CASTLING_MOVES = [
+    [(WHITE_KINGSIDE, 60, 62, 63, (61, 62), (60, 61, 62)),
+     (WHITE_QUEENSIDE, 60, 58, 56, (57, 58, 59), (60, 59, 58))],
+    [(BLACK_KINGSIDE, 4, 6, 7, (5, 6), (4, 5, 6)),
+     (BLACK_QUEENSIDE, 4, 2, 0, (1, 2, 3), (4, 3, 2))],
+]
+
+BACK_RANK = [ROOK, KNIGHT, BISHOP, QUEEN, KING, BISHOP, KNIGHT, ROOK]
+
+
+def _lsb(bitboard: int) -> int:
+    return (bitboard & -bitboard).bit_length() - 1
+
+
+def _squares(bitboard: int) -> List[int]:
+    squares = []
+    while bitboard:
+        lsb = bitboard & -bitboard
+        squares.append(lsb.bit_length() - 1)
+        bitboard ^= lsb
+    return squares
+
+
+def _slider_attacks(square: int, occupancy: int, rays) -> int:
+    attacks = 0
+    for masks, positive in rays:
+        ray = masks[square]
+        blockers = ray & occupancy
+        if blockers:
+            blocker = _lsb(blockers) if positive else blockers.bit_length() - 1
+            ray ^= masks[blocker]
+        attacks |= ray
+    return attacks
+
+
+class BitBoard:
+    """Position stored as one 64-bit integer per piece type and color.
+
+    Exposes the same methods as `board.Board` so `Referee`, `ChessAI` and
+    `ChessNotationTranslator` can use either backend.
+    """
+    def __init__(self, board):
+        self.turn = WHITE
+        self._load_grid(board)
+        self.last_moved_piece = None
+        self.last_move_from, self.last_move_to = None, None
+        self.last_moved_piece_init = None
+        self.last_move_from_init, self.last_move_to_init = None, None
+        self._save_start_state()
+
+    @classmethod
+    def from_board(cls, board):
+        """Build a bitboard position from a `board.Board` (or copy another BitBoard)."""
+        if isinstance(board, BitBoard):
+            return board.copy()
+        bitboard = cls(board.board)
+        bitboard.last_moved_piece = getattr(board, 'last_moved_piece', None)
+        bitboard.last_move_from = getattr(board, 'last_move_from', None)
+        bitboard.last_move_to = getattr(board, 'last_move_to', None)
+        bitboard.last_moved_piece_init = getattr(board, 'last_moved_piece_init', None)
+        bitboard.last_move_from_init = getattr(board, 'last_move_from_init', None)
+        bitboard.last_move_to_init = getattr(board, 'last_move_to_init', None)
+        bitboard.castling_rights = board.castling_rights
+        bitboard.en_passant = board.en_passant[0] * 8 + board.en_passant[1] if board.en_passant else -1
+        bitboard.halfmove_clock = getattr(board, 'halfmove_clock', 0)
+        bitboard.turn = getattr(board, 'turn', WHITE)
+        if hasattr(board, 'start_board'):
+            start = cls(board.start_board)
+            bitboard._start_state = (start._start_state[0], board.start_state[0], -1, board.start_state[2])
+        return bitboard
+
+    def to_board(self):
+        """Return an equivalent list-of-lists `board.Board`."""
+        board = Board(self._grid())
+        board.start_board = BitBoard._grid_from_state(self._start_state)
+        board.last_moved_piece = self.last_moved_piece
+        board.last_move_from = self.last_move_from
+        board.last_move_to = self.last_move_to
+        board.last_moved_piece_init = self.last_moved_piece_init
+        board.last_move_from_init = self.last_move_from_init
+        board.last_move_to_init = self.last_move_to_init
+        board.castling_rights = self.castling_rights
+        board.en_passant = divmod(self.en_passant, 8) if self.en_passant >= 0 else None
+        board.halfmove_clock = self.halfmove_clock
+        board.turn = self.turn
+        board.start_state = (self._start_state[1], None, self._start_state[3])
+        return board
+
+    def _load_grid(self, board) -> None:
+        self.bitboards = [0] * 12
+        self.occupancy = [0, 0]
+        self.mailbox = [-1] * 64
+        self.piece_key = 0
+        self.pst_score = 0
+        for row in range(8):
+            for col in range(8):
+                piece = board[row][col]
+                if piece is not None:
+                    self._put(piece, row * 8 + col)
+        self.castling_rights = infer_castling_rights(board)
+        self.en_passant = -1
+        self.halfmove_clock = 0
+
+    def _save_start_state(self) -> None:
+        self._start_state = (tuple(self.bitboards), self.castling_rights, self.en_passant, self.halfmove_clock)
+
+    @staticmethod
+    def _grid_from_state(state):
+        bitboard = BitBoard.__new__(BitBoard)
+        bitboard.bitboards = list(state[0])
+        bitboard.castling_rights = state[1]
+        bitboard._update_occupancy()
+        return bitboard._grid()
+
+    def _index_key(self) -> None:
+        """Recompute the Zobrist key and piece-square score after the bitboards were replaced wholesale."""
+        self.piece_key = 0
+        self.pst_score = 0
+        for index, bitboard in enumerate(self.bitboards):
+            for square in _squares(bitboard):
+                self.piece_key ^= PIECE_KEYS[index][square]
+                self.pst_score += PIECE_SQUARE_VALUES[index][square]
+
+    @property
+    def zobrist_key(self) -> int:
+        """64-bit key of the pieces, side to move, castling rights and en passant file, same as `Board`."""
+        en_passant_col = self.en_passant % 8 if self.en_passant >= 0 else -1
+        return self.piece_key ^ state_key(self.castling_rights, en_passant_col, self.turn == BLACK)
+
+    def _grid(self):
+        return [[self.get_piece(row, col) for col in range(8)] for row in range(8)]
+
+    def __str__(self):
+        """Visual representation of the board."""
+        str_board = ""
+        for row in self._grid():
+            for p in row:
+                str_board += f"{p.__str__()}" if p else ' '
+            str_board += "\n"
+        return str_board
+
+    def reset(self):
+        """Reset the board positions to the first move"""
+        bitboards, self.castling_rights, self.en_passant, self.halfmove_clock = self._start_state
+        self.bitboards = list(bitboards)
+        self._update_occupancy()
+        self._index_key()
+        self.turn = WHITE
+        self.last_move_to = self.last_move_to_init
+        self.last_move_from = self.last_move_from_init
+        self.last_moved_piece = self.last_moved_piece_init
+
+    def start_classic_setup(self):
+        """Initialize the board with the pieces in their starting positions."""
+        self.bitboards = [0] * 12
+        for col, piece_type in enumerate(BACK_RANK):
+            self.bitboards[6 + piece_type] |= 1 << col
+            self.bitboards[piece_type] |= 1 << (56 + col)
+        self.bitboards[6 + PAWN] = 0xFF << 8
+        self.bitboards[PAWN] = 0xFF << 48
+        self._update_occupancy()
+        self._index_key()
+        self.castling_rights = ALL_CASTLING_RIGHTS
+        self.en_passant = -1
+        self.halfmove_clock = 0
+        self.turn = WHITE
+
+        self.last_moved_piece = None
+        self.last_move_from, self.last_move_to = None, None
+        self.last_moved_piece_init = None
+        self.last_move_from_init, self.last_move_to_init = None, None
+        self._save_start_state()
+
+    def change_board(self, board, last_moved_piece, move_from, move_to):
+        self._load_grid(board)
+        self.last_moved_piece = last_moved_piece
+        self.last_moved_piece_init = last_moved_piece.copy()
+        self.last_move_from_init, self.last_move_to_init = move_from, move_to
+        self._save_start_state()
+
+    def get_en_passant_square(self) -> Tuple[int, int]|None:
+        """Square a pawn of the side to move may capture en passant on, or None, as `Board` stores it."""
+        return divmod(self.en_passant, 8) if self.en_passant >= 0 else None
+
+    def has_castling_right(self, color: str, kingside: bool) -> bool:
+        """Check whether `color` may still castle on the given side."""
+        castle = CASTLING_MOVES[COLORS.index(color)][0 if kingside else 1]
+        return bool(self.castling_rights & castle[0])
+
+    def _update_occupancy(self) -> None:
+        """Rebuild the color occupancies and the square-to-piece array from the bitboards."""
+        self.occupancy = [0, 0]
+        self.mailbox = [-1] * 64
+        for index, bitboard in enumerate(self.bitboards):
+            self.occupancy[index // 6] |= bitboard
+            for square in _squares(bitboard):
+                self.mailbox[square] = index
+
+    def _put(self, piece: ChessPiece, square: int) -> None:
+        color = COLORS.index(piece.color)
+        index = color * 6 + PIECE_INDEX[type(piece)]
+        self.bitboards[index] |= 1 << square
+        self.occupancy[color] |= 1 << square
+        self.mailbox[square] = index
+        self.piece_key ^= PIECE_KEYS[index][square]
+        self.pst_score += PIECE_SQUARE_VALUES[index][square]
+
+    def _clear(self, square: int) -> None:
+        index = self._piece_index(square)
+        if index < 0:
+            return
+        self.piece_key ^= PIECE_KEYS[index][square]
+        self.pst_score -= PIECE_SQUARE_VALUES[index][square]
+        bit = 1 << square
+        self.bitboards[index] ^= bit
+        self.occupancy[index // 6] ^= bit
+        self.mailbox[square] = -1
+
+    def _piece_index(self, square: int) -> int:
+        """Bitboard index of the piece on `square`, -1 when it is empty."""
+        return self.mailbox[square]
+
+    def get_piece(self, row, col) -> ChessPiece|None:
+        """Retrieve a piece from the board."""
+        if not (0 <= row < 8 and 0 <= col < 8):
+            return None
+        index = self.mailbox[row * 8 + col]
+        if index < 0:
+            return None
+        return PIECES[index]
+
+    def set_piece(self, piece, row, col):
+        """Place a piece on the board."""
+        square = row * 8 + col
+        self._clear(square)
+        if piece is not None:
+            self._put(piece, square)
+
+    def is_valid_position(self, row, col) -> bool:
+        return 0 <= row < 8 and 0 <= col < 8
+
+    def is_available(self, row, col) -> bool:
+        return self.is_valid_position(row, col) and not (self.occupancy[0] | self.occupancy[1]) >> (row * 8 + col) & 1
+
+    def is_empty(self, row, col) -> bool:
+        """Unchecked emptiness test for squares taken from the attack tables."""
+        return not (self.occupancy[0] | self.occupancy[1]) >> (row * 8 + col) & 1
+
+    def is_opponent_piece(self, row, col, color) -> bool:
+        if self.is_valid_position(row, col):
+            return bool(self.occupancy[1 - COLORS.index(color)] >> (row * 8 + col) & 1)
+        return False
+
+    def erase(self):
+        self.bitboards = [0] * 12
+        self.occupancy = [0, 0]
+        self.mailbox = [-1] * 64
+        self.piece_key = 0
+        self.pst_score = 0
+        self.castling_rights = 0
+        self.en_passant = -1
+        self.halfmove_clock = 0
+
+    def move_piece(self, former_position: Tuple[int, int], new_position: Tuple[int, int], promotion: str = 'Q') -> bool:
+        """Move a piece to a new position, handling special moves like promotion and castling."""
+        from_square = former_position[0] * 8 + former_position[1]
+        to_square = new_position[0] * 8 + new_position[1]
+        self.last_moved_piece = self.get_piece(*former_position)
+        self.last_move_from = former_position
+        self.last_move_to = new_position
+        if self.last_moved_piece is None:
+            return False
+
+        color = 0 if self.occupancy[0] >> from_square & 1 else 1
+        for move in self._generate_legal_moves(color, 1 << from_square):
+            if move[1] == to_square and move[2] in (None, PROMOTION_INDEX[promotion]):
+                self.make_move((former_position, new_position, promotion))
+                return True
+        print("Wrong move !")
+        return False
+
+    def make_move(self, move) -> tuple:
+        """Play `move`, given as (from, to) or (from, to, promotion), without checking its legality.
+
+        Returns the record `unmake_move` uses to restore the position.
+        """
+        (from_row, from_col), (to_row, to_col) = move[0], move[1]
+        from_square = from_row * 8 + from_col
+        to_square = to_row * 8 + to_col
+        promotion = None
+        if self.bitboards[PAWN] >> from_square & 1 and to_row == 0 or self.bitboards[6 + PAWN] >> from_square & 1 and to_row == 7:
+            promotion = PROMOTION_INDEX[move[2] if len(move) > 2 else 'Q']
+        undo = (self._make((from_square, to_square, promotion)),
+                self.last_moved_piece, self.last_move_from, self.last_move_to)
+        self.last_move_from = move[0]
+        self.last_move_to = move[1]
+        self.last_moved_piece = self.get_piece(to_row, to_col)
+        return undo
+
+    def unmake_move(self, undo: tuple) -> None:
+        """Restore the position as it was before the move recorded in `undo`."""
+        self._unmake(undo[0])
+        self.last_moved_piece, self.last_move_from, self.last_move_to = undo[1:]
+
+    def make_null_move(self) -> tuple:
+        """Pass the turn, for null-move pruning: only the side to move and the en passant square change."""
+        undo = (self.en_passant, self.turn)
+        self.en_passant = -1
+        self.turn = self.get_opponent_color(self.turn)
+        return undo
+
+    def unmake_null_move(self, undo: tuple) -> None:
+        self.en_passant, self.turn = undo
+
+    def _execute_move(self, former_position: Tuple[int, int], new_position: Tuple[int, int]) -> None:
+        """Perform a basic move."""
+        piece = self.get_piece(*former_position)
+        self._clear(former_position[0] * 8 + former_position[1])
+        self.set_piece(piece, *new_position)
+
+    def _make(self, move) -> tuple:
+        """Play an internal (from, to, promotion) move and return the state needed to undo it."""
+        from_square, to_square, promotion = move
+        undo = (self.bitboards[:], self.occupancy[:], self.mailbox[:], self.castling_rights, self.en_passant,
+                self.halfmove_clock, self.piece_key, self.pst_score, self.turn)
+        bitboards = self.bitboards
+        occupancy = self.occupancy
+        mailbox = self.mailbox
+        from_bit = 1 << from_square
+        to_bit = 1 << to_square
+        color = 0 if occupancy[0] & from_bit else 1
+        them = 1 - color
+        base = color * 6
+        piece_type = mailbox[from_square] - base
+        placed = base + (piece_type if promotion is None else promotion)
+        key = self.piece_key ^ PIECE_KEYS[base + piece_type][from_square] ^ PIECE_KEYS[placed][to_square]
+        score = (self.pst_score - PIECE_SQUARE_VALUES[base + piece_type][from_square]
+                 + PIECE_SQUARE_VALUES[placed][to_square])
+
+        captured = occupancy[them] & to_bit
+        if captured:
+            index = mailbox[to_square]
+            bitboards[index] ^= to_bit
+            key ^= PIECE_KEYS[index][to_square]
+            score -= PIECE_SQUARE_VALUES[index][to_square]
+            occupancy[them] ^= to_bit
+        elif piece_type == PAWN and to_square == self.en_passant:
+            captured_square = to_square + 8 if color == 0 else to_square - 8
+            bitboards[them * 6 + PAWN] ^= 1 << captured_square
+            occupancy[them] ^= 1 << captured_square
+            mailbox[captured_square] = -1
+            key ^= PIECE_KEYS[them * 6 + PAWN][captured_square]
+            score -= PIECE_SQUARE_VALUES[them * 6 + PAWN][captured_square]
+
+        bitboards[base + piece_type] ^= from_bit
+        bitboards[placed] |= to_bit
+        occupancy[color] ^= from_bit | to_bit
+        mailbox[from_square] = -1
+        mailbox[to_square] = placed
+
+        if piece_type == KING and abs(to_square - from_square) == 2:
+            if to_square > from_square:
+                rook_from, rook_to = from_square + 3, from_square + 1
+            else:
+                rook_from, rook_to = from_square - 4, from_square - 1
+            rook_bits = (1 << rook_from) | (1 << rook_to)
+            bitboards[base + ROOK] ^= rook_bits
+            occupancy[color] ^= rook_bits
+            mailbox[rook_from] = -1
+            mailbox[rook_to] = base + ROOK
+            key ^= PIECE_KEYS[base + ROOK][rook_from] ^ PIECE_KEYS[base + ROOK][rook_to]
+            score += PIECE_SQUARE_VALUES[base + ROOK][rook_to] - PIECE_SQUARE_VALUES[base + ROOK][rook_from]
+        self.piece_key = key
+        self.pst_score = score
+        self.turn = COLORS[them]
+
+        self.castling_rights &= CASTLING_MASKS[from_square] & CASTLING_MASKS[to_square]
+        if piece_type == PAWN and abs(to_square - from_square) == 16:
+            self.en_passant = (from_square + to_square) // 2
+        else:
+            self.en_passant = -1
+        self.halfmove_clock = 0 if piece_type == PAWN or captured else self.halfmove_clock + 1
+        return undo
+
+    def _unmake(self, undo: tuple) -> None:
+        (self.bitboards, self.occupancy, self.mailbox, self.castling_rights, self.en_passant, self.halfmove_clock,
+         self.piece_key, self.pst_score, self.turn) = undo
+
+    def _is_square_attacked(self, square: int, by_color: int, occupancy: int|None = None) -> bool:
+        """Whether `by_color` attacks `square`, sliders seeing through anything missing from `occupancy`."""
+        bitboards = self.bitboards
+        base = by_color * 6
+        if KNIGHT_MASKS[square] & bitboards[base + KNIGHT]:
+            return True
+        if PAWN_ATTACK_MASKS[1 - by_color][square] & bitboards[base + PAWN]:
+            return True
+        if KING_MASKS[square] & bitboards[base + KING]:
+            return True
+        if occupancy is None:
+            occupancy = self.occupancy[0] | self.occupancy[1]
+        rooks = bitboards[base + ROOK] | bitboards[base + QUEEN]
+        if rooks and _slider_attacks(square, occupancy, ROOK_RAYS) & rooks:
+            return True
+        bishops = bitboards[base + BISHOP] | bitboards[base + QUEEN]
+        if bishops and _slider_attacks(square, occupancy, BISHOP_RAYS) & bishops:
+            return True
+        return False
+
+    def _attackers_of(self, square: int, by_color: int) -> int:
+        bitboards = self.bitboards
+        base = by_color * 6
+        occupancy = self.occupancy[0] | self.occupancy[1]
+        return ((KNIGHT_MASKS[square] & bitboards[base + KNIGHT])
+                | (PAWN_ATTACK_MASKS[1 - by_color][square] & bitboards[base + PAWN])
+                | (KING_MASKS[square] & bitboards[base + KING])
+                | (_slider_attacks(square, occupancy, ROOK_RAYS) & (bitboards[base + ROOK] | bitboards[base + QUEEN]))
+                | (_slider_attacks(square, occupancy, BISHOP_RAYS) & (bitboards[base + BISHOP] | bitboards[base + QUEEN])))
+
+    def _attacks_from(self, piece_type: int, color: int, square: int, occupancy: int) -> int:
+        if piece_type == PAWN:
+            return PAWN_ATTACK_MASKS[color][square]
+        if piece_type == KNIGHT:
+            return KNIGHT_MASKS[square]
+        if piece_type == KING:
+            return KING_MASKS[square]
+        attacks = 0
+        if piece_type in (ROOK, QUEEN):
+            attacks |= _slider_attacks(square, occupancy, ROOK_RAYS)
+        if piece_type in (BISHOP, QUEEN):
+            attacks |= _slider_attacks(square, occupancy, BISHOP_RAYS)
+        return attacks
+
+    def _generate_pseudo_moves(self, color: int, sources: int = ALL_SQUARES) -> List[tuple]:
+        """Moves of `color`'s pieces standing on `sources`, without checking that the king is left safe."""
+        moves = []
+        bitboards = self.bitboards
+        own = self.occupancy[color]
+        them = self.occupancy[1 - color]
+        occupancy = own | them
+        base = color * 6
+
+        push = -8 if color == 0 else 8
+        start_rank = (6, 1)[color]
+        promotion_rank = (0, 7)[color]
+        # The en passant square lies on row 2 when white may take, on row 5 when black may.
+        ep_bit = 1 << self.en_passant if self.en_passant >= 0 and self.en_passant // 8 == (2, 5)[color] else 0
+        for from_square in _squares(bitboards[base + PAWN] & sources):
+            targets = []
+            one_step = from_square + push
+            if not occupancy >> one_step & 1:
+                targets.append(one_step)
+                two_step = one_step + push
+                if from_square // 8 == start_rank and not occupancy >> two_step & 1:
+                    targets.append(two_step)
+            targets += _squares(PAWN_ATTACK_MASKS[color][from_square] & (them | ep_bit))
+            for to_square in targets:
+                if to_square // 8 == promotion_rank:
+                    for promotion in (QUEEN, ROOK, BISHOP, KNIGHT):
+                        moves.append((from_square, to_square, promotion))
+                else:
+                    moves.append((from_square, to_square, None))
+
+        for piece_type in (KNIGHT, BISHOP, ROOK, QUEEN, KING):
+            for from_square in _squares(bitboards[base + piece_type] & sources):
+                attacks = self._attacks_from(piece_type, color, from_square, occupancy) & ~own
+                for to_square in _squares(attacks):
+                    moves.append((from_square, to_square, None))
+
+        for right, king_square, king_target, rook_square, empty, safe in CASTLING_MOVES[color]:
+            if not self.castling_rights & right or not sources >> king_square & 1:
+                continue
+            if not (bitboards[base + KING] >> king_square & 1 and bitboards[base + ROOK] >> rook_square & 1):
+                continue
+            if any(occupancy >> square & 1 for square in empty):
+                continue
+            if any(self._is_square_attacked(square, 1 - color) for square in safe):
+                continue
+            moves.append((king_square, king_target, None))
+        return moves
+
+    def _pins(self, color: int, king_square: int, occupancy: int) -> dict:
+        """Absolutely pinned square of `color` -> mask of its pin ray, pinner included."""
+        pins = {}
+        bitboards = self.bitboards
+        them = 1 - color
+        for masks, positive, slider_types in KING_RAYS:
+            ray = masks[king_square]
+            blockers = ray & occupancy
+            if not blockers:
+                continue
+            first = _lsb(blockers) if positive else blockers.bit_length() - 1
+            if not self.occupancy[color] >> first & 1:
+                continue
+            blockers &= masks[first]
+            if not blockers:
+                continue
+            second = _lsb(blockers) if positive else blockers.bit_length() - 1
+            if self.mailbox[second] in (them * 6 + slider_types[0], them * 6 + slider_types[1]):
+                pins[first] = ray ^ masks[second]
+        return pins
+
+    def _generate_legal_moves(self, color: int, sources: int = ALL_SQUARES) -> List[tuple]:
+        """Legal moves of the pieces on `sources`, filtered with the checkers and pins instead of playing them.
+
+        Only en passant captures, which can uncover the king along the rank, are played to be checked.
+        """
+        king = self.bitboards[color * 6 + KING]
+        moves = self._generate_pseudo_moves(color, sources)
+        if not king:
+            return moves
+        them = 1 - color
+        king_square = _lsb(king)
+        occupancy = self.occupancy[0] | self.occupancy[1]
+        checkers = self._attackers_of(king_square, them)
+        if checkers & (checkers - 1):
+            moves = [move for move in moves if move[0] == king_square]
+        # Squares a move other than the king's must land on: the checker or between it and the king.
+        evasions = ALL_SQUARES
+        if checkers:
+            evasions = checkers
+            for masks, _, _ in KING_RAYS:
+                if masks[king_square] & checkers:
+                    evasions = masks[king_square] ^ masks[_lsb(checkers)]
+                    break
+        pins = self._pins(color, king_square, occupancy)
+        without_king = occupancy ^ king
+        pawns = self.bitboards[color * 6 + PAWN]
+        legal_moves = []
+        for move in moves:
+            from_square, to_square = move[0], move[1]
+            if from_square == king_square:
+                if abs(to_square - from_square) == 2 or not self._is_square_attacked(to_square, them, without_king):
+                    legal_moves.append(move)
+            elif to_square == self.en_passant and pawns >> from_square & 1:
+                undo = self._make(move)
+                if not self._is_square_attacked(king_square, them):
+                    legal_moves.append(move)
+                self._unmake(undo)
+            elif evasions >> to_square & 1 and (from_square not in pins or pins[from_square] >> to_square & 1):
+                legal_moves.append(move)
+        return legal_moves
+
+    def get_king_position(self, color: str) -> Tuple[int, int]:
+        """Find and return the position of the king of the specified color."""
+        king = self.bitboards[COLORS.index(color) * 6 + KING]
+        if king:
+            return divmod(_lsb(king), 8)
+        print(f"Did not find king {color}")
+        return -1, -1
+
+    def get_piece_positions(self, color: str, piece_type=None) -> List[Tuple[int, int]]:
+        """Return the squares occupied by `color`, optionally only by pieces of `piece_type`."""
+        color_index = COLORS.index(color)
+        if piece_type is None:
+            bitboard = self.occupancy[color_index]
+        else:
+            bitboard = self.bitboards[color_index * 6 + PIECE_INDEX[piece_type]]
+        return [divmod(square, 8) for square in _squares(bitboard)]
+
+    def get_mobility(self, color: str) -> int:
+        """Same pseudo-legal count as `Board.get_mobility`, from the attack masks."""
+        color_index = COLORS.index(color)
+        occupancy = self.occupancy[0] | self.occupancy[1]
+        not_own = ~self.occupancy[color_index]
+        mobility = 0
+        for piece_type in (KNIGHT, BISHOP, ROOK, QUEEN):
+            for square in _squares(self.bitboards[color_index * 6 + piece_type]):
+                mobility += (self._attacks_from(piece_type, color_index, square, occupancy) & not_own).bit_count()
+        return mobility
+
+    def get_pawn_files(self, color: str) -> List[int]:
+        pawns = self.bitboards[COLORS.index(color) * 6 + PAWN]
+        return [(pawns & FILE_MASKS[col]).bit_count() for col in range(8)]
+
+    def count_pieces(self) -> int:
+        return (self.occupancy[0] | self.occupancy[1]).bit_count()
+
+    def count_non_pawn_pieces(self, color: str) -> int:
+        base = COLORS.index(color) * 6
+        return sum(self.bitboards[base + piece_type].bit_count() for piece_type in (KNIGHT, BISHOP, ROOK, QUEEN))
+
+    def get_attack_map(self, attacker_color: str) -> List[List[int]]:
+        map_attack = [[0 for _ in range(8)] for _ in range(8)]
+        color = COLORS.index(attacker_color)
+        occupancy = self.occupancy[0] | self.occupancy[1]
+        for piece_type in range(6):
+            for square in _squares(self.bitboards[color * 6 + piece_type]):
+                for target in _squares(self._attacks_from(piece_type, color, square, occupancy)):
+                    map_attack[target // 8][target % 8] += 1
+        return map_attack
+
+    def get_opponent_color(self, color) -> str:
+        """Return the opponent's color."""
+        return 'white' if color == 'black' else 'black'
+
+    def is_in_check(self, color) -> bool:
+        """Check if the king of the given color is in check."""
+        king = self.bitboards[COLORS.index(color) * 6 + KING]
+        return bool(king) and self._is_square_attacked(_lsb(king), 1 - COLORS.index(color))
+
+    def is_attacked(self, position, attacker_color) -> bool:
+        """Check if the given position is attacked by any of the opponent's pieces."""
+        return self._is_square_attacked(position[0] * 8 + position[1], COLORS.index(attacker_color))
+
+    def get_attackers(self, position, attacker_color) -> List[Tuple[int, int]]:
+        """Return the squares of the `attacker_color` pieces attacking `position`."""
+        attackers = self._attackers_of(position[0] * 8 + position[1], COLORS.index(attacker_color))
+        return [divmod(square, 8) for square in _squares(attackers)]
+
+    def get_legality_info(self, color: str) -> LegalityInfo:
+        """Checkers, pins and king danger squares of `color` in the current position."""
+        return analyse_position(self, color)
+
+    def get_all_moves(self, color: str) -> List[tuple]:
+        """Generate all legal moves for the specified color, promotions expanded to (from, to, piece letter)."""
+        moves = []
+        for from_square, to_square, promotion in self._generate_legal_moves(COLORS.index(color)):
+            if promotion is None:
+                moves.append((divmod(from_square, 8), divmod(to_square, 8)))
+            else:
+                moves.append((divmod(from_square, 8), divmod(to_square, 8), PROMOTION_LETTERS[promotion]))
+        return moves
+
+    def copy(self):
+        boardcp = BitBoard.__new__(BitBoard)
+        boardcp.bitboards = self.bitboards[:]
+        boardcp.occupancy = self.occupancy[:]
+        boardcp.mailbox = self.mailbox[:]
+        boardcp.castling_rights = self.castling_rights
+        boardcp.en_passant = self.en_passant
+        boardcp.halfmove_clock = self.halfmove_clock
+        boardcp.piece_key = self.piece_key
+        boardcp.pst_score = self.pst_score
+        boardcp.turn = self.turn
+        boardcp.last_moved_piece = self.last_moved_piece
+        boardcp.last_move_from = self.last_move_from
+        boardcp.last_move_to = self.last_move_to
+        boardcp.last_moved_piece_init = self.last_moved_piece_init
+        boardcp.last_move_from_init = self.last_move_from_init
+        boardcp.last_move_to_init = self.last_move_to_init
+        boardcp._start_state = self._start_state
+        return boardcp
+
+    def to_bytes(self) -> bytearray:
+        """Same layout as `Board.to_bytes()`."""
+        data = bytearray(64)
+        for index, bitboard in enumerate(self.bitboards):
+            for square in _squares(bitboard):
+                data[square] = index + 1
+        last_from = self.last_move_from[0] * 8 + self.last_move_from[1] if self.last_move_from is not None else NO_SQUARE
+        last_to = self.last_move_to[0] * 8 + self.last_move_to[1] if self.last_move_to is not None else NO_SQUARE
+        en_passant = self.en_passant if self.en_passant >= 0 else NO_SQUARE
+        return data + bytes((self.turn == BLACK, self.castling_rights, en_passant, min(self.halfmove_clock, 255),
+                             last_from, last_to))
+
+    @classmethod
+    def from_bytes(cls, data):
+        """Build a bitboard position from `to_bytes()` data; the start position is the decoded one."""
+        bitboard = cls([[None for _ in range(8)] for _ in range(8)])
+        bitboard.load_bytes(data)
+        bitboard._save_start_state()
+        return bitboard
+
+    def load_bytes(self, data) -> None:
+        """Restore in place a position saved with `to_bytes()`; the start position is kept."""
+        self.bitboards = [0] * 12
+        for square in range(64):
+            if data[square]:
+                self.bitboards[data[square] - 1] |= 1 << square
+        self._update_occupancy()
+        self._index_key()
+        self.turn = BLACK if data[SIDE_BYTE] else WHITE
+        self.castling_rights = data[CASTLING_BYTE]
+        self.en_passant = data[EN_PASSANT_BYTE] if data[EN_PASSANT_BYTE] != NO_SQUARE else -1
+        self.halfmove_clock = data[HALFMOVE_BYTE]
+        self.last_move_from = divmod(data[LAST_FROM_BYTE], 8) if data[LAST_FROM_BYTE] != NO_SQUARE else None
+        self.last_move_to = divmod(data[LAST_TO_BYTE], 8) if data[LAST_TO_BYTE] != NO_SQUARE else None
+        self.last_moved_piece = self.get_piece(*self.last_move_to) if self.last_move_to is not None else None
+
+    def __eq__(self, board) -> bool:
+        """Same pieces, side to move, castling rights and en passant file, compared by Zobrist key."""
+        return self.zobrist_key == board.zobrist_key
+
+
+def convert_board(board, backend: str = "list"):
+    """Return a copy of `board` stored with the requested backend ("list" or "bitboard")."""
+    if backend == "bitboard":
+        return BitBoard.from_board(board)
+    if backend == "list":
+        return board.to_board() if isinstance(board, BitBoard) else board.copy()
+    raise ValueError(f"Unknown board backend {backend!r}, expected one of {BACKENDS}")
+
+
+def board_from_bytes(data, backend: str = "list"):
+    """Decode `to_bytes()` data into a position stored with the requested backend."""
+    if backend == "bitboard":
+        return BitBoard.from_bytes(data)
+    if backend == "list":
+        return Board.from_bytes(data)
+    raise ValueError(f"Unknown board backend {backend!r}, expected one of {BACKENDS}")
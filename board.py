@@ -1,15 +1,138 @@
 from chess_pieces import ChessPiece, Pawn, Rook, Knight, Bishop, Queen, King
-from copy import deepcopy
-from typing import Tuple, List
+from move_generator import LegalityInfo, analyse_position, generate_legal_moves, find_attackers
+from zobrist import PIECE_KEYS, state_key
+from piece_square_tables import PIECE_SQUARE_VALUES
+from typing import Tuple, List, NamedTuple
 
 BLACK = 'black'
 WHITE = 'white'
 
+WHITE_KINGSIDE, WHITE_QUEENSIDE, BLACK_KINGSIDE, BLACK_QUEENSIDE = 1, 2, 4, 8
+ALL_CASTLING_RIGHTS = 15
+# (right, color, kingside, king square, rook square)
+CASTLING_SIDES = [
+    (WHITE_KINGSIDE, WHITE, True, (7, 4), (7, 7)),
+    (WHITE_QUEENSIDE, WHITE, False, (7, 4), (7, 0)),
+    (BLACK_KINGSIDE, BLACK, True, (0, 4), (0, 7)),
+    (BLACK_QUEENSIDE, BLACK, False, (0, 4), (0, 0)),
+]
+# Castling rights kept after a move leaving or landing on each square.
+CASTLING_MASKS = [[ALL_CASTLING_RIGHTS for _ in range(8)] for _ in range(8)]
+for _right, _, _, (_king_row, _king_col), (_rook_row, _rook_col) in CASTLING_SIDES:
+    CASTLING_MASKS[_king_row][_king_col] &= ~_right
+    CASTLING_MASKS[_rook_row][_rook_col] &= ~_right
+
+PROMOTION_PIECES = {'Q': Queen, 'R': Rook, 'B': Bishop, 'N': Knight}
+PIECE_TYPES = [Pawn, Knight, Bishop, Rook, Queen, King]
+# Zobrist keys of each (color, piece type) by square index row * 8 + col.
+PIECE_SQUARE_KEYS = {(color, piece_type): PIECE_KEYS[color_index * 6 + type_index]
+                     for color_index, color in enumerate((WHITE, BLACK))
+                     for type_index, piece_type in enumerate(PIECE_TYPES)}
+# Material plus placement in centipawns (white positive) of each (color, piece type) by square index.
+PIECE_SQUARE_SCORES = {(color, piece_type): PIECE_SQUARE_VALUES[color_index * 6 + type_index]
+                       for color_index, color in enumerate((WHITE, BLACK))
+                       for type_index, piece_type in enumerate(PIECE_TYPES)}
+
+# Compact encoding (`Board.to_bytes`): one byte per square, row * 8 + col, holding 0 for an empty
+# square or 1 + color * 6 + piece type (the bitboard index + 1), followed by the state bytes.
+CODE_PIECES = [None] + [piece_type(color) for color in (WHITE, BLACK) for piece_type in PIECE_TYPES]
+PIECE_CODES = {piece: code for code, piece in enumerate(CODE_PIECES) if piece is not None}
+SIDE_BYTE, CASTLING_BYTE, EN_PASSANT_BYTE, HALFMOVE_BYTE, LAST_FROM_BYTE, LAST_TO_BYTE = range(64, 70)
+POSITION_SIZE = 70
+NO_SQUARE = 255
+
+
+def infer_castling_rights(board) -> int:
+    """Castling rights of a bare grid: every king and rook still on its home square is taken as unmoved."""
+    rights = 0
+    for right, color, _, (king_row, king_col), (rook_row, rook_col) in CASTLING_SIDES:
+        if board[king_row][king_col] is King(color) and board[rook_row][rook_col] is Rook(color):
+            rights |= right
+    return rights
+
+
+def copy_grid(board):
+    """Copy of an 8x8 grid; the shared immutable pieces are not copied."""
+    return [row[:] for row in board]
+
+
+class UndoInfo(NamedTuple):
+    """Everything `Board.unmake_move` needs to take a move back."""
+    move: tuple
+    piece: ChessPiece
+    captured: ChessPiece|None
+    captured_position: Tuple[int, int]|None
+    rook_move: Tuple[Tuple[int, int], Tuple[int, int]]|None
+    castling_rights: int
+    en_passant: Tuple[int, int]|None
+    halfmove_clock: int
+    last_moved_piece: ChessPiece|None
+    last_move_from: Tuple[int, int]|None
+    last_move_to: Tuple[int, int]|None
+    turn: str
+
+
 class Board:
     def __init__(self, board):
         self.board = board
-        self.start_board = deepcopy(board)
-        
+        self.start_board = copy_grid(board)
+        self.castling_rights = infer_castling_rights(board)
+        self.en_passant = None
+        self.halfmove_clock = 0
+        self.last_moved_piece = None
+        self.last_move_from, self.last_move_to = None, None
+        self.last_moved_piece_init = None
+        self.last_move_from_init, self.last_move_to_init = None, None
+        self.start_state = (self.castling_rights, self.en_passant, self.halfmove_clock)
+        self.turn = WHITE
+        self._index_pieces()
+
+    def _index_pieces(self) -> None:
+        """Rebuild the per-color, per-type square sets, the king squares, the piece codes, key and score from the grid."""
+        self.piece_squares = {color: {piece_type: set() for piece_type in PIECE_TYPES} for color in (WHITE, BLACK)}
+        self.king_squares = {WHITE: None, BLACK: None}
+        self.piece_key = 0
+        self.pst_score = 0
+        self.codes = bytearray(64)
+        for row in range(8):
+            for col in range(8):
+                piece = self.board[row][col]
+                if piece is not None:
+                    self.piece_squares[piece.color][type(piece)].add((row, col))
+                    self.codes[row * 8 + col] = PIECE_CODES[piece]
+                    self.piece_key ^= PIECE_SQUARE_KEYS[piece.color, type(piece)][row * 8 + col]
+                    self.pst_score += PIECE_SQUARE_SCORES[piece.color, type(piece)][row * 8 + col]
+                    if isinstance(piece, King):
+                        self.king_squares[piece.color] = (row, col)
+
+    @property
+    def zobrist_key(self) -> int:
+        """64-bit key of the pieces, side to move, castling rights and en passant file."""
+        en_passant_col = self.en_passant[1] if self.en_passant is not None else -1
+        return self.piece_key ^ state_key(self.castling_rights, en_passant_col, self.turn == BLACK)
+
+    def _place_piece(self, piece: ChessPiece, row: int, col: int) -> None:
+        """Put `piece` on an empty square, keeping the piece sets up to date."""
+        self.board[row][col] = piece
+        self.piece_squares[piece.color][type(piece)].add((row, col))
+        self.codes[row * 8 + col] = PIECE_CODES[piece]
+        self.piece_key ^= PIECE_SQUARE_KEYS[piece.color, type(piece)][row * 8 + col]
+        self.pst_score += PIECE_SQUARE_SCORES[piece.color, type(piece)][row * 8 + col]
+        if isinstance(piece, King):
+            self.king_squares[piece.color] = (row, col)
+
+    def _remove_piece(self, row: int, col: int) -> ChessPiece|None:
+        """Empty a square, keeping the piece sets up to date, and return what stood there."""
+        piece = self.board[row][col]
+        if piece is not None:
+            self.board[row][col] = None
+            self.piece_squares[piece.color][type(piece)].discard((row, col))
+            self.codes[row * 8 + col] = 0
+            self.piece_key ^= PIECE_SQUARE_KEYS[piece.color, type(piece)][row * 8 + col]
+            self.pst_score -= PIECE_SQUARE_SCORES[piece.color, type(piece)][row * 8 + col]
+            if self.king_squares[piece.color] == (row, col):
+                self.king_squares[piece.color] = None
+        return piece
 
     def __str__(self):
         """Visual representation of the board."""
@@ -22,7 +145,10 @@ class Board:
     
     def reset(self):
         """Reset the board positions to the first move"""
-        self.board = deepcopy(self.start_board)
+        self.board = copy_grid(self.start_board)
+        self.castling_rights, self.en_passant, self.halfmove_clock = self.start_state
+        self.turn = WHITE
+        self._index_pieces()
         self.last_move_to = self.last_move_to_init
         self.last_move_from = self.last_move_from_init
         self.last_moved_piece = self.last_moved_piece_init
@@ -35,41 +161,52 @@ class Board:
             for j in range(8):
                 self.board[i][j] = None
 
-        self.board[0][0] = Rook(BLACK, (0, 0))
-        self.board[0][7] = Rook(BLACK, (0, 7))
-        self.board[0][1] = Knight(BLACK, (0, 1))
-        self.board[0][6] = Knight(BLACK, (0, 6))
-        self.board[0][2] = Bishop(BLACK, (0, 2))
-        self.board[0][5] = Bishop(BLACK, (0, 5))
-        self.board[0][3] = Queen(BLACK, (0, 3))
-        self.board[0][4] = King(BLACK, (0, 4))
+        self.board[0][0] = Rook(BLACK)
+        self.board[0][7] = Rook(BLACK)
+        self.board[0][1] = Knight(BLACK)
+        self.board[0][6] = Knight(BLACK)
+        self.board[0][2] = Bishop(BLACK)
+        self.board[0][5] = Bishop(BLACK)
+        self.board[0][3] = Queen(BLACK)
+        self.board[0][4] = King(BLACK)
         for i in range(8):
-            self.board[1][i] = Pawn(BLACK, (1, i))
+            self.board[1][i] = Pawn(BLACK)
 
         # White pieces
-        self.board[7][0] = Rook(WHITE, (7, 0))
-        self.board[7][7] = Rook(WHITE, (7, 7))
-        self.board[7][1] = Knight(WHITE, (7, 1))
-        self.board[7][6] = Knight(WHITE, (7, 6))
-        self.board[7][2] = Bishop(WHITE, (7, 2))
-        self.board[7][5] = Bishop(WHITE, (7, 5))
-        self.board[7][3] = Queen(WHITE, (7, 3))
-        self.board[7][4] = King(WHITE, (7, 4))
+        self.board[7][0] = Rook(WHITE)
+        self.board[7][7] = Rook(WHITE)
+        self.board[7][1] = Knight(WHITE)
+        self.board[7][6] = Knight(WHITE)
+        self.board[7][2] = Bishop(WHITE)
+        self.board[7][5] = Bishop(WHITE)
+        self.board[7][3] = Queen(WHITE)
+        self.board[7][4] = King(WHITE)
         for i in range(8):
-            self.board[6][i] = Pawn(WHITE, (6, i))
+            self.board[6][i] = Pawn(WHITE)
 
         self.last_moved_piece = None
         self.last_move_from, self.last_move_to = None, None
         self.last_moved_piece_init = None
         self.last_move_from_init, self.last_move_to_init = None, None
-        self.start_board = deepcopy(self.board)
+        self.castling_rights = ALL_CASTLING_RIGHTS
+        self.en_passant = None
+        self.halfmove_clock = 0
+        self.start_state = (self.castling_rights, self.en_passant, self.halfmove_clock)
+        self.start_board = copy_grid(self.board)
+        self.turn = WHITE
+        self._index_pieces()
 
     def change_board(self, board, last_moved_piece, move_from, move_to):
         self.board = board
         self.last_moved_piece = last_moved_piece
         self.last_moved_piece_init = last_moved_piece.copy()
         self.last_move_from_init, self.last_move_to_init = move_from, move_to
-        self.start_board = deepcopy(board)
+        self.castling_rights = infer_castling_rights(board)
+        self.en_passant = None
+        self.halfmove_clock = 0
+        self.start_state = (self.castling_rights, self.en_passant, self.halfmove_clock)
+        self.start_board = copy_grid(board)
+        self._index_pieces()
 
     def get_piece(self, row, col) -> ChessPiece|None:
         """Retrieve a piece from the board."""
@@ -77,7 +214,9 @@ class Board:
 
     def set_piece(self, piece, row, col):
         """Place a piece on the board."""
-        self.board[row][col] = piece
+        self._remove_piece(row, col)
+        if piece is not None:
+            self._place_piece(piece, row, col)
     
     def is_valid_position(self, row, col) -> bool:
         return 0 <= row < 8 and 0 <= col < 8
@@ -85,90 +224,148 @@ class Board:
     def is_available(self, row, col) -> bool:
         return self.is_valid_position(row, col) and self.board[row][col] is None
 
-    def move_piece(self, former_position: Tuple[int, int], new_position: Tuple[int, int]) -> bool:
+    def is_empty(self, row, col) -> bool:
+        """Unchecked emptiness test for squares taken from the attack tables."""
+        return self.board[row][col] is None
+
+    def get_en_passant_square(self) -> Tuple[int, int]|None:
+        """Square a pawn of the side to move may capture en passant on, or None."""
+        return self.en_passant
+
+    def has_castling_right(self, color: str, kingside: bool) -> bool:
+        """Check whether `color` may still castle on the given side."""
+        for right, right_color, right_kingside, _, _ in CASTLING_SIDES:
+            if right_color == color and right_kingside == kingside:
+                return bool(self.castling_rights & right)
+        return False
+
+    def move_piece(self, former_position: Tuple[int, int], new_position: Tuple[int, int], promotion: str = 'Q') -> bool:
         """Move a piece to a new position, handling special moves like promotion and castling."""
         piece = self.get_piece(former_position[0], former_position[1])
-        self.last_moved_piece = piece
-        self.last_move_from = former_position
-        self.last_move_to = new_position
         if not piece:
             return False
-        row, col = piece.position
-        new_row, new_col = new_position
-        
-        
-        if (new_row, new_col) not in piece.get_possible_moves(self):
+
+        if new_position not in piece.get_possible_moves(self, former_position):
             print("Wrong move !")
             return False
 
-        # Handle special cases for pawn promotion and castling
+        self.make_move((former_position, new_position, promotion))
+        return True
+
+    def make_move(self, move) -> UndoInfo:
+        """Play `move`, given as (from, to) or (from, to, promotion), without checking its legality.
+
+        Returns the record `unmake_move` uses to restore the position.
+        """
+        former_position, new_position = move[0], move[1]
+        promotion = move[2] if len(move) > 2 else 'Q'
+        piece = self.board[former_position[0]][former_position[1]]
+        captured = self.board[new_position[0]][new_position[1]]
+        captured_position = new_position if captured is not None else None
+        rook_move = None
+        undo_state = (self.castling_rights, self.en_passant, self.halfmove_clock,
+                      self.last_moved_piece, self.last_move_from, self.last_move_to, self.turn)
+
+        # Handle special cases for pawn promotion, en passant and castling
         if isinstance(piece, Pawn):
-            self._handle_pawn_moves(piece, new_position)
+            en_passant_capture = self._handle_pawn_moves(former_position, new_position, promotion)
+            if en_passant_capture is not None:
+                captured, captured_position = en_passant_capture
         elif isinstance(piece, King):
-            self._handle_king_moves(piece, new_position)
+            rook_move = self._handle_king_moves(former_position, new_position)
         else:
-            self._execute_move(piece, new_position)
-        
-        self.last_move_from = row, col
-        self.last_move_to = new_row, new_col
-        self.last_moved_piece = self.get_piece(new_row, new_col)
+            self._execute_move(former_position, new_position)
 
-        return True
+        self.castling_rights &= (CASTLING_MASKS[former_position[0]][former_position[1]]
+                                 & CASTLING_MASKS[new_position[0]][new_position[1]])
+        if isinstance(piece, Pawn) and abs(new_position[0] - former_position[0]) == 2:
+            self.en_passant = ((former_position[0] + new_position[0]) // 2, former_position[1])
+        else:
+            self.en_passant = None
+        self.halfmove_clock = 0 if isinstance(piece, Pawn) or captured is not None else self.halfmove_clock + 1
 
-    def _execute_move(self, piece:ChessPiece, new_position: Tuple[int, int]) -> None:
-        """Perform a basic move."""
-        old_row, old_col = piece.position
+        self.last_move_from = former_position
+        self.last_move_to = new_position
+        self.last_moved_piece = self.board[new_position[0]][new_position[1]]
+        self.turn = self.get_opponent_color(piece.color)
+        return UndoInfo(move, piece, captured, captured_position, rook_move, *undo_state)
 
-        new_row, new_col = new_position
+    def unmake_move(self, undo: UndoInfo) -> None:
+        """Restore the position as it was before the move recorded in `undo`."""
+        former_position, new_position = undo.move[0], undo.move[1]
+        piece = undo.piece
+        self._remove_piece(*new_position)
+        self._place_piece(piece, *former_position)
 
-        self.board[old_row][old_col] = None
-        self.board[new_row][new_col] = piece
-        piece.position = new_position
-        piece.row, piece.col = new_row, new_col
+        if undo.captured is not None:
+            self._place_piece(undo.captured, *undo.captured_position)
+        if undo.rook_move is not None:
+            rook_from, rook_to = undo.rook_move
+            self._execute_move(rook_to, rook_from)
 
+        (self.castling_rights, self.en_passant, self.halfmove_clock,
+         self.last_moved_piece, self.last_move_from, self.last_move_to, self.turn) = undo[5:]
+
+    def make_null_move(self) -> tuple:
+        """Pass the turn, for null-move pruning: only the side to move and the en passant square change."""
+        undo = (self.en_passant, self.turn)
+        self.en_passant = None
+        self.turn = self.get_opponent_color(self.turn)
+        return undo
+
+    def unmake_null_move(self, undo: tuple) -> None:
+        self.en_passant, self.turn = undo
+
+    def _execute_move(self, former_position: Tuple[int, int], new_position: Tuple[int, int]) -> None:
+        """Perform a basic move."""
+        piece = self._remove_piece(*former_position)
+        self._remove_piece(*new_position)
+        self._place_piece(piece, *new_position)
 
-    def _handle_castling(self, king: King, new_position: Tuple[int, int]) -> None:
+
+    def _handle_castling(self, former_position: Tuple[int, int], new_position: Tuple[int, int]) -> Tuple[Tuple[int, int], Tuple[int, int]]:
         """Handle castling by moving both the king and the appropriate rook."""
         new_row, new_col = new_position
         # King-side castling
         if new_col == 6:
-            rook = self.get_piece(new_row, 7)
-            self._execute_move(rook, (new_row, 5))
+            rook_move = (new_row, 7), (new_row, 5)
         # Queen-side castling
-        elif new_col == 2:
-            rook = self.get_piece(new_row, 0)
-            self._execute_move(rook, (new_row, 3))
+        else:
+            rook_move = (new_row, 0), (new_row, 3)
+        self._execute_move(*rook_move)
 
-        self._execute_move(king, new_position)
+        self._execute_move(former_position, new_position)
+        return rook_move
     
-    def _handle_en_passant(self, pawn: Pawn, new_position: Tuple[int, int]) -> None:
+    def _handle_en_passant(self, former_position: Tuple[int, int], new_position: Tuple[int, int]) -> Tuple[Pawn, Tuple[int, int]]:
         _, new_col = new_position
-        old_row = pawn.row
-        self._execute_move(pawn, new_position)
-        self.board[old_row][new_col] = None
+        old_row = former_position[0]
+        self._execute_move(former_position, new_position)
+        captured = self._remove_piece(old_row, new_col)
+        return captured, (old_row, new_col)
 
-    def _handle_pawn_moves(self, piece:Pawn, new_position: Tuple[int, int]) -> None:
+    def _handle_pawn_moves(self, former_position: Tuple[int, int], new_position: Tuple[int, int], promotion: str = 'Q') -> Tuple[Pawn, Tuple[int, int]]|None:
             new_row, new_col = new_position
-            row, col = piece.row, piece.col
+            row, col = former_position
+            piece = self.board[row][col]
         # Promotion: if a pawn reaches the final row
             if (new_row == 0 and piece.color == WHITE) or (new_row == 7 and piece.color == BLACK):
-                # Promote the pawn to a queen (can be modified for other promotions)
-                self.board[new_row][new_col] = Queen(piece.color, (new_row, new_col))
-                self.board[row][col] = None
+                self._remove_piece(row, col)
+                self._remove_piece(new_row, new_col)
+                self._place_piece(PROMOTION_PIECES[promotion](piece.color), new_row, new_col)
             
             elif (new_col!=col) and self.is_available(new_row, new_col):
-                    self._handle_en_passant(piece, (new_row, new_col))
+                    return self._handle_en_passant(former_position, (new_row, new_col))
             else:
-                self._execute_move(piece, new_position)
+                self._execute_move(former_position, new_position)
     
-    def _handle_king_moves(self, piece: King, new_position) -> None:
+    def _handle_king_moves(self, former_position: Tuple[int, int], new_position) -> Tuple[Tuple[int, int], Tuple[int, int]]|None:
         # Handle castling
         _, new_col = new_position
-        col = piece.col
+        col = former_position[1]
         if abs(col - new_col) == 2:
-            self._handle_castling(piece, new_position)
-        else:
-            self._execute_move(piece, new_position)
+            return self._handle_castling(former_position, new_position)
+        self._execute_move(former_position, new_position)
 
     def is_opponent_piece(self, row, col, color) -> bool:
         if self.is_valid_position(row, col):
@@ -178,28 +375,56 @@ class Board:
 
     def erase(self):
         self.board = [[None for _ in range(8)] for _ in range(8)]
+        self._index_pieces()
 
     def get_king_position(self, color: str) -> Tuple[int, int]:
-        """Find and return the position of the king of the specified color."""
-        for row in range(8):
-            for col in range(8):
-                piece = self.get_piece(row, col)
-                if isinstance(piece, King) and piece.color == color:
-                    return row, col
-        print(f"Did not find king {color}")
-        return -1, -1
+        """Return the position of the king of the specified color."""
+        king_position = self.king_squares[color]
+        if king_position is None:
+            print(f"Did not find king {color}")
+            return -1, -1
+        return king_position
+
+    def get_piece_positions(self, color: str, piece_type=None) -> List[Tuple[int, int]]:
+        """Return the squares occupied by `color`, optionally only by pieces of `piece_type`."""
+        if piece_type is not None:
+            return list(self.piece_squares[color][piece_type])
+        return [position for squares in self.piece_squares[color].values() for position in squares]
     
+    def get_mobility(self, color: str) -> int:
+        """Squares attacked by `color`'s knights, bishops, rooks and queens that are not its own pieces.
+
+        Pins and checks are ignored: this is a cheap pseudo-legal count meant for evaluation.
+        """
+        mobility = 0
+        for piece_type in (Knight, Bishop, Rook, Queen):
+            for row, col in self.piece_squares[color][piece_type]:
+                for target_row, target_col in self.board[row][col].get_defended_squares(self, (row, col)):
+                    target = self.board[target_row][target_col]
+                    if target is None or target.color != color:
+                        mobility += 1
+        return mobility
+
+    def get_pawn_files(self, color: str) -> List[int]:
+        """Number of `color`'s pawns on each file, a to h."""
+        files = [0] * 8
+        for _, col in self.piece_squares[color][Pawn]:
+            files[col] += 1
+        return files
+
+    def count_pieces(self) -> int:
+        """Pieces of both colors on the board, kings included."""
+        return 64 - self.codes.count(0)
+
+    def count_non_pawn_pieces(self, color: str) -> int:
+        """Knights, bishops, rooks and queens of `color`."""
+        return sum(len(self.piece_squares[color][piece_type]) for piece_type in (Knight, Bishop, Rook, Queen))
+
     def get_attack_map(self, attacker_color: str) -> List[List[int]]:
         map_attack = [[0 for _ in range(8)] for _ in range(8)]
-        for r in range(8):
-            for c in range(8):
-                piece = self.get_piece(r,c)
-                if piece is None:
-                    continue
-                if piece.color != attacker_color:
-                    continue
-                for rd, cd in piece.get_defended_squares(self):
-                    map_attack[rd][cd] += 1
+        for r, c in self.get_piece_positions(attacker_color):
+            for rd, cd in self.board[r][c].get_defended_squares(self, (r, c)):
+                map_attack[rd][cd] += 1
         return map_attack
     
     def get_opponent_color(self, color) -> str:
@@ -213,41 +438,77 @@ class Board:
 
     def is_attacked(self, position, attacker_color) -> bool:
         """Check if the given position is attacked by any of the opponent's pieces."""
-        for row in range(8):
-            for col in range(8):
-                piece = self.get_piece(row, col)
-                if piece and piece.color == attacker_color:
-                    if position in piece.get_defended_squares(self):
-                        return True
-        return False
+        return bool(find_attackers(self, position, attacker_color, first_only=True))
+
+    def get_attackers(self, position, attacker_color) -> List[Tuple[int, int]]:
+        """Return the squares of the `attacker_color` pieces attacking `position`."""
+        return find_attackers(self, position, attacker_color)
     
-    def get_all_moves(self, color: str) -> List[Tuple[Tuple[int, int], Tuple[int, int]]]:
-        """Generate all possible moves for the specified color."""
-        moves = []
-        for row in range(8):
-            for col in range(8):
-                piece = self.get_piece(row, col)
-                if piece and piece.color == color:
-                    for move in piece.get_possible_moves(self):
-                        moves.append(((row, col), move))
-        return moves
+    def get_legality_info(self, color: str) -> LegalityInfo:
+        """Checkers, pins and king danger squares of `color` in the current position."""
+        return analyse_position(self, color)
+
+    def get_all_moves(self, color: str) -> List[tuple]:
+        """Generate all legal moves for the specified color, promotions expanded to (from, to, piece letter)."""
+        return generate_legal_moves(self, color)
     
     def copy(self):
-        boardcp = Board(deepcopy(self.board)) 
+        """Copy of the position: the grid rows and piece sets are copied, the shared pieces are not."""
+        boardcp = Board.__new__(Board)
+        boardcp.board = copy_grid(self.board)
+        boardcp.piece_squares = {color: {piece_type: set(squares) for piece_type, squares in pieces.items()}
+                                 for color, pieces in self.piece_squares.items()}
+        boardcp.king_squares = dict(self.king_squares)
+        boardcp.piece_key = self.piece_key
+        boardcp.pst_score = self.pst_score
+        boardcp.codes = self.codes[:]
         boardcp.last_moved_piece = self.last_moved_piece 
         boardcp.last_move_from = self.last_move_from
         boardcp.last_move_to = self.last_move_to
         boardcp.last_moved_piece_init = self.last_moved_piece_init 
         boardcp.last_move_from_init = self.last_move_from_init
         boardcp.last_move_to_init = self.last_move_to_init
-        boardcp.start_board = deepcopy(self.start_board)
+        # Never modified in place: reset() copies it.
+        boardcp.start_board = self.start_board
+        boardcp.castling_rights = self.castling_rights
+        boardcp.en_passant = self.en_passant
+        boardcp.halfmove_clock = self.halfmove_clock
+        boardcp.start_state = self.start_state
+        boardcp.turn = self.turn
         return boardcp
+
+    def to_bytes(self) -> bytearray:
+        """Snapshot of the position: 64 piece codes then side, castling, en passant, halfmove clock and last move.
+
+        The piece codes are kept up to date by every move, so this is a single buffer copy.
+        """
+        en_passant = self.en_passant[0] * 8 + self.en_passant[1] if self.en_passant is not None else NO_SQUARE
+        last_from = self.last_move_from[0] * 8 + self.last_move_from[1] if self.last_move_from is not None else NO_SQUARE
+        last_to = self.last_move_to[0] * 8 + self.last_move_to[1] if self.last_move_to is not None else NO_SQUARE
+        return self.codes + bytes((self.turn == BLACK, self.castling_rights, en_passant,
+                                   min(self.halfmove_clock, 255), last_from, last_to))
+
+    @classmethod
+    def from_bytes(cls, data):
+        """Build a board from `to_bytes()` data; the start position is the decoded one."""
+        board = cls([[None for _ in range(8)] for _ in range(8)])
+        board.load_bytes(data)
+        board.start_board = copy_grid(board.board)
+        board.start_state = (board.castling_rights, board.en_passant, board.halfmove_clock)
+        return board
+
+    def load_bytes(self, data) -> None:
+        """Restore in place a position saved with `to_bytes()`; the start position is kept."""
+        self.board = [[CODE_PIECES[code] for code in data[row * 8:row * 8 + 8]] for row in range(8)]
+        self._index_pieces()
+        self.turn = BLACK if data[SIDE_BYTE] else WHITE
+        self.castling_rights = data[CASTLING_BYTE]
+        self.en_passant = divmod(data[EN_PASSANT_BYTE], 8) if data[EN_PASSANT_BYTE] != NO_SQUARE else None
+        self.halfmove_clock = data[HALFMOVE_BYTE]
+        self.last_move_from = divmod(data[LAST_FROM_BYTE], 8) if data[LAST_FROM_BYTE] != NO_SQUARE else None
+        self.last_move_to = divmod(data[LAST_TO_BYTE], 8) if data[LAST_TO_BYTE] != NO_SQUARE else None
+        self.last_moved_piece = self.get_piece(*self.last_move_to) if self.last_move_to is not None else None
     
     def __eq__(self, board) -> bool:
-        for i in range(8):
-            for j in range(8):
-                current_piece = self.get_piece(i,j)
-                other_piece = board.get_piece(i,j)
-                if current_piece!=other_piece:
-                    return False
-        return True                    
+        """Same pieces, side to move, castling rights and en passant file, compared by Zobrist key."""
+        return self.zobrist_key == board.zobrist_key
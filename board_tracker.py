@@ -8,42 +8,46 @@ class BoardTracker():
         return f"index: {str(self.index)}, turn_count: {str(self.referee.turn_count)}, board_list_size: {len(self.board_list)}"
 
     def reset(self):
-        self.board_list = [self.referee.board.copy()]
+        # Positions are kept as `Board.to_bytes()` snapshots, with their Zobrist keys for repetitions.
+        self.board_list = [self.referee.board.to_bytes()]
+        self.key_list = [self.referee.board.zobrist_key]
         self.index = 0
         self.max_index = 0
 
     def get_current_board(self):
-        return self.board_list[self.index].copy()
+        return type(self.referee.board).from_bytes(self.board_list[self.index])
 
     def undo(self):
         if self.index > 0:
             self.index -= 1
             self.referee.turn_count -= 1
-        self.referee.board = self.get_current_board()
+        self.referee.board.load_bytes(self.board_list[self.index])
     
     def redo(self):
         if self.index + 1 < len(self.board_list):
             self.index += 1
             self.referee.turn_count += 1
-        self.referee.board = self.get_current_board()
+        self.referee.board.load_bytes(self.board_list[self.index])
     
     def update(self):
         # Tronquer les futurs états si on revient en arrière
         if self.index < len(self.board_list) - 1:
             self.board_list = self.board_list[:self.index+1]
+            self.key_list = self.key_list[:self.index+1]
             self.referee.freeze_timers()
         
         # Ajouter une copie de l'état actuel
-        self.board_list.append(self.referee.board.copy())
+        self.board_list.append(self.referee.board.to_bytes())
+        self.key_list.append(self.referee.board.zobrist_key)
         self.index += 1
         self.check_repetition()
 
     def check_repetition(self):
-        current_board = self.board_list[-1]
+        current_key = self.key_list[-1]
         c = 0
-        for i in range(len(self.board_list)-1):
-            if current_board == self.board_list[i]:
+        for i in range(len(self.key_list)-1):
+            if self.key_list[i] == current_key:
                 c+=1
             if c == 2:
                 self.referee.state = "repetition"
-                break
\ No newline at end of file
+                break
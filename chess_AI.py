@@ -1,105 +1,844 @@
 import math
+import multiprocessing
+import random
+import threading
+import time
 from typing import Tuple, List
+from bitboard import board_from_bytes
+from chess_pieces import Pawn
+from transposition_table import TranspositionTable, SharedTranspositionTable, EXACT, LOWER_BOUND, UPPER_BOUND
+from move_ordering import MoveOrderer, ORDER_VALUES, PROMOTION_VALUES, capture_victim, is_quiet
+from tablebase import MAX_PIECES, WIN, LOSS
+
+# Scores are integer centipawns.
+MATE_SCORE = 100000
+# Iterative deepening stops here even when the budget is not spent.
+MAX_SEARCH_DEPTH = 64
+# Scores beyond this are mates: the ply of the mate, from the search or a tablebase, is taken off MATE_SCORE.
+MATE_THRESHOLD = MATE_SCORE - 1000
+# The clock is read once every this many nodes (a power of two minus one, used as a mask).
+TIME_CHECK_MASK = 63
+# Quiescence skips captures that cannot bring the score back up to alpha even with this much to spare.
+DELTA_MARGIN = 200
+# Centipawns per square a knight, bishop, rook or queen can move to.
+MOBILITY_WEIGHT = 4
+# Centipawns lost per pawn beyond the first on a file, and per pawn without a pawn of its color on
+# either neighbouring file.
+DOUBLED_PAWN_PENALTY = 10
+ISOLATED_PAWN_PENALTY = 15
+# Null-move pruning: from this depth, let the opponent move twice with the search reduced by R, or R + 1
+# above NULL_MOVE_DEEP_DEPTH. With at most NULL_MOVE_VERIFY_PIECES pieces other than pawns, zugzwang is
+# likely, so a null-move cutoff is only taken once a reduced normal search confirms it.
+NULL_MOVE_MIN_DEPTH = 3
+NULL_MOVE_REDUCTION = 2
+NULL_MOVE_DEEP_DEPTH = 7
+NULL_MOVE_VERIFY_PIECES = 2
+# Late-move reductions: quiet moves after the first LMR_MIN_MOVES are searched one ply shallower, two
+# after LMR_DEEP_MOVES, and again at full depth if they beat alpha anyway.
+LMR_MIN_DEPTH = 3
+LMR_MIN_MOVES = 3
+LMR_DEEP_MOVES = 6
+# Aspiration windows: each depth after the first is searched this far either side of the previous score.
+# A side that fails is widened ASPIRATION_GROWTH times, and opened fully past ASPIRATION_LIMIT.
+ASPIRATION_WINDOW = 50
+ASPIRATION_GROWTH = 4
+ASPIRATION_LIMIT = 1000
+# Nodes a root-split worker takes at a time from the node budget shared by all workers.
+NODE_BATCH = 64
+# "root" splits the root moves of each iteration over the workers; "smp" runs the whole search in every
+# worker (lazy SMP), the workers only sharing the transposition table.
+PARALLEL_MODES = ("root", "smp")
+
+
+def score_to_table(score: int, ply: int) -> int:
+    """Mate scores are stored as distance from the stored node, not from the root."""
+    if score >= MATE_THRESHOLD:
+        return score + ply
+    if score <= -MATE_THRESHOLD:
+        return score - ply
+    return score
+
+
+def score_from_table(score: int, ply: int) -> int:
+    if score >= MATE_THRESHOLD:
+        return score - ply
+    if score <= -MATE_THRESHOLD:
+        return score + ply
+    return score
+
+
+def pawn_structure_score(files: List[int]) -> int:
+    """Doubled and isolated pawn penalties of one side, from its number of pawns on each file."""
+    score = 0
+    for col, count in enumerate(files):
+        if count:
+            score -= DOUBLED_PAWN_PENALTY * (count - 1)
+            if not (col > 0 and files[col - 1]) and not (col < 7 and files[col + 1]):
+                score -= ISOLATED_PAWN_PENALTY * count
+    return score
+
+
+def tablebase_score(result: Tuple[int, int], ply: int) -> int:
+    """Search score of a tablebase (outcome, plies to mate) result found `ply` plies from the root."""
+    outcome, plies = result
+    if outcome == WIN:
+        return MATE_SCORE - ply - plies
+    if outcome == LOSS:
+        return -MATE_SCORE + ply + plies
+    return 0
+
+
+class SearchAborted(Exception):
+    """Raised inside the search tree when the time or node budget runs out."""
+
+
+class SearchStats:
+    """Counters of one search, read from `ChessAI.last_stats` or passed to `on_iteration` after each depth.
+
+    They are copied from the counters the search keeps anyway, only when asked for. Besides `nodes`, which includes the
+    root-split workers' nodes, they cover the search in this process only.
+    """
+
+    def __init__(self):
+        self.nodes = 0
+        self.quiescence_nodes = 0
+        self.helper_nodes = 0  # Lazy SMP helpers' nodes, known once the search is over
+        self.cutoffs = 0
+        self.first_move_cutoffs = 0
+        self.hash_probes = 0
+        self.hash_hits = 0
+        self.depth = 0  # Last completed depth
+        self.selective_depth = 0  # Deepest ply reached by the quiescence search
+        self.elapsed = 0.0  # Seconds since the search started
+        self.iterations = []  # `ChessAI.iterations`, each with the seconds it took as "time"
+
+    @property
+    def nodes_per_second(self) -> float:
+        return self.nodes / self.elapsed if self.elapsed else 0.0
+
+    @property
+    def first_move_cutoff_rate(self) -> float:
+        return self.first_move_cutoffs / self.cutoffs if self.cutoffs else 0.0
+
+    @property
+    def hash_hit_rate(self) -> float:
+        return self.hash_hits / self.hash_probes if self.hash_probes else 0.0
+
+
+# Set in every pool process by _init_worker or _init_smp_helper.
+_worker_ai = None
+_shared_alpha = None
+_shared_nodes = None
+_stop_flag = None
+
+
+def _init_worker(shared_alpha, shared_nodes, color: str, backend: str, hash_mb: float, tablebases, null_move: bool,
+                 late_move_reductions: bool) -> None:
+    global _worker_ai, _shared_alpha, _shared_nodes
+    _worker_ai = _RootSplitWorker(None, color=color, backend=backend, hash_mb=hash_mb, tablebases=tablebases,
+                                  null_move=null_move, late_move_reductions=late_move_reductions)
+    _shared_alpha = shared_alpha
+    _shared_nodes = shared_nodes
+
+
+def _search_root_move(task) -> Tuple[int|None, int]:
+    """Pool task: score one root move of a position given as `to_bytes()` data.
+
+    The move is searched above ASPIRATION_WINDOW below the best score so far, read from `_shared_alpha`,
+    and a better score is published there. `deadline` is wall-clock time (`time.time()`), comparable
+    between processes. With `budgeted`, nodes are drawn from the budget left in `_shared_nodes`, common
+    to all workers. Returns (score, nodes), the score being None when the budget ran out.
+    """
+    position, move, depth, deadline, budgeted = task
+    if deadline is not None and time.time() >= deadline:
+        return None, 0, []
+    ai = _worker_ai
+    ai.board = board_from_bytes(position, ai.backend)
+    ai.nodes = ai.quiescence_nodes = 0
+    ai.deadline = time.perf_counter() + deadline - time.time() if deadline is not None else None
+    ai.budgeted = budgeted
+    ai.node_allowance = 0
+    # Nothing is carried over from the moves and searches this worker did before, except aged table entries.
+    ai.transposition_table.new_search()
+    ai.move_orderer.clear()
+    try:
+        # A move that fails low is then clearly below the best and is not searched again.
+        score = ai.search_move(move, depth, _shared_alpha.value - ASPIRATION_WINDOW - 1)
+    except SearchAborted:
+        return None, ai.nodes
+    finally:
+        ai.return_unused_nodes()
+    with _shared_alpha.get_lock():
+        if score > _shared_alpha.value:
+            _shared_alpha.value = score
+    return score, ai.nodes
+
+
+def _init_smp_helper(transposition_table, stop_flag, color: str, backend: str, tablebases, null_move: bool,
+                     late_move_reductions: bool) -> None:
+    global _worker_ai, _stop_flag
+    _worker_ai = _LazySMPHelper(None, color=color, backend=backend, hash_mb=0, tablebases=tablebases,
+                                null_move=null_move, late_move_reductions=late_move_reductions)
+    _worker_ai.transposition_table = transposition_table
+    _stop_flag = stop_flag
+
+
+def _smp_search(task) -> int:
+    """Pool task: iterative deepening on a `to_bytes()` position until stopped; returns the nodes searched.
+
+    The results only reach the main search through the shared transposition table. So that helpers do not
+    all repeat the same work, odd helpers search one ply deeper and each starts from a different root move.
+    """
+    position, helper, generation, deadline, node_limit = task
+    ai = _worker_ai
+    ai.board = board_from_bytes(position, ai.backend)
+    ai.nodes = ai.quiescence_nodes = 0
+    ai.deadline = time.perf_counter() + deadline - time.time() if deadline is not None else None
+    ai.max_nodes = node_limit
+    ai.transposition_table.generation = generation
+    ai.move_orderer.clear()
+    moves = ai.get_all_moves(ai.color)
+    if not moves:
+        return 0
+    ai.move_orderer.order_moves(ai.board, moves, 0)
+    shift = helper % len(moves)
+    moves = moves[shift:] + moves[:shift]
+    try:
+        for depth in range(1 + helper % 2, MAX_SEARCH_DEPTH + 1):
+            move, _ = ai.search_root(depth, moves)
+            moves.remove(move)
+            moves.insert(0, move)
+    except SearchAborted:
+        pass
+    return ai.nodes
+
 
 class ChessAI:
-    def __init__(self, referee, depth=3, color="black"):
+    def __init__(self, referee, depth=3, color="black", backend="list", time_limit_ms=None, node_limit=None,
+                 hash_mb=16, workers=1, parallel="root", book=None, tablebases=None, null_move=True,
+                 late_move_reductions=True, on_iteration=None):
+        if parallel not in PARALLEL_MODES:
+            raise ValueError(f"Unknown parallel mode {parallel!r}, expected one of {PARALLEL_MODES}")
         self.referee = referee
-        self.board = referee.board
-        self.depth = depth  # Depth of search for the AI
+        self.board = referee.board if referee is not None else None
+        self.depth = depth  # Depth of search for the AI, the deepest iteration when a budget is given
         self.color = color  # AI's color
+        self.backend = backend  # "list" or "bitboard" position storage used while searching
+        self.time_limit_ms = time_limit_ms  # Default budgets for best_move, None for no limit
+        self.node_limit = node_limit
+        self.hash_mb = hash_mb
+        self.workers = workers  # Processes searching in parallel, 1 to search in this process only
+        self.parallel = parallel  # How the workers share the search, one of PARALLEL_MODES
+        self._pool = None
+        self._shared_alpha = None
+        self._shared_nodes = None
+        self._stop_flag = None
+        self.book = book  # opening_book.OpeningBook probed before searching, or None
+        self.book_random = random.Random()
+        self.from_book = False  # Whether the last best_move came from the book
+        self.tablebases = tablebases  # tablebase.Tablebases probed at the root and inside the search, or None
+        self.from_tablebase = False  # Whether the last best_move came from the tablebases
+        self.tablebase_hits = 0  # Positions scored by the tablebases during the last search
+        # Selective search, each switchable to compare with and without it.
+        self.null_move = null_move
+        self.late_move_reductions = late_move_reductions
+        self.null_move_cutoffs = 0
+        self.null_move_verifications = 0  # Null-move cutoffs that needed a verification search
+        self.reductions = 0
+        self.re_searches = 0  # Reduced moves that beat alpha and were searched again at full depth
+        self.aspiration_failures = 0  # Root searches repeated with a wider window
+        self.iterations = []  # One entry per completed depth of the last search, see _iterative_deepening
+        self.principal_variation = []  # Line expected from the last completed depth, best move first
+        # _pv[ply]: best line found from the node being searched at `ply`, updated as the search goes.
+        self._pv = [[] for _ in range(MAX_SEARCH_DEPTH + 2)]
+        self._root_pv = []
+        self.nodes = 0
+        self.quiescence_nodes = 0  # Part of `nodes` spent in quiescence search
+        self.helper_nodes = 0  # Nodes searched by the lazy SMP helpers, not counted in `nodes`
+        self.selective_depth = 0  # Deepest ply reached by the quiescence search of the current search
+        # Called with `last_stats` after each completed depth, in the searching thread; None to skip it.
+        self.on_iteration = on_iteration
+        self._search_start = None
+        self._search_end = None
+        self.deadline = None
+        self.max_nodes = None
+        self.max_depth = depth
+        self._stop_requested = False
+        self.completed_depth = 0
+        self.last_score = None
+        # Pondering: searching the predicted reply during the opponent's turn.
+        self.ponder_move = None
+        self.ponder_hits = 0
+        self.ponder_misses = 0
+        self.ponder_time_saved = 0.0  # Seconds searched on hits before the opponent moved
+        self._ponder_thread = None
+        self._ponder_key = None
+        self._ponder_start = None
+        self._ponder_result = None
+        # Kept from one move to the next, entries of older searches are replaced first.
+        if workers > 1 and parallel == "smp":
+            self.transposition_table = SharedTranspositionTable(hash_mb)
+        else:
+            self.transposition_table = TranspositionTable(hash_mb)
+        # Killer moves and history, kept across the iterations of one search.
+        self.move_orderer = MoveOrderer()
 
 
     def evaluate_board(self) -> int:
-        """Simple evaluation function that sums up piece values. Modify to add advanced heuristics."""
-        score = 0
-
-        for row in range(8):
-            for col in range(8):
-                piece = self.board.get_piece(row, col)
-                if piece is not None:
-                    value = piece.evaluate(self.board)
-                    score += value if piece.color == self.color else -value
+        """Static evaluation in centipawns for `self.color`.
+
+        Material and piece-square values are kept up to date by the board on every move (`pst_score`);
+        only the pseudo-legal mobility and the pawn structure are counted here.
+        `batch_evaluation.evaluate_batch` computes the same score for many positions at once.
+        """
+        board = self.board
+        score = (board.pst_score + MOBILITY_WEIGHT * (board.get_mobility('white') - board.get_mobility('black'))
+                 + pawn_structure_score(board.get_pawn_files('white'))
+                 - pawn_structure_score(board.get_pawn_files('black')))
+        return score if self.color == 'white' else -score
+
+    def get_all_moves(self, color: str) -> List[tuple]:
+        """Generate all legal moves for the specified color."""
+        return self.board.get_all_moves(color)
+
+    def _count_node(self) -> None:
+        self.nodes += 1
+        if self.max_nodes is not None and self.nodes >= self.max_nodes:
+            raise SearchAborted()
+        if self.deadline is not None and not self.nodes & TIME_CHECK_MASK and time.perf_counter() >= self.deadline:
+            raise SearchAborted()
+
+    def minimax(self, depth: int, alpha: float, beta: float, color: str, ply: int = 1, allow_null: bool = True) -> float:
+        """Alpha-beta search in negamax form: the score is seen from `color`, the side to move.
+
+        `allow_null` is False right after a null move, so that the opponent never passes in turn.
+        """
+        if depth <= 0:
+            return self.quiescence(alpha, beta, color, ply)
+        self._count_node()
+        self._pv[ply] = []
+        if self.tablebases is not None and self.board.count_pieces() <= MAX_PIECES:
+            result = self.tablebases.probe(self.board)
+            if result is not None:
+                self.tablebase_hits += 1
+                return tablebase_score(result, ply)
+
+        key = self.board.zobrist_key
+        entry = self.transposition_table.probe(key)
+        hash_move = None
+        if entry is not None:
+            hash_move = entry.move
+            if entry.depth >= depth:
+                score = score_from_table(entry.score, ply)
+                if (entry.bound == EXACT or (entry.bound == LOWER_BOUND and score >= beta)
+                        or (entry.bound == UPPER_BOUND and score <= alpha)):
+                    return score
+
+        in_check = self.board.is_in_check(color)
+        if (self.null_move and allow_null and not in_check and depth >= NULL_MOVE_MIN_DEPTH and beta < MATE_THRESHOLD
+                and self.board.count_non_pawn_pieces(color)):
+            score = self._null_move_search(depth, beta, color, ply)
+            if score >= beta:
+                return score
+
+        moves = self.get_all_moves(color)
+        if not moves:
+            # Prefer the quickest mate, and the slowest when being mated.
+            return -MATE_SCORE + ply if in_check else 0
+        self.move_orderer.order_moves(self.board, moves, ply, hash_move)
+
+        original_alpha = alpha
+        opponent_color = self.board.get_opponent_color(color)
+        best_score = -math.inf
+        best_move = None
+        # A verification search may have filled it.
+        self._pv[ply] = []
+        for index, move in enumerate(moves):
+            reduction = 0
+            if (self.late_move_reductions and depth >= LMR_MIN_DEPTH and index >= LMR_MIN_MOVES and not in_check
+                    and is_quiet(self.board, move)):
+                reduction = 2 if index >= LMR_DEEP_MOVES and depth > LMR_MIN_DEPTH else 1
+            undo = self.board.make_move(move)
+            if index == 0:
+                score = -self.minimax(depth - 1, -beta, -alpha, opponent_color, ply + 1)
+            else:
+                score = self._search_later_move(depth, reduction, alpha, beta, opponent_color, ply)
+            self.board.unmake_move(undo)
+            if score > best_score:
+                best_score = score
+                best_move = move
+            if score > alpha:
+                alpha = score
+                self._pv[ply] = [move] + self._pv[ply + 1] if depth > 1 else [move]
+            if alpha >= beta:
+                self.move_orderer.record_cutoff(self.board, move, ply, depth, index)
+                break
+
+        if best_score >= beta:
+            bound = LOWER_BOUND
+        elif best_score > original_alpha:
+            bound = EXACT
+        else:
+            bound = UPPER_BOUND
+        self.transposition_table.store(key, depth, score_to_table(best_score, ply), bound, best_move)
+        return best_score
+
+    def _search_later_move(self, depth: int, reduction: int, alpha: float, beta: float, color: str, ply: int) -> float:
+        """Score of a move after the first, already played at `ply`; `color` is the side to move after it.
+
+        Principal variation search: a null window at alpha is enough to show the move is no better, and
+        only a move beating it is searched again with the full window. Late quiet moves that do not give
+        check are first searched `reduction` plies shallower.
+        """
+        if reduction and not self.board.is_in_check(color):
+            self.reductions += 1
+            score = -self.minimax(depth - 1 - reduction, -alpha - 1, -alpha, color, ply + 1)
+            if score <= alpha:
+                return score
+            self.re_searches += 1
+        score = -self.minimax(depth - 1, -alpha - 1, -alpha, color, ply + 1)
+        if alpha < score < beta:
+            score = -self.minimax(depth - 1, -beta, -alpha, color, ply + 1)
         return score
 
-    def get_all_moves(self, color: str) -> List[Tuple[Tuple[int, int], Tuple[int, int]]]:
-        """Generate all possible moves for the specified color."""
-        moves = []
-        for row in range(8):
-            for col in range(8):
-                piece = self.board.get_piece(row, col)
-                if piece and piece.color == color:
-                    for move in piece.get_possible_moves(self.board):
-                        moves.append(((row, col), move))
-        return moves
-
-    def minimax(self, depth: int, alpha: int, beta: int, maximizing: bool) -> int:
-        """Minimax function with alpha-beta pruning."""
-        if depth == 0 :
-            return self.evaluate_board()
-        
-        if maximizing:
-            max_eval = -math.inf
-            for move in self.get_all_moves(self.color):
-                from_pos, to_pos = move
-                # Make a move and evaluate
-                piece_captured = self.board.get_piece(*to_pos)
-                self.board.move_piece(from_pos, to_pos)
-                
-                eval_score = self.minimax(depth - 1, alpha, beta, False)
-                max_eval = max(max_eval, eval_score)
-                alpha = max(alpha, eval_score)
-                
-                # Undo move
-                self.board.move_piece(to_pos, from_pos)
-                if piece_captured:
-                    self.board.set_piece(piece_captured, *to_pos)
-                
-                if beta <= alpha:
-                    break
-            return max_eval
+    def _null_move_search(self, depth: int, beta: float, color: str, ply: int) -> float:
+        """Score after passing the turn, searched shallower with a null window at `beta`.
 
+        At or above `beta`, the real moves would most likely fail high too. In endings prone to
+        zugzwang that is checked by a reduced search without null moves; a failed check returns -inf.
+        """
+        reduction = NULL_MOVE_REDUCTION if depth < NULL_MOVE_DEEP_DEPTH else NULL_MOVE_REDUCTION + 1
+        undo = self.board.make_null_move()
+        score = -self.minimax(depth - 1 - reduction, -beta, -beta + 1, self.board.get_opponent_color(color), ply + 1,
+                              allow_null=False)
+        self.board.unmake_null_move(undo)
+        if score < beta:
+            return score
+        if self.board.count_non_pawn_pieces(color) <= NULL_MOVE_VERIFY_PIECES:
+            self.null_move_verifications += 1
+            score = self.minimax(depth - reduction, beta - 1, beta, color, ply, allow_null=False)
+            if score < beta:
+                return -math.inf
+        self.null_move_cutoffs += 1
+        # A mate found after passing is not a proven mate.
+        return beta if score >= MATE_THRESHOLD else score
+
+    def quiescence(self, alpha: float, beta: float, color: str, ply: int) -> float:
+        """Search captures and promotions until the position is quiet, so leaves are not scored mid-exchange.
+
+        The side to move may stand pat on the static evaluation, except in check where every evasion is searched.
+        """
+        self._count_node()
+        self.quiescence_nodes += 1
+        if ply > self.selective_depth:
+            self.selective_depth = ply
+        in_check = self.board.is_in_check(color)
+        if in_check:
+            stand_pat = -math.inf
+            moves = self.get_all_moves(color)
+            if not moves:
+                return -MATE_SCORE + ply
         else:
-            min_eval = math.inf
-            opponent_color = self.board.get_opponent_color(self.color)
-            for move in self.get_all_moves(opponent_color):
-                from_pos, to_pos = move
-                # Make a move and evaluate
-                piece_captured = self.board.get_piece(*to_pos)
-                self.board.move_piece(from_pos, to_pos)
-                
-                eval_score = self.minimax(depth - 1, alpha, beta, True)
-                min_eval = min(min_eval, eval_score)
-                beta = min(beta, eval_score)
-                
-                # Undo move
-                self.board.move_piece(to_pos, from_pos)
-                if piece_captured:
-                    self.board.set_piece(piece_captured, *to_pos)
-
-                if beta <= alpha:
-                    break
-            return min_eval
+            score = self.evaluate_board()
+            stand_pat = score if color == self.color else -score
+            if stand_pat >= beta:
+                return stand_pat
+            alpha = max(alpha, stand_pat)
+            moves = [move for move in self.get_all_moves(color) if not is_quiet(self.board, move)]
+        self.move_orderer.order_moves(self.board, moves, ply)
 
-    def best_move(self) -> Tuple[Tuple[int, int], Tuple[int, int]]:
-        """Find the best move for the AI using the minimax algorithm with alpha-beta pruning."""
+        opponent_color = self.board.get_opponent_color(color)
+        best_score = stand_pat
+        for move in moves:
+            if not in_check:
+                # Delta pruning: even winning the piece outright would not reach alpha.
+                victim = capture_victim(self.board, move)
+                gain = ORDER_VALUES[type(victim)] if victim is not None else 0
+                if len(move) > 2:
+                    gain += PROMOTION_VALUES[move[2]] - ORDER_VALUES[Pawn]
+                if stand_pat + gain * 100 + DELTA_MARGIN <= alpha:
+                    continue
+            undo = self.board.make_move(move)
+            score = -self.quiescence(-beta, -alpha, opponent_color, ply + 1)
+            self.board.unmake_move(undo)
+            if score > best_score:
+                best_score = score
+            if score > alpha:
+                alpha = score
+            if alpha >= beta:
+                break
+        return best_score
+
+    def search_move(self, move, depth: int, alpha: float, beta: float = math.inf) -> float:
+        """Score of root move `move` searched to `depth`; outside (`alpha`, `beta`) it is only a bound."""
+        undo = self.board.make_move(move)
+        score = -self.minimax(depth - 1, -beta, -alpha, self.board.get_opponent_color(self.color))
+        self.board.unmake_move(undo)
+        return score
+
+    def search_root(self, depth: int, moves: List[tuple], alpha: float = -math.inf,
+                    beta: float = math.inf) -> Tuple[tuple, float]:
+        """Score the root moves to `depth` within (`alpha`, `beta`); return the best move and its score.
+
+        The first move gets the whole window and the others a null window, as in `minimax`. A score at
+        or outside the window is only a bound, and the principal variation is then incomplete.
+        """
+        original_alpha = alpha
         best_score = -math.inf
         best_move = None
-        self.board = self.referee.board.copy()
-
-        for move in self.get_all_moves(self.color):
-            from_pos, to_pos = move
-            piece_captured = self.board.get_piece(*to_pos)
-            self.board.move_piece(from_pos, to_pos)
-
-            move_score = self.minimax(self.depth - 1, -math.inf, math.inf, False)
-            
-            # Undo move
-            self.board.move_piece(to_pos, from_pos)
-            if piece_captured:
-                self.board.set_piece(piece_captured, *to_pos)
-            
+        self._root_pv = []
+        for index, move in enumerate(moves):
+            if index == 0:
+                move_score = self.search_move(move, depth, alpha, beta)
+            else:
+                move_score = self.search_move(move, depth, alpha, alpha + 1)
+                if alpha < move_score < beta:
+                    move_score = self.search_move(move, depth, alpha, beta)
             if move_score > best_score:
                 best_score = move_score
                 best_move = move
+            if move_score > alpha:
+                alpha = move_score
+                self._root_pv = [move] + self._pv[1] if depth > 1 else [move]
+            if alpha >= beta:
+                break
+        if best_score >= beta:
+            bound = LOWER_BOUND
+        elif best_score > original_alpha:
+            bound = EXACT
+        else:
+            bound = UPPER_BOUND
+        self.transposition_table.store(self.board.zobrist_key, depth, score_to_table(best_score, 0), bound, best_move)
+        return best_move, best_score
+
+    def _aspiration_search(self, depth: int, moves: List[tuple], guess: int) -> Tuple[tuple, float]:
+        """`search_root` in a window around `guess`, the previous depth's score, widened until the score fits."""
+        delta = ASPIRATION_WINDOW
+        alpha, beta = guess - delta, guess + delta
+        while True:
+            move, score = self.search_root(depth, moves, alpha, beta)
+            if alpha < score < beta:
+                return move, score
+            self.aspiration_failures += 1
+            delta *= ASPIRATION_GROWTH
+            if score <= alpha:
+                alpha = score - delta if delta < ASPIRATION_LIMIT else -math.inf
+            else:
+                beta = score + delta if delta < ASPIRATION_LIMIT else math.inf
+                # The move that failed high is the one to search first.
+                moves.remove(move)
+                moves.insert(0, move)
 
+    def _search_depth(self, depth: int, moves: List[tuple]) -> Tuple[tuple, float]:
+        """The serial search of one depth: after the first, in an aspiration window around the last score."""
+        if depth > 1 and abs(self.last_score) < MATE_THRESHOLD:
+            return self._aspiration_search(depth, moves, self.last_score)
+        return self.search_root(depth, moves)
+
+    def search_root_parallel(self, depth: int, moves: List[tuple]) -> Tuple[tuple, float]:
+        """The serial search of one depth, run here on the root moves the pool finds close to the best.
+
+        A worker scores the first move, for a bound, then the others are spread over the pool. Workers
+        have their own tables and killers, and delta pruning, null moves and late-move reductions make a
+        score depend on the window it was searched with, so their scores only sort the moves out: the
+        first move and those within ASPIRATION_WINDOW of the best are searched again here, in order, by
+        `_search_depth`, which returns the move and score of this depth. The moves left out failed low
+        against the best score less ASPIRATION_WINDOW.
+        The node budget left is shared by the workers, which take it NODE_BATCH nodes at a time.
+        """
+        if len(moves) > 1:
+            pool = self._get_pool()
+            position = bytes(self.board.to_bytes())
+            deadline = time.time() + self.deadline - time.perf_counter() if self.deadline is not None else None
+            budgeted = self.max_nodes is not None
+            self._shared_nodes.value = self.max_nodes - self.nodes if budgeted else 0
+            self._shared_alpha.value = -MATE_SCORE
+            tasks = [(position, move, depth, deadline, budgeted) for move in moves]
+            results = [pool.apply(_search_root_move, (tasks[0],))]
+            if results[0][0] is not None:
+                results += pool.map(_search_root_move, tasks[1:])
+            self.nodes += sum(nodes for _, nodes in results)
+            if any(score is None for score, _ in results):
+                raise SearchAborted()
+            threshold = max(score for score, _ in results) - ASPIRATION_WINDOW
+            moves = moves[:1] + [move for move, (score, _) in zip(moves[1:], results[1:]) if score >= threshold]
+        return self._search_depth(depth, moves)
+
+    def _get_pool(self):
+        if self._pool is None and self.parallel == "smp":
+            # The main process searches too: it is the one whose result counts.
+            self._stop_flag = multiprocessing.Value('b', 0)
+            self._pool = multiprocessing.Pool(self.workers - 1, initializer=_init_smp_helper,
+                                              initargs=(self.transposition_table, self._stop_flag, self.color,
+                                                        self.backend, self.tablebases, self.null_move,
+                                                        self.late_move_reductions))
+        elif self._pool is None:
+            self._shared_alpha = multiprocessing.Value('q', 0)
+            self._shared_nodes = multiprocessing.Value('q', 0)
+            self._pool = multiprocessing.Pool(self.workers, initializer=_init_worker,
+                                              initargs=(self._shared_alpha, self._shared_nodes, self.color,
+                                                        self.backend, self.hash_mb,
+                                                        self.tablebases, self.null_move, self.late_move_reductions))
+        return self._pool
+
+    def _start_helpers(self):
+        """Start the lazy SMP helpers on the search position; they fill the shared table until stopped."""
+        pool = self._get_pool()
+        self._stop_flag.value = 0
+        position = bytes(self.board.to_bytes())
+        deadline = time.time() + self.deadline - time.perf_counter() if self.deadline is not None else None
+        return pool.map_async(_smp_search, [(position, helper, self.transposition_table.generation, deadline,
+                                             self.max_nodes) for helper in range(1, self.workers)])
+
+    def _stop_helpers(self, helpers) -> None:
+        self._stop_flag.value = 1
+        self.helper_nodes = sum(helpers.get())
+
+    def close(self) -> None:
+        """Stop pondering and the worker processes of the parallel search, and free the shared table, if any.
+
+        In lazy SMP mode the AI cannot search any more afterwards.
+        """
+        self.stop_pondering()
+        if self._pool is not None:
+            self._pool.terminate()
+            self._pool.join()
+            self._pool = None
+        if isinstance(self.transposition_table, SharedTranspositionTable):
+            self.transposition_table.close()
+
+    def _prepare_search(self, position, time_limit_ms, node_limit, max_depth: int) -> None:
+        """Reset the budgets, counters and tables for a search of `position`, given as `to_bytes()` data."""
+        self.deadline = time.perf_counter() + time_limit_ms / 1000 if time_limit_ms is not None else None
+        if self._stop_requested:
+            self.deadline = 0.0
+        self.max_nodes = node_limit
+        self.max_depth = max_depth
+        self.nodes = 0
+        self.quiescence_nodes = 0
+        self.helper_nodes = 0
+        self.selective_depth = 0
+        self.tablebase_hits = 0
+        self.null_move_cutoffs = self.null_move_verifications = 0
+        self.reductions = self.re_searches = 0
+        self.aspiration_failures = 0
+        self.iterations = []
+        self.principal_variation = []
+        self.completed_depth = 0
+        self.last_score = None
+        self._search_start = time.perf_counter()
+        self._search_end = None
+        self.transposition_table.new_search()
+        self.transposition_table.reset_stats()
+        self.move_orderer.clear()
+        self.move_orderer.reset_stats()
+        # The search runs on a private copy: an aborted iteration can leave it mid-line.
+        self.board = board_from_bytes(position, self.backend)
+
+    def _iterative_deepening(self, root_split: bool):
+        """Search one depth deeper at a time until `self.max_depth`, the budget or a mate; return the best move.
+
+        `max_depth` and the budget are read again as the search goes, so another thread may change them.
+        Each completed depth is added to `self.iterations` with its move, score, principal variation,
+        nodes, effective branching factor (its nodes divided by those of the previous depth) and seconds
+        taken, then `self.last_stats` is passed to `self.on_iteration`, if set.
+        Depths after the first are searched in an aspiration window, also when split over the pool.
+        """
+        moves = self.get_all_moves(self.color)
+        if not moves:
+            return None
+        self.move_orderer.order_moves(self.board, moves, 0)
+        best_move = moves[0]
+        helpers = self._start_helpers() if self.workers > 1 and self.parallel == "smp" else None
+        try:
+            for depth in range(1, MAX_SEARCH_DEPTH + 1):
+                if depth > self.max_depth:
+                    break
+                nodes_before = self.nodes
+                iteration_start = time.perf_counter()
+                try:
+                    if root_split:
+                        move, score = self.search_root_parallel(depth, moves)
+                    else:
+                        move, score = self._search_depth(depth, moves)
+                except SearchAborted:
+                    break
+                best_move, self.last_score, self.completed_depth = move, score, depth
+                self.principal_variation = self._root_pv
+                nodes = self.nodes - nodes_before
+                previous_nodes = self.iterations[-1]["nodes"] if self.iterations else 0
+                self.iterations.append({"depth": depth, "move": move, "score": score, "pv": self._root_pv,
+                                        "nodes": nodes,
+                                        "branching_factor": nodes / previous_nodes if previous_nodes else None,
+                                        "time": time.perf_counter() - iteration_start})
+                if self.on_iteration is not None:
+                    self.on_iteration(self.last_stats)
+                # The previous best move is searched first at the next depth.
+                moves.remove(move)
+                moves.insert(0, move)
+                if abs(score) >= MATE_THRESHOLD:
+                    break
+        finally:
+            if helpers is not None:
+                self._stop_helpers(helpers)
+        self._search_end = time.perf_counter()
+        self.deadline = None
+        self.max_nodes = None
+        self._stop_requested = False
         return best_move
+
+    @property
+    def last_stats(self) -> SearchStats|None:
+        """SearchStats of the last search, or of the one running so far; None before the first search."""
+        if self._search_start is None:
+            return None
+        stats = SearchStats()
+        stats.nodes = self.nodes
+        stats.quiescence_nodes = self.quiescence_nodes
+        stats.helper_nodes = self.helper_nodes
+        stats.cutoffs = self.move_orderer.cutoffs
+        stats.first_move_cutoffs = self.move_orderer.first_move_cutoffs
+        stats.hash_probes = self.transposition_table.probes
+        stats.hash_hits = self.transposition_table.hits
+        stats.depth = self.completed_depth
+        stats.selective_depth = self.selective_depth
+        stats.elapsed = (self._search_end or time.perf_counter()) - self._search_start
+        stats.iterations = self.iterations
+        return stats
+
+    def stop(self) -> None:
+        """Make a search running in another thread return its best move so far, within TIME_CHECK_MASK nodes.
+
+        If the search has not started yet, it stops as soon as it does.
+        """
+        self._stop_requested = True
+        self.deadline = 0.0
+
+    def best_move(self, time_limit_ms=None, node_limit=None) -> Tuple[Tuple[int, int], Tuple[int, int]]:
+        """Find the best move with iterative deepening, within an optional time (ms) and node budget.
+
+        Without a budget every depth up to `self.depth` is searched. With one, iterations go deeper until
+        the budget runs out; the move returned always comes from the last fully completed depth.
+        A book move, or in a tablebase position the move keeping its result, is played without
+        searching. If the opponent played the move we were pondering on, the ponder search is
+        finished instead.
+        """
+        time_limit_ms = self.time_limit_ms if time_limit_ms is None else time_limit_ms
+        node_limit = self.node_limit if node_limit is None else node_limit
+        self.from_book = self.from_tablebase = False
+        if self.book is not None:
+            move = self.book.choose(self.referee.board, self.book_random)
+            if move is not None:
+                self.stop_pondering()
+                self.from_book = True
+                return move
+        if self.tablebases is not None and self.referee.board.count_pieces() <= MAX_PIECES:
+            move = self.tablebases.best_move(board_from_bytes(self.referee.board.to_bytes(), self.backend))
+            if move is not None:
+                self.stop_pondering()
+                self.from_tablebase = True
+                return move
+        if self._ponder_thread is not None:
+            move = self._finish_pondering(time_limit_ms, node_limit)
+            if move is not None:
+                return move
+        budgeted = time_limit_ms is not None or node_limit is not None
+        self._prepare_search(self.referee.board.to_bytes(), time_limit_ms, node_limit,
+                             MAX_SEARCH_DEPTH if budgeted else self.depth)
+        return self._iterative_deepening(root_split=self.workers > 1 and self.parallel == "root")
+
+    def start_pondering(self) -> bool:
+        """Search, in a background thread, the position after the opponent's predicted reply to our last move.
+
+        Call it once our move is on the referee's board. The prediction is the move the last search
+        stored for that position in the transposition table; without one there is nothing to ponder
+        and False is returned. The search runs until `best_move` or `stop_pondering` is called.
+        """
+        self.stop_pondering()
+        board = board_from_bytes(self.referee.board.to_bytes(), self.backend)
+        entry = self.transposition_table.probe(board.zobrist_key)
+        if entry is None or entry.move not in board.get_all_moves(board.get_opponent_color(self.color)):
+            return False
+        board.make_move(entry.move)
+        self.ponder_move = entry.move
+        self._ponder_key = board.zobrist_key
+        self._prepare_search(board.to_bytes(), None, None, MAX_SEARCH_DEPTH)
+        # No budget yet: a ponder hit sets the real one, a miss moves the deadline to now.
+        self.deadline = math.inf
+        self._ponder_start = time.perf_counter()
+        self._ponder_thread = threading.Thread(target=self._ponder, daemon=True)
+        self._ponder_thread.start()
+        return True
+
+    def _ponder(self) -> None:
+        # Root moves are not sent to the pool: a pool task could not be cancelled when the opponent moves.
+        self._ponder_result = self._iterative_deepening(root_split=False)
+
+    def stop_pondering(self) -> None:
+        """Cancel the ponder search, if one is running, and wait for it to end."""
+        if self._ponder_thread is None:
+            return
+        self.deadline = 0.0
+        self._ponder_thread.join()
+        self._ponder_thread = None
+
+    def _finish_pondering(self, time_limit_ms, node_limit):
+        """On a ponder hit, let the ponder search run within this move's budget and return its move.
+
+        Otherwise cancel it and return None; the transposition table keeps what it found.
+        """
+        if self.referee.board.zobrist_key != self._ponder_key:
+            self.ponder_misses += 1
+            self.stop_pondering()
+            return None
+        self.ponder_hits += 1
+        self.ponder_time_saved += time.perf_counter() - self._ponder_start
+        if time_limit_ms is None and node_limit is None:
+            self.max_depth = self.depth
+            if self.completed_depth >= self.depth:
+                self.deadline = 0.0
+        else:
+            if node_limit is not None:
+                self.max_nodes = self.nodes + node_limit
+            if time_limit_ms is not None:
+                self.deadline = time.perf_counter() + time_limit_ms / 1000
+        self._ponder_thread.join()
+        self._ponder_thread = None
+        return self._ponder_result
+
+    def ponder_stats(self) -> dict:
+        guesses = self.ponder_hits + self.ponder_misses
+        return {"hits": self.ponder_hits, "misses": self.ponder_misses,
+                "hit_rate": self.ponder_hits / guesses if guesses else 0.0, "time_saved": self.ponder_time_saved}
+
+
+class _RootSplitWorker(ChessAI):
+    """Search of a root-split worker process: the plain search, whose node budget is shared by all workers."""
+
+    budgeted = False
+    node_allowance = 0  # Nodes taken from the shared budget for the current task
+
+    def _count_node(self) -> None:
+        if self.budgeted and self.nodes >= self.node_allowance:
+            with _shared_nodes.get_lock():
+                batch = min(NODE_BATCH, _shared_nodes.value)
+                _shared_nodes.value -= batch
+            if not batch:
+                raise SearchAborted()
+            self.node_allowance += batch
+        super()._count_node()
+
+    def return_unused_nodes(self) -> None:
+        if self.budgeted and self.node_allowance > self.nodes:
+            with _shared_nodes.get_lock():
+                _shared_nodes.value += self.node_allowance - self.nodes
+        self.node_allowance = self.nodes
+
+
+class _LazySMPHelper(ChessAI):
+    """Search of a lazy SMP helper process: the plain search, which also stops when the main search is done."""
+
+    def _count_node(self) -> None:
+        super()._count_node()
+        if not self.nodes & TIME_CHECK_MASK and _stop_flag.value:
+            raise SearchAborted()
@@ -1,10 +1,11 @@
 from typing import Tuple, List
-from copy import deepcopy
 
 from chess_timer import Timer
-from board_tracker import BoardTracker
 
 from chess_pieces import ChessPiece, Pawn, Rook, Knight, Bishop, Queen, King
+from move_generator import LegalityInfo, analyse_position, generate_legal_moves, find_attackers
+from board import (ALL_CASTLING_RIGHTS, CASTLING_MASKS, CASTLING_SIDES, PROMOTION_PIECES,
+                   infer_castling_rights, copy_grid)
 
 from chess_typing import Color, Square, Move, WHITE, BLACK
 
@@ -13,14 +14,14 @@ class Board:
         self.board = [[None for _ in range(8)] for _ in range(8)]
         self.start_player = WHITE
         self.start_setup()
-        self.start_board = deepcopy(self.board)
+        self.start_board = copy_grid(self.board)
+        self.start_castling_rights = self.castling_rights
         self.last_moved_piece = None
         self.last_move_from, self.last_move_to = None, None
         self.turn_count = 1
         self.state = "ongoing"
         self.white_timer = Timer(3*60, 2) # 3 minutes
         self.black_timer = Timer(3*60, 2)
-        self.board_tracker = BoardTracker(self)
 
     def __str__(self) -> str:
         str_board = ""
@@ -35,22 +36,27 @@ class Board:
     
     def change_board(self, board, last_moved_piece):
         self.board = board
+        self.castling_rights = self.start_castling_rights = infer_castling_rights(board)
+        self.en_passant = None
         self.last_moved_piece = last_moved_piece
         self.start_player = self.get_opponent_color(last_moved_piece.color)
-        self.start_board = deepcopy(board)
+        self.start_board = copy_grid(board)
 
     def reset(self):
         """Reset the board positions to the first move"""
-        self.board = deepcopy(self.start_board)
+        self.board = copy_grid(self.start_board)
+        self.castling_rights = self.start_castling_rights
+        self.en_passant = None
         self.state = "ongoing"
         self.current_player = self.start_player
         self.turn_count = 1
         self.black_timer.reset()
         self.white_timer.reset()
-        self.board_tracker.reset()
     
     def erase(self):
         self.board = [[None for _ in range(8)] for _ in range(8)]
+        self.castling_rights = 0
+        self.en_passant = None
 
     def get_current_player(self):
             return self.get_opponent_color(self.start_player) if self.turn_count%2 == 0 else self.start_player
@@ -86,28 +92,30 @@ class Board:
             for j in range(8):
                 self.board[i][j] = None
 
-        self.board[0][0] = Rook(BLACK, (0, 0))
-        self.board[0][7] = Rook(BLACK, (0, 7))
-        self.board[0][1] = Knight(BLACK, (0, 1))
-        self.board[0][6] = Knight(BLACK, (0, 6))
-        self.board[0][2] = Bishop(BLACK, (0, 2))
-        self.board[0][5] = Bishop(BLACK, (0, 5))
-        self.board[0][3] = Queen(BLACK, (0, 3))
-        self.board[0][4] = King(BLACK, (0, 4))
+        self.board[0][0] = Rook(BLACK)
+        self.board[0][7] = Rook(BLACK)
+        self.board[0][1] = Knight(BLACK)
+        self.board[0][6] = Knight(BLACK)
+        self.board[0][2] = Bishop(BLACK)
+        self.board[0][5] = Bishop(BLACK)
+        self.board[0][3] = Queen(BLACK)
+        self.board[0][4] = King(BLACK)
         for i in range(8):
-            self.board[1][i] = Pawn(BLACK, (1, i))
+            self.board[1][i] = Pawn(BLACK)
 
         # White pieces
-        self.board[7][0] = Rook(WHITE, (7, 0))
-        self.board[7][7] = Rook(WHITE, (7, 7))
-        self.board[7][1] = Knight(WHITE, (7, 1))
-        self.board[7][6] = Knight(WHITE, (7, 6))
-        self.board[7][2] = Bishop(WHITE, (7, 2))
-        self.board[7][5] = Bishop(WHITE, (7, 5))
-        self.board[7][3] = Queen(WHITE, (7, 3))
-        self.board[7][4] = King(WHITE, (7, 4))
+        self.board[7][0] = Rook(WHITE)
+        self.board[7][7] = Rook(WHITE)
+        self.board[7][1] = Knight(WHITE)
+        self.board[7][6] = Knight(WHITE)
+        self.board[7][2] = Bishop(WHITE)
+        self.board[7][5] = Bishop(WHITE)
+        self.board[7][3] = Queen(WHITE)
+        self.board[7][4] = King(WHITE)
         for i in range(8):
-            self.board[6][i] = Pawn(WHITE, (6, i))
+            self.board[6][i] = Pawn(WHITE)
+        self.castling_rights = ALL_CASTLING_RIGHTS
+        self.en_passant = None
 
     def is_valid_position(self, row, col) -> bool:
         return 0 <= row < 8 and 0 <= col < 8
@@ -115,6 +123,10 @@ class Board:
     def is_available(self, row, col) -> bool:
         return self.is_valid_position(row, col) and self.board[row][col] is None
 
+    def is_empty(self, row, col) -> bool:
+        """Unchecked emptiness test for squares taken from the attack tables."""
+        return self.board[row][col] is None
+
     def is_opponent_piece(self, row, col, color) -> bool:
         if self.is_valid_position(row, col):
             piece = self.board[row][col]
@@ -130,89 +142,127 @@ class Board:
     def set_piece(self, piece: ChessPiece, row: int, col: int):
         self.board[row][col] = piece
 
+    def get_piece_positions(self, color: str) -> List[Tuple[int, int]]:
+        """Return the squares occupied by `color`."""
+        return [(row, col) for row in range(8) for col in range(8)
+                if self.board[row][col] is not None and self.board[row][col].color == color]
+
+    def get_en_passant_square(self) -> Tuple[int, int]|None:
+        """Square a pawn of the side to move may capture en passant on, or None."""
+        return self.en_passant
+
+    def has_castling_right(self, color: str, kingside: bool) -> bool:
+        """Check whether `color` may still castle on the given side."""
+        for right, right_color, right_kingside, _, _ in CASTLING_SIDES:
+            if right_color == color and right_kingside == kingside:
+                return bool(self.castling_rights & right)
+        return False
+
+    def get_legality_info(self, color: str) -> LegalityInfo:
+        """Checkers, pins and king danger squares of `color` in the current position."""
+        return analyse_position(self, color)
+
     def move_piece(self, former_position: Tuple[int, int], new_position: Tuple[int, int]) -> bool:
         """Move a piece to a new position, handling special moves like promotion and castling."""
         piece = self.get_piece(former_position[0], former_position[1])
         if not piece:
             return False
-        row, col = piece.position
+        row, col = former_position
         new_row, new_col = new_position
         
         
-        if (new_row, new_col) not in piece.get_possible_moves(self):
+        if (new_row, new_col) not in piece.get_possible_moves(self, former_position):
             print("Wrong move !")
             return False
 
-        # Handle special cases for pawn promotion and castling
-        if isinstance(piece, Pawn):
-            self._handle_pawn_moves(piece, new_position)
-        elif isinstance(piece, King):
-            self._handle_king_moves(piece, new_position)
-        else:
-            self._execute_move(piece, new_position)
+        self._apply_move(former_position, new_position)
         
         self.last_move_from = row, col
         self.last_move_to = new_row, new_col
         self.last_moved_piece = self.get_piece(new_row, new_col)
         self.next_player()
-        self.board_tracker.update()
 
         return True
 
-    def _execute_move(self, piece: ChessPiece, new_position: Tuple[int, int]) -> None:
+    def make_move(self, move: tuple) -> tuple:
+        """Play a (from, to) move without the game bookkeeping; return what `unmake_move` needs to take it back."""
+        undo = (copy_grid(self.board), self.castling_rights, self.en_passant)
+        self._apply_move(move[0], move[1])
+        return undo
+
+    def unmake_move(self, undo: tuple) -> None:
+        self.board, self.castling_rights, self.en_passant = undo
+
+    def _apply_move(self, former_position: Tuple[int, int], new_position: Tuple[int, int]) -> None:
+        """Move the piece, then update the castling rights and the en passant square."""
+        piece = self.get_piece(former_position[0], former_position[1])
+        # Handle special cases for pawn promotion and castling
+        if isinstance(piece, Pawn):
+            self._handle_pawn_moves(former_position, new_position)
+        elif isinstance(piece, King):
+            self._handle_king_moves(former_position, new_position)
+        else:
+            self._execute_move(former_position, new_position)
+
+        row, col = former_position
+        new_row, new_col = new_position
+        self.castling_rights &= CASTLING_MASKS[row][col] & CASTLING_MASKS[new_row][new_col]
+        if isinstance(piece, Pawn) and abs(new_row - row) == 2:
+            self.en_passant = ((row + new_row) // 2, col)
+        else:
+            self.en_passant = None
+
+    def _execute_move(self, former_position: Tuple[int, int], new_position: Tuple[int, int]) -> None:
         """Perform a basic move."""
-        old_row, old_col = piece.position
+        old_row, old_col = former_position
 
         new_row, new_col = new_position
 
+        self.board[new_row][new_col] = self.board[old_row][old_col]
         self.board[old_row][old_col] = None
-        self.board[new_row][new_col] = piece
-        piece.position = new_position
-        piece.row, piece.col = new_position
         
 
-    def _handle_castling(self, king: King, new_position: Tuple[int, int]) -> None:
+    def _handle_castling(self, former_position: Tuple[int, int], new_position: Tuple[int, int]) -> None:
         """Handle castling by moving both the king and the appropriate rook."""
         new_row, new_col = new_position
         # King-side castling
         if new_col == 6:
-            rook = self.get_piece(new_row, 7)
-            self._execute_move(rook, (new_row, 5))
+            self._execute_move((new_row, 7), (new_row, 5))
         # Queen-side castling
         elif new_col == 2:
-            rook = self.get_piece(new_row, 0)
-            self._execute_move(rook, (new_row, 3))
+            self._execute_move((new_row, 0), (new_row, 3))
 
-        self._execute_move(king, new_position)
+        self._execute_move(former_position, new_position)
     
-    def _handle_en_passant(self, pawn: Pawn, new_position: Tuple[int, int]) -> None:
+    def _handle_en_passant(self, former_position: Tuple[int, int], new_position: Tuple[int, int]) -> None:
         _, new_col = new_position
-        old_row = pawn.row
-        self._execute_move(pawn, new_position)
+        old_row = former_position[0]
+        self._execute_move(former_position, new_position)
         self.board[old_row][new_col] = None
 
-    def _handle_pawn_moves(self, piece:Pawn, new_position: Tuple[int, int]) -> None:
+    def _handle_pawn_moves(self, former_position: Tuple[int, int], new_position: Tuple[int, int]) -> None:
             new_row, new_col = new_position
-            row, col = piece.row, piece.col
+            row, col = former_position
+            piece = self.board[row][col]
         # Promotion: if a pawn reaches the final row
             if (new_row == 0 and piece.color == WHITE) or (new_row == 7 and piece.color == BLACK):
                 # Promote the pawn to a queen (can be modified for other promotions)
-                self.board[new_row][new_col] = Queen(piece.color, (new_row, new_col))
+                self.board[new_row][new_col] = PROMOTION_PIECES['Q'](piece.color)
                 self.board[row][col] = None
             
             elif (new_col!=col) and self.is_available(new_row, new_col):
-                    self._handle_en_passant(piece, (new_row, new_col))
+                    self._handle_en_passant(former_position, (new_row, new_col))
             else:
-                self._execute_move(piece, new_position)
+                self._execute_move(former_position, new_position)
     
-    def _handle_king_moves(self, piece: King, new_position) -> None:
+    def _handle_king_moves(self, former_position: Tuple[int, int], new_position) -> None:
         # Handle castling
         _, new_col = new_position
-        col = piece.col
+        col = former_position[1]
         if abs(col - new_col) == 2:
-            self._handle_castling(piece, new_position)
+            self._handle_castling(former_position, new_position)
         else:
-            self._execute_move(piece, new_position)
+            self._execute_move(former_position, new_position)
 
     def is_in_check(self, color: str) -> bool:
         """Determine if the current player's king is in check."""
@@ -238,35 +288,17 @@ class Board:
     
     def get_attack_map(self, attacker_color: str) -> List[List[int]]:
         map_attack = [[0 for _ in range(8)] for _ in range(8)]
-        for r in range(8):
-            for c in range(8):
-                piece = self.board[r][c]
-                if piece is None:
-                    continue
-                if piece.color != attacker_color:
-                    continue
-                for rd, cd in piece.get_defended_squares(self):
-                    map_attack[rd][cd] += 1
+        for r, c in self.get_piece_positions(attacker_color):
+            for rd, cd in self.board[r][c].get_defended_squares(self, (r, c)):
+                map_attack[rd][cd] += 1
         return map_attack
 
     def is_attacked(self, row: int, col: int, attacker_color: str) -> bool:
         """Check if a square is attacked by any of the opponent's pieces."""
-        return self.get_attack_map(attacker_color)[row][col] > 0
+        return bool(find_attackers(self, (row, col), attacker_color, first_only=True))
     
     def is_legal_move_possible(self, color: str) -> bool:
-        for r in range(8):
-            for c in range(8):
-                piece = self.board[r][c]
-                if piece is None:
-                    continue
-                if piece.color != color:
-                    continue
-                board_cp = self.copy()
-                for rd, cd in piece.get_possible_moves(self):
-                    board_cp._execute_move(piece.copy(), (rd, cd))
-                    if not board_cp.is_in_check(color):
-                        return True
-        return False
+        return bool(generate_legal_moves(self, color))
 
     def is_check_mate(self, color: str) -> bool:
         return self.is_in_check(color) and not self.is_legal_move_possible(color)
@@ -279,24 +311,19 @@ class Board:
             return self.white_timer.timesup
         
     def get_board_copy(self):
-        new_board = [[None for _ in range(8)] for _ in range(8)]
-        for row in range(8):
-            for col in range(8):
-                piece = self.get_piece(row, col)
-                if piece is not None:
-                    new_board[row][col] = piece.copy()
-        return new_board
+        """Copy of the grid; the shared immutable pieces are not copied."""
+        return copy_grid(self.board)
 
     def copy(self):
-        """Return a deep copy of the current board."""
+        """Return a copy of the current board."""
         new_board = Board()
         new_board.board = self.get_board_copy()
-
-        if self.last_moved_piece is not None:
-            new_board.last_moved_piece = self.last_moved_piece.copy()
+        new_board.castling_rights = self.castling_rights
+        new_board.en_passant = self.en_passant
         new_board.last_move_from = self.last_move_from
         new_board.last_move_to = self.last_move_to
-        new_board.last_moved_piece = None if self.last_moved_piece is None else self.last_moved_piece.copy()
+        new_board.last_moved_piece = self.last_moved_piece
         new_board.start_board = self.start_board
+        new_board.start_castling_rights = self.start_castling_rights
         new_board.turn_count = self.turn_count
         return new_board
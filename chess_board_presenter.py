@@ -1,21 +1,32 @@
 import pygame
+from concurrent.futures import ThreadPoolExecutor
 from chess_rules import Referee
 from chess_AI import ChessAI
 from chess_scriber import ChessNotationTranslator
 
+# Thinking time given to the engine when asked for a move with the A key.
+AI_MOVE_TIME_MS = 2000
+
 class ChessBoardPresenter:
     def __init__(self, view, referee : Referee):
         self.view = view
         self.referee = referee
         self.clicked_square = None
         self.selected_piece = None
+        self.selected_square = None
         self.possible_moves = []
         self.running = True
         self.chess_notation = ChessNotationTranslator(referee.board)
+        # Engine searches run here so the window keeps rendering and taking input meanwhile.
+        self.engine_executor = ThreadPoolExecutor(max_workers=1)
+        # One engine per color for the whole game, so its tables carry over from one move to the next.
+        self.engines = {}
+        self.ai_search = None  # (ai, future, key of the position searched) while the engine is thinking
 
     def start_game(self):
         """Start the main game loop."""
         while self.running:
+            self.poll_ai_move()
             self.referee.check_timers()
             if self.referee.state == "ongoing":
                 self.view.update_view(self)
@@ -24,11 +35,61 @@ class ChessBoardPresenter:
                 self.view.draw_end_screen(self.referee.state, self.referee.current_player())
             self.view.handle_events(self)
         
+        self.cancel_ai_move()
+        self.engine_executor.shutdown(wait=True)
+        for ai in self.engines.values():
+            ai.close()
         if self.referee.white_timer is not None:
             self.referee.white_timer.stop()
             self.referee.black_timer.stop()
         pygame.quit()
 
+    def request_ai_move(self):
+        """Start the engine on the current position in the background; `poll_ai_move` plays its move."""
+        if self.ai_search is not None:
+            return
+        color = self.referee.current_player()
+        ai = self.engines.get(color)
+        if ai is None:
+            ai = self.engines[color] = ChessAI(None, color=color)
+        # The engine gets its own copy of the position: the board may change while it thinks.
+        ai.referee = Referee(self.referee.board.copy(), start_player=color)
+        future = self.engine_executor.submit(ai.best_move, time_limit_ms=AI_MOVE_TIME_MS)
+        self.ai_search = (ai, future, self.referee.board.zobrist_key)
+
+    def poll_ai_move(self):
+        """Play the engine's move once it has arrived, unless the position changed in the meantime."""
+        if self.ai_search is None or not self.ai_search[1].done():
+            return
+        _, future, key = self.ai_search
+        self.ai_search = None
+        move = future.result()
+        if move is not None and self.referee.board.zobrist_key == key:
+            self.referee.make_move(*move)
+
+    def cancel_ai_move(self):
+        """Stop the engine search in progress, if any, and drop its result."""
+        if self.ai_search is not None:
+            ai, future, _ = self.ai_search
+            # A stop request on a finished search would cut the engine's next search short.
+            if not future.done():
+                ai.stop()
+            self.ai_search = None
+
+    def new_game(self):
+        """Forget what the engines learnt about the previous game, once their current search is over."""
+        for ai in self.engines.values():
+            self.engine_executor.submit(ai.transposition_table.clear)
+
+    def is_thinking(self) -> bool:
+        return self.ai_search is not None
+
+    def search_info(self):
+        """Last depth completed by the running search (see `ChessAI.iterations`), or None."""
+        if self.ai_search is None or not self.ai_search[0].iterations:
+            return None
+        return self.ai_search[0].iterations[-1]
+
     def handle_mouse_click(self, mouse_pos):
         """Handle logic when a square is clicked."""
         col, row = mouse_pos[0] // self.view.square_pixel_length, mouse_pos[1] // self.view.square_pixel_length
@@ -40,19 +101,25 @@ class ChessBoardPresenter:
         piece = self.referee.board.get_piece(self.clicked_square[0], self.clicked_square[1])
         
         if self.selected_piece and self.clicked_square in self.possible_moves:
-            self.chess_notation.add_move(self.selected_piece.position, self.clicked_square)
-            self.referee.make_move(self.selected_piece.position, self.clicked_square)
+            self.cancel_ai_move()
+            self.chess_notation.add_move(self.selected_square, self.clicked_square)
+            self.referee.make_move(self.selected_square, self.clicked_square)
             print(self.chess_notation)
             self.selected_piece = None
+            self.selected_square = None
             self.possible_moves = []
         elif piece and piece.color == self.referee.current_player():
             self.selected_piece = piece
-            self.possible_moves = piece.get_possible_moves(self.referee.board)
+            self.selected_square = self.clicked_square
+            self.possible_moves = piece.get_possible_moves(self.referee.board, self.clicked_square)
 
     def handle_keyboard(self, key):
-        """Handle logic when pressing R key"""
+        """Handle logic when pressing a key: R reset, B undo, N redo, A engine move, Q quit"""
+        if key in (pygame.K_r, pygame.K_b, pygame.K_n):
+            self.cancel_ai_move()
         if key == pygame.K_r:
             self.referee.reset()
+            self.new_game()
             self.chess_notation.reset()
             self.possible_moves = []
         if key == pygame.K_b:
@@ -61,8 +128,6 @@ class ChessBoardPresenter:
         if key == pygame.K_n:
             self.referee.board_tracker.redo()
         if key == pygame.K_a:
-            ai = ChessAI(self.referee, depth=2, color=self.referee.current_player())
-            from_pos, to_pos = ai.best_move()
-            self.referee.make_move(from_pos, to_pos)
+            self.request_ai_move()
         if key == pygame.K_q:
             self.running = False
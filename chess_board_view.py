@@ -1,6 +1,10 @@
 import pygame
 from chess_pieces import Pawn, Rook, King, Queen, Bishop, Knight
 from pygame_extension.arrow import draw_arrow
+from fen import move_name
+
+# Moves of the engine's principal variation shown while it thinks.
+PV_MOVES_SHOWN = 5
 
 class ChessBoardView:
     def __init__(self):
@@ -47,6 +51,8 @@ class ChessBoardView:
         self.draw_timers(presenter.referee)
         self.draw_turn_count(presenter.referee)
         self.draw_arrow_last_move(presenter.referee.board)
+        if presenter.is_thinking():
+            self.draw_thinking(presenter.referee, presenter.search_info())
 
     def put_text(self, piece, row, col):
         """Render the piece's character at the specified board position."""
@@ -159,6 +165,22 @@ class ChessBoardView:
         text = font.render(str(referee.turn_count), True, (20, 20, 20))
         self.screen.blit(text, (center[0] - shiftw, height - shifth))  # Position the text
 
+    def draw_thinking(self, referee, iteration=None):
+        """Show that the engine is searching, next to the turn counter of the side to move.
+
+        With the last completed `iteration` of the search, also show its depth, score and expected line.
+        """
+        white = referee.current_player() == 'white'
+        height = self.screen_height - 30 if white else 30
+        font = pygame.font.SysFont(None, 30)
+        text = font.render('Thinking...', True, self.GREY)
+        self.screen.blit(text, (self.nb_square * self.square_pixel_length + 60, height - 9))
+        if iteration is not None:
+            line = ' '.join(move_name(move) for move in iteration["pv"][:PV_MOVES_SHOWN])
+            text = pygame.font.SysFont(None, 24).render(
+                f'd{iteration["depth"]} {iteration["score"] / 100:+.2f} {line}', True, self.GREY)
+            self.screen.blit(text, (self.nb_square * self.square_pixel_length + 60, height - 9 + (-26 if white else 26)))
+
     def draw_arrow_last_move(self, board):
         if board.last_move_from is None:
             return
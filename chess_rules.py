@@ -2,15 +2,17 @@ from board import Board
 from chess_timer import Timer
 from board_tracker import BoardTracker
 from chess_AI import ChessAI
+from bitboard import convert_board
 from chess_typing import Color, Square, Move
 
 white_timer = Timer(3*60,2)
 black_timer = Timer(3*60,2)
 
 class Referee:
-    def __init__(self, board: Board, start_player="white", white_timer:Timer=None, black_timer:Timer=None):
-        self.board = board.copy()
+    def __init__(self, board: Board, start_player="white", white_timer:Timer=None, black_timer:Timer=None, backend="list"):
+        self.board = convert_board(board, backend)
         self.start_player = start_player
+        self.board.turn = start_player
         self.turn_count = 1
         self.state = "ongoing"
         # Initialize timers for both players (in seconds, e.g., 3 minutes and 2s increment)
@@ -22,6 +24,7 @@ class Referee:
     def reset(self):
         """Reset the board positions to the first move"""
         self.board.reset()
+        self.board.turn = self.start_player
         self.state = "ongoing"
         self.turn_count = 1
         if self.white_timer is not None:
@@ -86,9 +89,9 @@ class Referee:
             print(f"{self.board.get_opponent_color(self.current_player())} wins by checkmate!")
     
 
-    def make_move(self, from_pos, to_pos):
+    def make_move(self, from_pos, to_pos, promotion='Q'):
         """Make a move, check for legalities, and update the game state."""
-        if self.board.move_piece(from_pos, to_pos):
+        if self.board.move_piece(from_pos, to_pos, promotion):
             if self.state == "ongoing":
                 self.switch_player()
                 self.board_tracker.update()
@@ -1,4 +1,87 @@
+import re
+from typing import List
+
 from chess_pieces import King, Pawn
+from fen import LETTER_PIECES, parse_square
+
+# Commentaires, variantes, annotations, numéros de coups et résultats : tout ce qui n'est pas un coup en PGN.
+PGN_RESULTS = {"1-0", "0-1", "1/2-1/2", "*"}
+PGN_TOKEN = re.compile(r"\{[^}]*\}|;[^\n]*|\[[^\]]*\]|\(|\)|\$\d+|[^\s(){}\[\];]+")
+MOVE_NUMBER = re.compile(r"^\d+\.+")
+SAN_MOVE = re.compile(r"^([KQRBN])?([a-h])?([1-8])?x?([a-h][1-8])(?:=?([QRBN]))?$")
+
+
+def parse_san(board, san: str, color: str = None) -> tuple:
+    """
+    Retrouve le coup légal correspondant à une notation algébrique (SAN), par exemple 'Nbd7', 'exd5', 'e8=Q' ou 'O-O'.
+    :param board: Le plateau (liste ou bitboard).
+    :param san: Le coup en notation algébrique ; les suffixes +, #, ! et ? sont ignorés.
+    :param color: La couleur qui joue, par défaut le trait du plateau.
+    :return: Le coup ((ligne, colonne), (ligne, colonne)[, promotion]).
+    """
+    color = board.turn if color is None else color
+    legal_moves = board.get_all_moves(color)
+    san = san.rstrip("+#!?")
+    if san.replace("0", "O") in ("O-O", "O-O-O"):
+        row = 7 if color == "white" else 0
+        end = (row, 6) if san.replace("0", "O") == "O-O" else (row, 2)
+        candidates = [move for move in legal_moves
+                      if move[:2] == ((row, 4), end) and isinstance(board.get_piece(row, 4), King)]
+    else:
+        match = SAN_MOVE.match(san)
+        if match is None:
+            raise ValueError(f"Notation illisible : {san!r}")
+        letter, from_file, from_rank, end, promotion = match.groups()
+        piece_type = LETTER_PIECES[letter.lower()] if letter else Pawn
+        end = parse_square(end)
+        candidates = []
+        for move in legal_moves:
+            (row, col), move_end = move[0], move[1]
+            if move_end != end or type(board.get_piece(row, col)) is not piece_type:
+                continue
+            if from_file is not None and col != "abcdefgh".index(from_file):
+                continue
+            if from_rank is not None and row != 8 - int(from_rank):
+                continue
+            if (move[2] if len(move) > 2 else None) != promotion:
+                continue
+            candidates.append(move)
+    if len(candidates) != 1:
+        raise ValueError(f"Coup {san!r} {'ambigu' if candidates else 'illégal'} pour les {color}")
+    return candidates[0]
+
+
+def read_pgn_games(text: str) -> List[List[str]]:
+    """
+    Découpe un fichier PGN en parties.
+    :param text: Le contenu du fichier, une ou plusieurs parties.
+    :return: Pour chaque partie, la liste de ses coups en notation algébrique (variantes et commentaires exclus).
+    """
+    games, moves, depth = [], [], 0
+    for token in PGN_TOKEN.findall(text):
+        if token == "(":
+            depth += 1
+        elif token == ")":
+            depth = max(depth - 1, 0)
+        elif depth or token[0] in "{;$":
+            continue
+        elif token[0] == "[":
+            # Une nouvelle en-tête après des coups : la partie précédente n'avait pas de résultat.
+            if moves:
+                games.append(moves)
+                moves = []
+        elif token in PGN_RESULTS:
+            if moves:
+                games.append(moves)
+            moves = []
+        else:
+            token = MOVE_NUMBER.sub("", token)
+            if token:
+                moves.append(token)
+    if moves:
+        games.append(moves)
+    return games
+
 
 class ChessNotationTranslator:
     def __init__(self, board):
@@ -31,16 +114,12 @@ class ChessNotationTranslator:
         """
         candidates = []
         current_piece = self.get_piece(start)
-        for row in range(8):
-            for col in range(8):
-                if (row, col) == start:
-                    continue
-                other_piece = self.get_piece((row, col))
-                if isinstance(other_piece, type(current_piece)):
-                    # Ajoutez ici une vérification pour valider si ce candidat peut se déplacer vers `end`
-                    if other_piece.color == current_piece.color:
-                        if end in other_piece.get_possible_moves(self.board):
-                            candidates.append((row, col))
+        # Seules les cases occupées par ce type de pièce et cette couleur sont parcourues
+        for row, col in self.board.get_piece_positions(current_piece.color, type(current_piece)):
+            if (row, col) == start:
+                continue
+            if end in self.get_piece((row, col)).get_possible_moves(self.board, (row, col)):
+                candidates.append((row, col))
         return candidates
 
     def handle_king_move(self, start, end):
@@ -61,7 +140,7 @@ class ChessNotationTranslator:
     
     def is_capture(self, start, end):
         piece = self.get_piece(start)
-        if isinstance(piece, Pawn) and end[1]!=piece.col:
+        if isinstance(piece, Pawn) and end[1]!=start[1]:
             return f'{self.transcribe_square(end)[0]}x'
         elif self.get_piece(end) != None:
             print(f'get_piece(end)={self.get_piece(end)}')
@@ -79,9 +158,10 @@ class ChessNotationTranslator:
 
     def is_check(self, start, end):
         color = self.get_piece(start).color
-        board_cp = self.board.copy()
-        board_cp.move_piece(start, end)
-        if board_cp.is_in_check(board_cp.get_opponent_color(color)):
+        undo = self.board.make_move((start, end))
+        in_check = self.board.is_in_check(self.board.get_opponent_color(color))
+        self.board.unmake_move(undo)
+        if in_check:
             return '+'
         else:
             return ''
@@ -0,0 +1,83 @@
+"""Forsyth-Edwards Notation import/export for `board.Board`.
+
+FEN lists ranks from 8 down to 1, which is the row order of `Board.board` (row 0 = rank 8).
+"""
+from typing import Tuple
+
+from board import Board, WHITE, BLACK, WHITE_KINGSIDE, WHITE_QUEENSIDE, BLACK_KINGSIDE, BLACK_QUEENSIDE
+from chess_pieces import Pawn, Rook, Knight, Bishop, Queen, King
+
+START_FEN = "rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq - 0 1"
+
+PIECE_LETTERS = {Pawn: 'p', Knight: 'n', Bishop: 'b', Rook: 'r', Queen: 'q', King: 'k'}
+LETTER_PIECES = {letter: piece_type for piece_type, letter in PIECE_LETTERS.items()}
+CASTLING_LETTERS = {'K': WHITE_KINGSIDE, 'Q': WHITE_QUEENSIDE, 'k': BLACK_KINGSIDE, 'q': BLACK_QUEENSIDE}
+FILES = "abcdefgh"
+
+
+def square_name(position: Tuple[int, int]) -> str:
+    """Algebraic name of a (row, col) square, e.g. (6, 4) -> 'e2'."""
+    return f"{FILES[position[1]]}{8 - position[0]}"
+
+
+def parse_square(name: str) -> Tuple[int, int]:
+    """(row, col) of an algebraic square name, e.g. 'e2' -> (6, 4)."""
+    return 8 - int(name[1]), FILES.index(name[0])
+
+
+def move_name(move) -> str:
+    """Coordinate notation of a move, e.g. 'e2e4' or 'a7a8n' for an under-promotion."""
+    name = square_name(move[0]) + square_name(move[1])
+    return name + move[2].lower() if len(move) > 2 else name
+
+
+def board_from_fen(fen: str) -> Board:
+    """Build a `Board` from a FEN string; the move number field is ignored."""
+    fields = fen.split()
+    placement, turn = fields[0], fields[1]
+    castling = fields[2] if len(fields) > 2 else '-'
+    en_passant = fields[3] if len(fields) > 3 else '-'
+    halfmove_clock = int(fields[4]) if len(fields) > 4 else 0
+
+    grid = [[None for _ in range(8)] for _ in range(8)]
+    for row, rank in enumerate(placement.split('/')):
+        col = 0
+        for char in rank:
+            if char.isdigit():
+                col += int(char)
+                continue
+            color = WHITE if char.isupper() else BLACK
+            grid[row][col] = LETTER_PIECES[char.lower()](color)
+            col += 1
+
+    castling_rights = 0 if castling == '-' else sum(CASTLING_LETTERS[char] for char in castling)
+    board = Board(grid)
+    board.castling_rights = castling_rights
+    board.en_passant = None if en_passant == '-' else parse_square(en_passant)
+    board.halfmove_clock = halfmove_clock
+    board.turn = WHITE if turn == 'w' else BLACK
+    board.start_state = (board.castling_rights, board.en_passant, board.halfmove_clock)
+    return board
+
+
+def board_to_fen(board) -> str:
+    """FEN string of `board` (either backend); the move number is always 1."""
+    ranks = []
+    for row in range(8):
+        rank, empty = "", 0
+        for col in range(8):
+            piece = board.get_piece(row, col)
+            if piece is None:
+                empty += 1
+                continue
+            if empty:
+                rank, empty = rank + str(empty), 0
+            letter = PIECE_LETTERS[type(piece)]
+            rank += letter.upper() if piece.color == WHITE else letter
+        ranks.append(rank + (str(empty) if empty else ""))
+    castling = "".join(letter for letter, right in CASTLING_LETTERS.items() if board.castling_rights & right) or '-'
+    en_passant = board.get_en_passant_square()
+    en_passant = square_name(en_passant) if en_passant is not None else '-'
+    halfmove_clock = getattr(board, 'halfmove_clock', 0)
+    turn = 'w' if board.turn == WHITE else 'b'
+    return f"{'/'.join(ranks)} {turn} {castling} {en_passant} {halfmove_clock} 1"
@@ -44,33 +44,40 @@ class PlayerVsPlayerWTimer(GameMode):
 
 
 class PlayerVsComputer(GameMode):
-    def __init__(self, presenter, ai:ChessAI):
+    def __init__(self, presenter, ai:ChessAI, move_time_ms=1000, ponder=True):
         super().__init__(presenter)
         self.ai = ai
+        self.move_time_ms = move_time_ms
+        self.ponder = ponder  # Let the AI search the predicted reply while the player thinks
 
     def play_turn(self):
-        current_player = self.board.get_current_player()
+        current_player = self.referee.current_player()
 
         if current_player != self.ai.color:
-            self.presenter.view.handle_events()
+            self.presenter.view.handle_events(self.presenter)
         else:
-            # AI move for computer player
-            ai_move = self.ai.find_best_move(depth=3)
-            self.referee.make_move(ai_move[0], ai_move[1])
+            # AI move for computer player, instant or deeper when the player made the predicted move
+            ai_move = self.ai.best_move(time_limit_ms=self.move_time_ms)
+            if ai_move is not None:
+                self.referee.make_move(*ai_move)
+                if self.ponder:
+                    self.ai.start_pondering()
 
 
 class ComputerVsComputer(GameMode):
-    def __init__(self, presenter, ai_white, ai_black):
+    def __init__(self, presenter, ai_white, ai_black, move_time_ms=1000):
         super().__init__(presenter)
         self.ai_white = ai_white
         self.ai_black = ai_black
+        self.move_time_ms = move_time_ms
 
     def play_turn(self):
-        current_player = self.board.get_current_player()
+        current_player = self.referee.current_player()
 
         if current_player == 'white':
-            ai_move = self.ai_white.find_best_move(depth=3)
+            ai_move = self.ai_white.best_move(time_limit_ms=self.move_time_ms)
         else:
-            ai_move = self.ai_black.find_best_move(depth=3)
+            ai_move = self.ai_black.best_move(time_limit_ms=self.move_time_ms)
 
-        self.referee.make_move(ai_move[0], ai_move[1])
+        if ai_move is not None:
+            self.referee.make_move(*ai_move)
@@ -0,0 +1,127 @@
+from chess_pieces import ChessPiece, Pawn, Rook, Knight, Bishop, Queen, King
+from attack_tables import KNIGHT_TARGETS, KING_TARGETS, PAWN_ATTACKS, ORTHOGONAL_RAYS, DIAGONAL_RAYS
+from typing import Tuple, List, Dict, Set, NamedTuple
+
+PROMOTIONS = ['Q', 'R', 'B', 'N']
+
+
+class LegalityInfo(NamedTuple):
+    """Check and pin state of one side, computed once per position."""
+    king_position: Tuple[int, int]|None
+    checkers: List[Tuple[int, int]]
+    # Squares a non-king move must land on to answer a single check, None when not in check.
+    evasions: Set[Tuple[int, int]]|None
+    # Absolutely pinned piece square -> squares of its pin ray (pinner included).
+    pins: Dict[Tuple[int, int], Set[Tuple[int, int]]]
+    # Squares attacked by the opponent once the king is lifted off the board.
+    king_danger: Set[Tuple[int, int]]
+
+
+def _is_slider_for(piece: ChessPiece, diagonal: bool) -> bool:
+    if isinstance(piece, Queen):
+        return True
+    return isinstance(piece, Bishop) if diagonal else isinstance(piece, Rook)
+
+
+def find_attackers(board, position: Tuple[int, int], attacker_color: str, first_only: bool = False) -> List[Tuple[int, int]]:
+    """Squares of the `attacker_color` pieces attacking `position`, looking outward from the target.
+
+    Knight hops, pawn diagonals and the king ring are table lookups; sliding rays stop at the first
+    blocker. With `first_only` the search returns as soon as one attacker is found.
+    """
+    row, col = position
+    if not board.is_valid_position(row, col):
+        return []
+    defender_color = board.get_opponent_color(attacker_color)
+    attackers = []
+    # A pawn of `attacker_color` attacks `position` from where a `defender_color` pawn on it would capture.
+    for piece_type, targets in ((Knight, KNIGHT_TARGETS), (Pawn, PAWN_ATTACKS[defender_color]), (King, KING_TARGETS)):
+        for square in targets[row][col]:
+            piece = board.get_piece(*square)
+            if isinstance(piece, piece_type) and piece.color == attacker_color:
+                attackers.append(square)
+                if first_only:
+                    return attackers
+    for rays, diagonal in ((ORTHOGONAL_RAYS[row][col], False), (DIAGONAL_RAYS[row][col], True)):
+        for ray in rays:
+            for square in ray:
+                piece = board.get_piece(*square)
+                if piece is None:
+                    continue
+                if piece.color == attacker_color and _is_slider_for(piece, diagonal):
+                    attackers.append(square)
+                    if first_only:
+                        return attackers
+                break
+    return attackers
+
+
+def analyse_position(board, color: str) -> LegalityInfo:
+    """Find the checkers, the absolutely pinned pieces and the king danger squares of `color`."""
+    opponent = board.get_opponent_color(color)
+    king_row, king_col = board.get_king_position(color)
+    if (king_row, king_col) == (-1, -1):
+        return LegalityInfo(None, [], None, {}, set())
+
+    king = board.get_piece(king_row, king_col)
+    board.set_piece(None, king_row, king_col)
+    king_danger = set()
+    for row, col in board.get_piece_positions(opponent):
+        king_danger.update(board.get_piece(row, col).get_defended_squares(board, (row, col)))
+    board.set_piece(king, king_row, king_col)
+
+    checkers = []
+    evasions = set()
+    pins = {}
+    for square in KNIGHT_TARGETS[king_row][king_col]:
+        piece = board.get_piece(*square)
+        if isinstance(piece, Knight) and piece.color == opponent:
+            checkers.append(square)
+            evasions.add(square)
+    # An opponent pawn checks from the squares the king would attack as a pawn of `color`.
+    for square in PAWN_ATTACKS[color][king_row][king_col]:
+        piece = board.get_piece(*square)
+        if isinstance(piece, Pawn) and piece.color == opponent:
+            checkers.append(square)
+            evasions.add(square)
+
+    for rays, diagonal in ((ORTHOGONAL_RAYS[king_row][king_col], False), (DIAGONAL_RAYS[king_row][king_col], True)):
+        for ray in rays:
+            pinned = None
+            for index, square in enumerate(ray):
+                piece = board.get_piece(*square)
+                if piece is None:
+                    continue
+                if piece.color == color:
+                    if pinned is not None:
+                        break
+                    pinned = square
+                else:
+                    if _is_slider_for(piece, diagonal):
+                        if pinned is None:
+                            checkers.append(square)
+                            evasions.update(ray[:index + 1])
+                        else:
+                            pins[pinned] = set(ray[:index + 1])
+                    break
+
+    return LegalityInfo((king_row, king_col), checkers, evasions if checkers else None, pins, king_danger)
+
+
+def generate_legal_moves(board, color: str) -> List[tuple]:
+    """Generate all legal moves of `color`; promotions are expanded to (from, to, piece letter)."""
+    legality_info = analyse_position(board, color)
+    moves = []
+    if len(legality_info.checkers) > 1:
+        positions = [legality_info.king_position]
+    else:
+        positions = board.get_piece_positions(color)
+    for row, col in positions:
+        piece = board.get_piece(row, col)
+        for target in piece.get_possible_moves(board, (row, col), legality_info):
+            if isinstance(piece, Pawn) and target[0] in (0, 7):
+                for promotion in PROMOTIONS:
+                    moves.append(((row, col), target, promotion))
+            else:
+                moves.append(((row, col), target))
+    return moves
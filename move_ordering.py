@@ -0,0 +1,97 @@
+"""Move ordering for the alpha-beta search.
+
+Moves are tried in bands: the hash move, captures by most valuable victim then least valuable
+attacker (MVV-LVA), the two killer moves of the ply, then quiet moves by their history score.
+"""
+from typing import List
+
+from chess_pieces import Pawn, Knight, Bishop, Rook, Queen, King
+
+ORDER_VALUES = {Pawn: 1, Knight: 3, Bishop: 3, Rook: 5, Queen: 9, King: 20}
+PROMOTION_VALUES = {'Q': 9, 'R': 5, 'B': 3, 'N': 3}
+KILLERS_PER_PLY = 2
+MAX_PLY = 128
+
+HASH_MOVE_SCORE = 1 << 30
+CAPTURE_SCORE = 1 << 28
+KILLER_SCORE = 1 << 27
+# History scores are halved when one reaches this, so they stay below the killer band.
+HISTORY_LIMIT = 1 << 24
+
+
+def capture_victim(board, move):
+    """Piece taken by `move` (the passed pawn for en passant), or None for a quiet move."""
+    (from_row, from_col), (to_row, to_col) = move[0], move[1]
+    victim = board.get_piece(to_row, to_col)
+    if victim is None and from_col != to_col and isinstance(board.get_piece(from_row, from_col), Pawn):
+        return board.get_piece(from_row, to_col)
+    return victim
+
+
+def is_quiet(board, move) -> bool:
+    return len(move) == 2 and capture_victim(board, move) is None
+
+
+class MoveOrderer:
+    """Killer and history tables shared by every iteration of one search, plus cutoff statistics."""
+
+    def __init__(self):
+        self.killers = [[None] * KILLERS_PER_PLY for _ in range(MAX_PLY)]
+        # Indexed by color then from square * 64 + to square.
+        self.history = {'white': [0] * 4096, 'black': [0] * 4096}
+        self.reset_stats()
+
+    def clear(self) -> None:
+        """Forget the killers and history of the previous search."""
+        for killers in self.killers:
+            killers[:] = [None] * KILLERS_PER_PLY
+        for table in self.history.values():
+            table[:] = [0] * 4096
+
+    def reset_stats(self) -> None:
+        self.cutoffs = 0
+        self.first_move_cutoffs = 0
+
+    def score_move(self, board, move, ply: int, hash_move=None) -> int:
+        if move == hash_move:
+            return HASH_MOVE_SCORE
+        (from_row, from_col), (to_row, to_col) = move[0], move[1]
+        victim = capture_victim(board, move)
+        if victim is not None or len(move) > 2:
+            attacker = board.get_piece(from_row, from_col)
+            victim_value = ORDER_VALUES[type(victim)] if victim is not None else 0
+            promotion_value = PROMOTION_VALUES[move[2]] if len(move) > 2 else 0
+            return CAPTURE_SCORE + (victim_value + promotion_value) * 64 - ORDER_VALUES[type(attacker)]
+        killers = self.killers[ply] if ply < MAX_PLY else ()
+        if move in killers:
+            return KILLER_SCORE + KILLERS_PER_PLY - killers.index(move)
+        color = board.get_piece(from_row, from_col).color
+        return self.history[color][(from_row * 8 + from_col) * 64 + to_row * 8 + to_col]
+
+    def order_moves(self, board, moves: List[tuple], ply: int, hash_move=None) -> List[tuple]:
+        """Sort `moves` in place, best candidates first, and return them."""
+        moves.sort(key=lambda move: self.score_move(board, move, ply, hash_move), reverse=True)
+        return moves
+
+    def record_cutoff(self, board, move, ply: int, depth: int, move_index: int) -> None:
+        """Note a beta cutoff by the `move_index`-th move tried; quiet moves become killers and gain history."""
+        self.cutoffs += 1
+        if move_index == 0:
+            self.first_move_cutoffs += 1
+        if not is_quiet(board, move):
+            return
+        if ply < MAX_PLY:
+            killers = self.killers[ply]
+            if killers[0] != move:
+                killers[1:] = killers[:-1]
+                killers[0] = move
+        (from_row, from_col), (to_row, to_col) = move
+        table = self.history[board.get_piece(from_row, from_col).color]
+        index = (from_row * 8 + from_col) * 64 + to_row * 8 + to_col
+        table[index] += depth * depth
+        if table[index] >= HISTORY_LIMIT:
+            table[:] = [value // 2 for value in table]
+
+    def stats(self) -> dict:
+        return {"cutoffs": self.cutoffs, "first_move_cutoffs": self.first_move_cutoffs,
+                "first_move_rate": self.first_move_cutoffs / self.cutoffs if self.cutoffs else 0.0}
@@ -0,0 +1,171 @@
+"""Opening book: binary file of 16-byte entries sorted by position key, in the Polyglot layout.
+
+Each entry is big-endian (key: u64, move: u16, weight: u16, learn: u32). The keys are this engine's
+Zobrist keys (`zobrist.py`), not the Polyglot random table, so books must be built with `build`.
+
+Usage: python opening_book.py build BOOK PGN [PGN ...] [--max-ply N] [--min-count N]
+       python opening_book.py probe BOOK [--fen FEN]
+"""
+import argparse
+import mmap
+import os
+import random
+import struct
+from collections import defaultdict
+from typing import Dict, List, Tuple
+
+from chess_pieces import King
+from chess_scriber import parse_san, read_pgn_games
+from fen import START_FEN, board_from_fen, move_name
+
+ENTRY = struct.Struct(">QHHI")
+KEY = struct.Struct(">Q")
+PROMOTION_CODES = {'N': 1, 'B': 2, 'R': 3, 'Q': 4}
+CODE_PROMOTIONS = {code: letter for letter, code in PROMOTION_CODES.items()}
+MAX_WEIGHT = 0xFFFF
+
+
+def encode_move(board, move) -> int:
+    """Polyglot move code: to file, to rank, from file, from rank (3 bits each, rank 1 = 0), promotion.
+
+    Castling is written as the king taking its own rook, e.g. e1h1.
+    """
+    (from_row, from_col), (to_row, to_col) = move[0], move[1]
+    if isinstance(board.get_piece(from_row, from_col), King) and abs(to_col - from_col) == 2:
+        to_col = 7 if to_col > from_col else 0
+    code = to_col | (7 - to_row) << 3 | from_col << 6 | (7 - from_row) << 9
+    if len(move) > 2:
+        code |= PROMOTION_CODES[move[2]] << 12
+    return code
+
+
+def decode_move(board, code: int) -> tuple:
+    to_col, to_row = code & 7, 7 - (code >> 3 & 7)
+    from_col, from_row = code >> 6 & 7, 7 - (code >> 9 & 7)
+    if (isinstance(board.get_piece(from_row, from_col), King) and from_col == 4 and from_row == to_row
+            and to_col in (0, 7)):
+        to_col = 6 if to_col == 7 else 2
+    move = ((from_row, from_col), (to_row, to_col))
+    promotion = CODE_PROMOTIONS.get(code >> 12 & 7)
+    return move if promotion is None else move + (promotion,)
+
+
+class OpeningBook:
+    """Read-only book, memory-mapped and searched by binary search on the position key."""
+
+    def __init__(self, path: str):
+        self._file = open(path, "rb")
+        size = os.fstat(self._file.fileno()).st_size
+        # An empty file cannot be mapped; it is simply a book without entries.
+        self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ) if size else b""
+        self.size = size // ENTRY.size
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self) -> None:
+        if isinstance(self._map, mmap.mmap):
+            self._map.close()
+        self._file.close()
+
+    def _lower_bound(self, key: int) -> int:
+        """Index of the first entry whose key is not below `key`."""
+        low, high = 0, self.size
+        while low < high:
+            middle = (low + high) // 2
+            if KEY.unpack_from(self._map, middle * ENTRY.size)[0] < key:
+                low = middle + 1
+            else:
+                high = middle
+        return low
+
+    def entries(self, key: int) -> List[Tuple[int, int]]:
+        """(move code, weight) of every entry stored for `key`."""
+        entries = []
+        for index in range(self._lower_bound(key), self.size):
+            entry_key, code, weight, _ = ENTRY.unpack_from(self._map, index * ENTRY.size)
+            if entry_key != key:
+                break
+            entries.append((code, weight))
+        return entries
+
+    def probe(self, board) -> List[Tuple[tuple, int]]:
+        """Legal book moves of the side to move on `board` (either backend), with their weights."""
+        legal_moves = board.get_all_moves(board.turn)
+        moves = []
+        for code, weight in self.entries(board.zobrist_key):
+            move = decode_move(board, code)
+            if move in legal_moves:
+                moves.append((move, weight))
+        return moves
+
+    def choose(self, board, rng=random):
+        """A book move picked at random in proportion to its weight, or None out of book."""
+        moves = self.probe(board)
+        if not moves:
+            return None
+        weights = [weight for _, weight in moves]
+        if not any(weights):
+            weights = None
+        return rng.choices([move for move, _ in moves], weights)[0]
+
+
+def count_book_moves(pgn_paths: List[str], max_ply: int = 16) -> Dict[Tuple[int, int], int]:
+    """How many games played each (position key, move code) in their first `max_ply` plies.
+
+    A game is read up to its first move that does not parse or is illegal, e.g. from a non-standard start.
+    """
+    counts = defaultdict(int)
+    for path in pgn_paths:
+        with open(path, encoding="utf-8", errors="replace") as pgn_file:
+            games = read_pgn_games(pgn_file.read())
+        for game in games:
+            board = board_from_fen(START_FEN)
+            for san in game[:max_ply]:
+                try:
+                    move = parse_san(board, san)
+                except ValueError:
+                    break
+                counts[board.zobrist_key, encode_move(board, move)] += 1
+                board.make_move(move)
+    return counts
+
+
+def write_book(path: str, counts: Dict[Tuple[int, int], int], min_count: int = 1) -> int:
+    """Write the moves played at least `min_count` times, sorted by key then weight; return the entry count."""
+    entries = sorted(((key, code, min(count, MAX_WEIGHT)) for (key, code), count in counts.items()
+                      if count >= min_count), key=lambda entry: (entry[0], -entry[2], entry[1]))
+    with open(path, "wb") as book_file:
+        for key, code, weight in entries:
+            book_file.write(ENTRY.pack(key, code, weight, 0))
+    return len(entries)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    commands = parser.add_subparsers(dest="command", required=True)
+    build = commands.add_parser("build", help="build a book from PGN files")
+    build.add_argument("book", help="book file to write")
+    build.add_argument("pgn", nargs="+", help="PGN files to read")
+    build.add_argument("--max-ply", type=int, default=16, help="plies of each game to keep (default: 16)")
+    build.add_argument("--min-count", type=int, default=1, help="games a move needs to be kept (default: 1)")
+    probe = commands.add_parser("probe", help="list the book moves of a position")
+    probe.add_argument("book", help="book file to read")
+    probe.add_argument("--fen", default=START_FEN, help="position to look up (default: the start position)")
+    args = parser.parse_args()
+
+    if args.command == "build":
+        entries = write_book(args.book, count_book_moves(args.pgn, args.max_ply), args.min_count)
+        print(f"{entries} entries written to {args.book}")
+    else:
+        board = board_from_fen(args.fen)
+        with OpeningBook(args.book) as book:
+            for move, weight in sorted(book.probe(board), key=lambda entry: -entry[1]):
+                print(f"{move_name(move)}: {weight}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,123 @@
+"""perft: count the leaf nodes of the legal move tree to check the move generator and time it.
+
+Usage: python perft.py [--position NAME | --fen FEN] [--depth N] [--divide] [--backend list|bitboard]
+Without --position/--fen, every built-in position is checked against its known counts.
+"""
+import argparse
+import sys
+import time
+from typing import Dict, List, NamedTuple, Tuple
+
+from bitboard import convert_board, BACKENDS
+from fen import START_FEN, board_from_fen, move_name
+
+
+class PerftPosition(NamedTuple):
+    fen: str
+    # Known leaf counts for depth 1, 2, 3, ...
+    counts: List[int]
+
+
+# Reference positions and counts from the Chess Programming Wiki "Perft Results" page.
+POSITIONS: Dict[str, PerftPosition] = {
+    "startpos": PerftPosition(START_FEN, [20, 400, 8902, 197281, 4865609]),
+    # Castling, pins and discovered checks everywhere.
+    "kiwipete": PerftPosition("r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 0 1",
+                              [48, 2039, 97862, 4085603]),
+    # En passant captures that expose the king along the rank.
+    "en_passant": PerftPosition("8/2p5/3p4/KP5r/1R3p1k/8/4P1P1/8 w - - 0 1", [14, 191, 2812, 43238, 674624]),
+    # Promotions, under-promotions and captures on the last rank.
+    "promotion": PerftPosition("r3k2r/Pppp1ppp/1b3nbN/nP6/BBP1P3/q4N2/Pp1P2PP/R2Q1RK1 w kq - 0 1",
+                               [6, 264, 9467, 422333]),
+    "promotion_check": PerftPosition("rnbq1k1r/pp1Pbppp/2p5/8/2B5/8/PPP1NnPP/RNBQK2R w KQ - 1 8",
+                                     [44, 1486, 62379, 2103487]),
+}
+# Depth used by the default check, kept to a few seconds per position in pure Python.
+DEFAULT_DEPTHS = {"startpos": 4, "kiwipete": 3, "en_passant": 4, "promotion": 3, "promotion_check": 3}
+
+
+def perft(board, depth: int, color: str = None) -> int:
+    """Number of leaf nodes `depth` plies below `board`; `color` defaults to the side to move."""
+    color = board.turn if color is None else color
+    moves = board.get_all_moves(color)
+    if depth <= 1:
+        return len(moves) if depth == 1 else 1
+    opponent = board.get_opponent_color(color)
+    nodes = 0
+    for move in moves:
+        undo = board.make_move(move)
+        nodes += perft(board, depth - 1, opponent)
+        board.unmake_move(undo)
+    return nodes
+
+
+def divide(board, depth: int, color: str = None) -> Dict[tuple, int]:
+    """perft split by root move, to find which move a wrong total comes from."""
+    color = board.turn if color is None else color
+    opponent = board.get_opponent_color(color)
+    counts = {}
+    for move in board.get_all_moves(color):
+        undo = board.make_move(move)
+        counts[move] = perft(board, depth - 1, opponent)
+        board.unmake_move(undo)
+    return counts
+
+
+def timed_perft(board, depth: int) -> Tuple[int, float]:
+    """Return (nodes, seconds) of one perft run."""
+    start = time.perf_counter()
+    nodes = perft(board, depth)
+    return nodes, time.perf_counter() - start
+
+
+def check_positions(backend: str = "list", depths: Dict[str, int] = None) -> bool:
+    """Run every built-in position at its depth, print the node rates and return whether all counts match."""
+    depths = DEFAULT_DEPTHS if depths is None else depths
+    all_ok = True
+    for name, depth in depths.items():
+        position = POSITIONS[name]
+        board = convert_board(board_from_fen(position.fen), backend)
+        nodes, seconds = timed_perft(board, depth)
+        expected = position.counts[depth - 1]
+        ok = nodes == expected
+        all_ok &= ok
+        print(f"{name:>16} depth {depth}: {nodes:>9} nodes (expected {expected:>9}) "
+              f"{'ok' if ok else 'MISMATCH'}  {seconds:6.2f}s  {nodes / max(seconds, 1e-9):8.0f} nodes/s")
+    return all_ok
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--position", choices=sorted(POSITIONS), help="built-in position to search")
+    parser.add_argument("--fen", help="position to search, as a FEN string")
+    parser.add_argument("--depth", type=int, help="plies to search (default: the built-in check depth)")
+    parser.add_argument("--divide", action="store_true", help="print the node count of every root move")
+    parser.add_argument("--backend", choices=BACKENDS, default="list", help="board representation")
+    args = parser.parse_args()
+
+    if args.position is None and args.fen is None:
+        depths = DEFAULT_DEPTHS if args.depth is None else {name: args.depth for name in POSITIONS}
+        sys.exit(0 if check_positions(args.backend, depths) else 1)
+
+    fen = args.fen if args.fen is not None else POSITIONS[args.position].fen
+    depth = args.depth if args.depth is not None else DEFAULT_DEPTHS.get(args.position, 3)
+    board = convert_board(board_from_fen(fen), args.backend)
+    start = time.perf_counter()
+    if args.divide:
+        counts = divide(board, depth)
+        for move in sorted(counts, key=move_name):
+            print(f"{move_name(move)}: {counts[move]}")
+        nodes = sum(counts.values())
+    else:
+        nodes = perft(board, depth)
+    seconds = time.perf_counter() - start
+    print(f"nodes: {nodes}  time: {seconds:.2f}s  nodes/s: {nodes / max(seconds, 1e-9):.0f}")
+    if args.position is not None and depth <= len(POSITIONS[args.position].counts):
+        expected = POSITIONS[args.position].counts[depth - 1]
+        if nodes != expected:
+            print(f"MISMATCH: expected {expected}")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
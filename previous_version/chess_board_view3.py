@@ -33,6 +33,7 @@ class ChessBoardView:
         self.running = True
         self.clicked_square = None
         self.selected_piece = None
+        self.selected_square = None
         self.possible_moves = []
     
     def start_game(self):
@@ -107,13 +108,14 @@ class ChessBoardView:
         
         # If a piece is selected and it is the player's turn
         if self.selected_piece and self.clicked_square in self.possible_moves:
-            self.board.move_piece(self.selected_piece.position, self.clicked_square)
+            self.board.move_piece(self.selected_square, self.clicked_square)
             self.next_player()
             self.selected_piece = None
             self.possible_moves = []
         elif piece and piece.color == self.current_player:
             self.selected_piece = piece
-            self.possible_moves = piece.get_possible_moves(self.board)
+            self.selected_square = self.clicked_square
+            self.possible_moves = piece.get_possible_moves(self.board, self.clicked_square)
             
     def handle_r_key(self, key):
         """Handle logic when pressing R key"""
@@ -0,0 +1,376 @@
+"""Endgame tablebases: distance to mate of every king and piece against king position, by retrograde analysis.
+
+A table holds one byte per position, addressed by
+    index = side << 18 | strong king << 12 | weak king << 6 | piece
+with squares numbered row * 8 + col and side 0 when the strong side (the one with the piece) is to move.
+Tables are stored with white as the strong side; black's positions are looked up mirrored. A byte is
+0 for a draw, 255 for an impossible position, or 1 + the number of plies to mate with best play: odd
+distances are wins for the side to move, even ones losses (0 is checkmate).
+
+Usage: python tablebase.py generate DIR [--tables KQK KRK KPK] [--workers N]
+       python tablebase.py probe DIR [--fen FEN]
+"""
+import argparse
+import mmap
+import multiprocessing
+import os
+from collections import defaultdict
+from typing import Dict, List, Tuple
+
+from attack_tables import KING_TARGETS, PAWN_ATTACKS, RAYS
+from fen import START_FEN, board_from_fen, move_name
+
+# The piece each table gives the strong side, as a promotion letter; KBK and KNK are draws and need no table.
+TABLE_PIECES = {"KQK": 'Q', "KRK": 'R', "KPK": 'P'}
+# Tables read while generating another: pawns promote.
+TABLE_DEPENDENCIES = {"KQK": (), "KRK": (), "KPK": ("KQK", "KRK")}
+DRAWN_PIECES = ('B', 'N')
+MAX_PIECES = 3
+TABLE_SIZE = 2 << 18
+STRONG, WEAK = 0, 1
+DRAW, INVALID = 0, 255
+WIN, LOSS = 1, -1
+# Piece codes of `Board.to_bytes`.
+WHITE_KING, BLACK_KING = 6, 12
+CODE_LETTERS = {1: 'P', 2: 'N', 3: 'B', 4: 'R', 5: 'Q', 7: 'P', 8: 'N', 9: 'B', 10: 'R', 11: 'Q'}
+
+
+def _square(row: int, col: int) -> int:
+    return row * 8 + col
+
+
+KING_MOVES = [tuple(_square(*target) for target in KING_TARGETS[square // 8][square % 8]) for square in range(64)]
+KING_ZONE = [sum(1 << target for target in KING_MOVES[square]) for square in range(64)]
+# Squares a white pawn on each square attacks, as a mask.
+PAWN_ZONE = [sum(1 << _square(*target) for target in PAWN_ATTACKS['white'][square // 8][square % 8])
+             for square in range(64)]
+# RAYS directions 0-3 are orthogonal, 4-7 diagonal.
+SLIDER_DIRECTIONS = {'Q': range(8), 'R': range(4)}
+SQUARE_RAYS = [[tuple(_square(*target) for target in ray) for ray in RAYS[square // 8][square % 8]]
+               for square in range(64)]
+
+
+def _build_lines(directions) -> List[List[int|None]]:
+    """LINES[a][b]: mask of the squares strictly between a and b if a slider moving in `directions` reaches b."""
+    lines = [[None] * 64 for _ in range(64)]
+    for start in range(64):
+        for direction in directions:
+            between = 0
+            for target in SQUARE_RAYS[start][direction]:
+                lines[start][target] = between
+                between |= 1 << target
+    return lines
+
+
+SLIDER_LINES = {letter: _build_lines(directions) for letter, directions in SLIDER_DIRECTIONS.items()}
+
+
+def index(side: int, strong_king: int, weak_king: int, piece: int) -> int:
+    return side << 18 | strong_king << 12 | weak_king << 6 | piece
+
+
+def _attacks(letter: str, piece: int, target: int, blockers: int) -> bool:
+    """Whether the strong side's piece on `piece` attacks `target`, the squares in `blockers` being occupied."""
+    if letter == 'P':
+        return bool(PAWN_ZONE[piece] >> target & 1)
+    between = SLIDER_LINES[letter][piece][target]
+    return between is not None and not between & blockers
+
+
+def _is_valid(letter: str, strong_king: int, weak_king: int, piece: int) -> bool:
+    """Three distinct squares, kings apart and no pawn on a back rank; the side to move is not checked here."""
+    return (strong_king != weak_king and strong_king != piece and weak_king != piece
+            and not KING_ZONE[strong_king] >> weak_king & 1
+            and (letter != 'P' or 8 <= piece < 56))
+
+
+def _weak_moves(letter: str, strong_king: int, weak_king: int, piece: int) -> int:
+    """Number of legal moves of the weak king; taking an undefended piece counts and leaves a draw."""
+    moves = 0
+    for target in KING_MOVES[weak_king]:
+        if KING_ZONE[strong_king] >> target & 1:
+            continue
+        # The weak king no longer stands on its square, so a slider's attack goes through it.
+        if target == piece or not _attacks(letter, piece, target, 1 << strong_king):
+            moves += 1
+    return moves
+
+
+class _TableReader:
+    """Byte-per-position table mapped from its file."""
+
+    def __init__(self, path: str):
+        self._file = open(path, "rb")
+        size = os.fstat(self._file.fileno()).st_size
+        if size != TABLE_SIZE:
+            self._file.close()
+            raise ValueError(f"{path} holds {size} bytes, a tablebase holds {TABLE_SIZE}")
+        self.values = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+
+    def close(self) -> None:
+        self.values.close()
+        self._file.close()
+
+
+def table_path(directory: str, name: str) -> str:
+    return os.path.join(directory, name + ".tb")
+
+
+def _scan(task) -> Tuple[int, bytes, bytes, List[Tuple[int, int]]]:
+    """Pool task: first pass over the positions of one strong king square.
+
+    Returns the square, the values of both sides to move (INVALID or still DRAW), the weak side's move
+    counts, and the (index, distance) of the positions already decided: checkmates, and for pawns the
+    wins by promoting into a won table.
+    """
+    name, directory, strong_king = task
+    letter = TABLE_PIECES[name]
+    promotions = {promotion: _TableReader(table_path(directory, promotion_table))
+                  for promotion, promotion_table in (('Q', "KQK"), ('R', "KRK"))} if letter == 'P' else {}
+    values = bytearray(2 * 4096)
+    counts = bytearray(4096)
+    decided = []
+    for weak_king in range(64):
+        for piece in range(64):
+            offset = weak_king << 6 | piece
+            if not _is_valid(letter, strong_king, weak_king, piece):
+                values[offset] = values[4096 + offset] = INVALID
+                continue
+            in_check = _attacks(letter, piece, weak_king, 1 << strong_king)
+            if in_check:
+                # The strong side to move would take the king.
+                values[offset] = INVALID
+            elif letter == 'P' and piece < 16 and piece - 8 not in (strong_king, weak_king):
+                distances = [table.values[index(WEAK, strong_king, weak_king, piece - 8)] - 1
+                             for table in promotions.values()]
+                losses = [distance for distance in distances if 0 <= distance < INVALID - 1 and distance % 2 == 0]
+                if losses:
+                    decided.append((index(STRONG, strong_king, weak_king, piece), min(losses) + 1))
+            counts[offset] = moves = _weak_moves(letter, strong_king, weak_king, piece)
+            if not moves and in_check:
+                decided.append((index(WEAK, strong_king, weak_king, piece), 0))
+    for table in promotions.values():
+        table.close()
+    return strong_king, bytes(values), bytes(counts), decided
+
+
+def _strong_unmoves(letter: str, strong_king: int, weak_king: int, piece: int):
+    """Strong-to-move positions whose strong side has a move reaching this weak-to-move position."""
+    for origin in KING_MOVES[strong_king]:
+        if (origin != weak_king and origin != piece and not KING_ZONE[weak_king] >> origin & 1
+                and not _attacks(letter, piece, weak_king, 1 << origin)):
+            yield index(STRONG, origin, weak_king, piece)
+    if letter == 'P':
+        # White pawns move towards row 0: they came from the row below, or two rows from their start.
+        origins = [piece + 8] if piece < 48 else []
+        if 32 <= piece < 40:
+            origins.append(piece + 16)
+        for origin in origins:
+            if strong_king in (piece + 8, origin) or weak_king in (piece + 8, origin):
+                break
+            if not _attacks(letter, origin, weak_king, 0):
+                yield index(STRONG, strong_king, weak_king, origin)
+        return
+    for direction in SLIDER_DIRECTIONS[letter]:
+        for origin in SQUARE_RAYS[piece][direction]:
+            if origin == strong_king or origin == weak_king:
+                break
+            if not _attacks(letter, origin, weak_king, 1 << strong_king):
+                yield index(STRONG, strong_king, weak_king, origin)
+
+
+def _weak_unmoves(strong_king: int, weak_king: int, piece: int):
+    """Weak-to-move positions whose weak king has a move reaching this strong-to-move position."""
+    for origin in KING_MOVES[weak_king]:
+        if origin != piece and not KING_ZONE[strong_king] >> origin & 1:
+            yield index(WEAK, strong_king, origin, piece)
+
+
+def _retrograde(name: str, scans) -> bytearray:
+    """Solve a table from its scans, walking back from the decided positions one ply of distance at a time.
+
+    A position is a win once one move reaches a loss, and a loss once every move reaches a win, found
+    when the count of its undecided moves drops to zero. Positions never reached are draws.
+    """
+    letter = TABLE_PIECES[name]
+    values = bytearray(TABLE_SIZE)
+    counts = bytearray(TABLE_SIZE // 2)
+    queues = defaultdict(list)
+    for strong_king, scan_values, scan_counts, decided in scans:
+        offset = strong_king << 12
+        values[offset:offset + 4096] = scan_values[:4096]
+        values[(WEAK << 18) + offset:(WEAK << 18) + offset + 4096] = scan_values[4096:]
+        counts[offset:offset + 4096] = scan_counts
+        for position, distance in decided:
+            queues[distance].append(position)
+    distance = 0
+    while queues:
+        for position in queues.pop(distance, ()):
+            if values[position] != DRAW:
+                continue
+            values[position] = distance + 1
+            strong_king, weak_king, piece = position >> 12 & 0x3F, position >> 6 & 0x3F, position & 0x3F
+            if position >> 18 == WEAK:
+                for previous in _strong_unmoves(letter, strong_king, weak_king, piece):
+                    if values[previous] == DRAW:
+                        queues[distance + 1].append(previous)
+            else:
+                for previous in _weak_unmoves(strong_king, weak_king, piece):
+                    counter = previous & 0x3FFFF
+                    if values[previous] == DRAW and counts[counter]:
+                        counts[counter] -= 1
+                        if not counts[counter]:
+                            queues[distance + 1].append(previous)
+        distance += 1
+        if distance >= INVALID - 1 and queues:
+            raise ValueError(f"{name}: mates longer than {INVALID - 2} plies do not fit in a byte")
+    return values
+
+
+def generate(directory: str, names=tuple(TABLE_PIECES), workers: int|None = None) -> List[str]:
+    """Write the tables `names`, and the ones they need, to `directory`; return the names written.
+
+    The first pass over each table is split by strong king square over `workers` processes (default:
+    one per core), which scan the next table while this process solves the previous one.
+    """
+    os.makedirs(directory, exist_ok=True)
+    pending = []
+    for name in names:
+        for dependency in TABLE_DEPENDENCIES[name] + (name,):
+            if dependency not in pending:
+                pending.append(dependency)
+    written = []
+    with multiprocessing.Pool(workers) as pool:
+        while pending:
+            ready = [name for name in pending if not set(TABLE_DEPENDENCIES[name]) & set(pending)]
+            scans = {name: pool.map_async(_scan, [(name, directory, square) for square in range(64)])
+                     for name in ready}
+            for name in ready:
+                values = _retrograde(name, scans[name].get())
+                with open(table_path(directory, name), "wb") as table_file:
+                    table_file.write(values)
+                pending.remove(name)
+                written.append(name)
+    return written
+
+
+class Tablebases:
+    """The tables found in a directory, memory-mapped and probed for any board with at most MAX_PIECES pieces.
+
+    Pickling sends the directory, so pool workers map the same files.
+    """
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        self.tables: Dict[str, _TableReader] = {}
+        for name in TABLE_PIECES:
+            if os.path.exists(table_path(directory, name)):
+                self.tables[name] = _TableReader(table_path(directory, name))
+
+    def __getstate__(self):
+        return {"directory": self.directory}
+
+    def __setstate__(self, state):
+        self.__init__(state["directory"])
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self) -> None:
+        for table in self.tables.values():
+            table.close()
+        self.tables = {}
+
+    def probe(self, board) -> Tuple[int, int]|None:
+        """(WIN, DRAW or LOSS for the side to move, plies to mate) of `board` (either backend), or None.
+
+        None means no table covers the position: more pieces, a missing table or castling rights left.
+        """
+        if board.castling_rights:
+            return None
+        data = board.to_bytes()
+        pieces = [(square, code) for square, code in enumerate(data[:64]) if code]
+        if len(pieces) > MAX_PIECES:
+            return None
+        extra = [(square, code) for square, code in pieces if code not in (WHITE_KING, BLACK_KING)]
+        if not extra:
+            return DRAW, 0
+        square, code = extra[0]
+        letter = CODE_LETTERS[code]
+        if letter in DRAWN_PIECES:
+            return DRAW, 0
+        table = self.tables.get("K" + letter + "K")
+        if table is None:
+            return None
+        strong = 'white' if code < WHITE_KING else 'black'
+        kings = {code: square for square, code in pieces}
+        strong_king, weak_king = ((kings[WHITE_KING], kings[BLACK_KING]) if strong == 'white'
+                                  else (kings[BLACK_KING], kings[WHITE_KING]))
+        if strong == 'black':
+            # Same file, opposite rank: black's pawn then moves like white's.
+            strong_king, weak_king, square = strong_king ^ 56, weak_king ^ 56, square ^ 56
+        value = table.values[index(STRONG if board.turn == strong else WEAK, strong_king, weak_king, square)]
+        if value == INVALID:
+            return None
+        if value == DRAW:
+            return DRAW, 0
+        return (WIN if (value - 1) % 2 else LOSS), value - 1
+
+    def best_move(self, board):
+        """The move keeping the best result of `board` with the quickest win or slowest loss, or None.
+
+        None when the position, or one reached by a legal move, is not covered.
+        """
+        if self.probe(board) is None:
+            return None
+        best_move, best_rank = None, None
+        for move in board.get_all_moves(board.turn):
+            undo = board.make_move(move)
+            result = self.probe(board)
+            board.unmake_move(undo)
+            if result is None:
+                return None
+            outcome, plies = result
+            # The result is the opponent's: ranked by our outcome, then shorter wins and longer losses.
+            rank = (-outcome, plies if outcome == WIN else -plies)
+            if best_rank is None or rank > best_rank:
+                best_move, best_rank = move, rank
+        return best_move
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    commands = parser.add_subparsers(dest="command", required=True)
+    generate_command = commands.add_parser("generate", help="build tables by retrograde analysis")
+    generate_command.add_argument("directory", help="directory to write the tables to")
+    generate_command.add_argument("--tables", nargs="+", choices=sorted(TABLE_PIECES), default=list(TABLE_PIECES),
+                                  help="tables to build, with the ones they need (default: all)")
+    generate_command.add_argument("--workers", type=int, default=None,
+                                  help="processes scanning positions (default: one per core)")
+    probe = commands.add_parser("probe", help="look up a position and its best move")
+    probe.add_argument("directory", help="directory holding the tables")
+    probe.add_argument("--fen", default=START_FEN, help="position to look up (default: the start position)")
+    args = parser.parse_args()
+
+    if args.command == "generate":
+        for name in generate(args.directory, args.tables, args.workers):
+            print(f"{name} written to {table_path(args.directory, name)}")
+    else:
+        board = board_from_fen(args.fen)
+        with Tablebases(args.directory) as tablebases:
+            result = tablebases.probe(board)
+            if result is None:
+                print("not in the tablebases")
+                return
+            outcome, plies = result
+            print({WIN: f"win, mate in {plies} plies", DRAW: "draw", LOSS: f"loss, mated in {plies} plies"}[outcome])
+            move = tablebases.best_move(board)
+            if move is not None:
+                print(f"best move: {move_name(move)}")
+
+
+if __name__ == "__main__":
+    main()
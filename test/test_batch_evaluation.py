@@ -0,0 +1,57 @@
+import sys
+import os
+
+# Get the parent directory
+parent_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+
+# Add parent directory to sys.path
+sys.path.append(parent_dir)
+import random
+import unittest
+from bitboard import convert_board
+from chess_AI import ChessAI
+from fen import START_FEN, board_from_fen
+
+try:
+    import numpy as np
+    from batch_evaluation import encode_boards, evaluate_batch
+except ImportError:
+    np = None
+
+
+def random_positions(count, seed=1):
+    rng = random.Random(seed)
+    board = board_from_fen(START_FEN)
+    positions = []
+    while len(positions) < count:
+        moves = board.get_all_moves(board.turn)
+        if not moves or rng.random() < 0.02:
+            board = board_from_fen(START_FEN)
+            continue
+        board.make_move(rng.choice(moves))
+        positions.append(board.copy())
+    return positions
+
+
+@unittest.skipIf(np is None, "numpy is not installed")
+class TestBatchEvaluation(unittest.TestCase):
+    def test_matches_the_scalar_evaluation(self):
+        boards = random_positions(300)
+        positions = encode_boards(boards)
+        self.assertEqual((positions.shape, positions.dtype), ((300, 64), np.int8))
+        for color in ('white', 'black'):
+            ai = ChessAI(None, color=color)
+            expected = []
+            for board in boards:
+                ai.board = board
+                expected.append(ai.evaluate_board())
+            self.assertEqual(evaluate_batch(positions, color).tolist(), expected)
+
+    def test_backends_encode_alike(self):
+        boards = random_positions(20, seed=2)
+        bitboards = [convert_board(board, "bitboard") for board in boards]
+        np.testing.assert_array_equal(encode_boards(bitboards), encode_boards(boards))
+
+
+if __name__ == '__main__':
+    unittest.main()
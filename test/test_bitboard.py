@@ -0,0 +1,77 @@
+import sys
+import os
+
+# Get the parent directory
+parent_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+
+# Add parent directory to sys.path
+sys.path.append(parent_dir)
+import random
+import unittest
+from benchmark import bench_tree_walk
+from bitboard import convert_board, BACKENDS
+from fen import START_FEN, board_from_fen
+from perft import POSITIONS, perft
+
+
+def random_positions(count, seed=1):
+    """(list board, same position on a bitboard) pairs met in random games from the perft positions."""
+    rng = random.Random(seed)
+    fens = [START_FEN] + [position.fen for position in POSITIONS.values()]
+    positions = []
+    while len(positions) < count:
+        board = board_from_fen(rng.choice(fens))
+        for _ in range(rng.randrange(1, 60)):
+            moves = board.get_all_moves(board.turn)
+            if not moves:
+                break
+            board.make_move(rng.choice(moves))
+            positions.append((board.copy(), convert_board(board, "bitboard")))
+    return positions[:count]
+
+
+class TestBitBoardParity(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.positions = random_positions(300)
+
+    def test_same_legal_moves(self):
+        for board, bitboard in self.positions:
+            for color in ('white', 'black'):
+                self.assertEqual(sorted(bitboard.get_all_moves(color)), sorted(board.get_all_moves(color)), str(board))
+
+    def test_same_attacks(self):
+        for board, bitboard in self.positions:
+            for color in ('white', 'black'):
+                self.assertEqual(bitboard.get_attack_map(color), board.get_attack_map(color))
+                self.assertEqual(bitboard.get_king_position(color), board.get_king_position(color))
+                self.assertEqual(bitboard.is_in_check(color), board.is_in_check(color))
+                for row in range(8):
+                    for col in range(8):
+                        self.assertEqual(bitboard.is_attacked((row, col), color), board.is_attacked((row, col), color))
+                        self.assertEqual(sorted(bitboard.get_attackers((row, col), color)),
+                                         sorted(board.get_attackers((row, col), color)))
+
+    def test_same_pieces_after_make_and_unmake(self):
+        for board, bitboard in self.positions[:50]:
+            key = bitboard.zobrist_key
+            for move in bitboard.get_all_moves(bitboard.turn):
+                board_undo = board.make_move(move)
+                undo = bitboard.make_move(move)
+                self.assertEqual([[bitboard.get_piece(row, col) for col in range(8)] for row in range(8)], board.board)
+                self.assertEqual(bitboard.zobrist_key, board.zobrist_key)
+                bitboard.unmake_move(undo)
+                board.unmake_move(board_undo)
+            self.assertEqual(bitboard.zobrist_key, key)
+
+
+class TestBenchmark(unittest.TestCase):
+    def test_tree_walk_plays_promotions(self):
+        for backend in BACKENDS:
+            board = convert_board(board_from_fen(POSITIONS["promotion"].fen), backend)
+            played, _ = bench_tree_walk(board, 'white', 2)
+            self.assertEqual(played, perft(board, 1) + perft(board, 2))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -20,19 +20,19 @@ if __name__ == '__main__':
         for j in range(8):
             bboard[i][j] = None
 
-    bboard[0][4] = King(BLACK, (0, 4))
+    bboard[0][4] = King(BLACK)
     for i in range(8):
-        bboard[1][i] = Pawn(BLACK, (1,i))
+        bboard[1][i] = Pawn(BLACK)
 
         # White pieces
-        bboard[7][0] = Rook(WHITE, (7, 0))
-        bboard[7][1] = Knight(WHITE, (7, 1))
-        bboard[7][2] = Bishop(WHITE, (7, 2))
-        bboard[7][5] = Bishop(WHITE, (7, 5))
-        bboard[7][3] = Queen(WHITE, (7, 3))
-        bboard[7][4] = King(WHITE, (7, 4))
+        bboard[7][0] = Rook(WHITE)
+        bboard[7][1] = Knight(WHITE)
+        bboard[7][2] = Bishop(WHITE)
+        bboard[7][5] = Bishop(WHITE)
+        bboard[7][3] = Queen(WHITE)
+        bboard[7][4] = King(WHITE)
 
-    board.change_board(bboard, last_moved_piece=King(BLACK, (0, 4)))
+    board.change_board(bboard, last_moved_piece=King(BLACK))
     view = ChessBoardView()
     presenter = ChessBoardPresenter(view, board)
     presenter.start_game()
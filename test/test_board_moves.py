@@ -0,0 +1,285 @@
+import sys
+import os
+
+# Get the parent directory
+parent_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+
+# Add parent directory to sys.path
+sys.path.append(parent_dir)
+import unittest
+from board import Board, WHITE, BLACK, ALL_CASTLING_RIGHTS
+from bitboard import convert_board, board_from_bytes
+from chess_rules import Referee
+from fen import board_from_fen
+from chess_pieces import Pawn, Rook, Queen, King, Knight
+from attack_tables import KNIGHT_TARGETS, KING_TARGETS, PAWN_ATTACKS, PAWN_PUSHES, RAYS, DIRECTIONS
+
+
+def empty_board():
+    return Board([[None for _ in range(8)] for _ in range(8)])
+
+
+def classic_board():
+    board = empty_board()
+    board.start_classic_setup()
+    return board
+
+
+def rebuilt_board(board):
+    """A new board on the same grid, whose incremental state is computed from scratch."""
+    return Board([[board.get_piece(row, col) for col in range(8)] for row in range(8)])
+
+
+class TestMakeUnmakeMove(unittest.TestCase):
+    def assertRoundTrip(self, board, move):
+        before = str(board), board.castling_rights, board.en_passant, board.last_move_to, board.get_piece_positions(WHITE)
+        undo = board.make_move(move)
+        board.unmake_move(undo)
+        self.assertEqual((str(board), board.castling_rights, board.en_passant, board.last_move_to,
+                          board.get_piece_positions(WHITE)), before)
+
+    def test_castling_moves_rook_and_clears_rights(self):
+        board = empty_board()
+        board.set_piece(King(WHITE), 7, 4)
+        board.set_piece(Rook(WHITE), 7, 7)
+        board.set_piece(King(BLACK), 0, 4)
+        board.castling_rights = ALL_CASTLING_RIGHTS
+        self.assertIn((7, 6), board.get_piece(7, 4).get_possible_moves(board, (7, 4)))
+        undo = board.make_move(((7, 4), (7, 6)))
+        self.assertIsInstance(board.get_piece(7, 5), Rook)
+        self.assertFalse(board.has_castling_right(WHITE, kingside=True))
+        board.unmake_move(undo)
+        self.assertIsInstance(board.get_piece(7, 7), Rook)
+        self.assertTrue(board.has_castling_right(WHITE, kingside=True))
+        self.assertRoundTrip(board, ((7, 4), (7, 6)))
+
+    def test_en_passant_capture_is_restored(self):
+        board = classic_board()
+        for move in [((6, 4), (4, 4)), ((1, 0), (2, 0)), ((4, 4), (3, 4)), ((1, 3), (3, 3))]:
+            board.make_move(move)
+        self.assertEqual(board.en_passant, (2, 3))
+        self.assertIn((2, 3), board.get_piece(3, 4).get_possible_moves(board, (3, 4)))
+        undo = board.make_move(((3, 4), (2, 3)))
+        self.assertIsNone(board.get_piece(3, 3))
+        board.unmake_move(undo)
+        self.assertIsInstance(board.get_piece(3, 3), Pawn)
+        self.assertEqual(board.en_passant, (2, 3))
+        self.assertRoundTrip(board, ((3, 4), (2, 3)))
+
+    def test_promotion_is_undone(self):
+        board = empty_board()
+        board.set_piece(King(WHITE), 7, 4)
+        board.set_piece(King(BLACK), 0, 0)
+        board.set_piece(Pawn(WHITE), 1, 6)
+        board.set_piece(Rook(BLACK), 0, 7)
+        undo = board.make_move(((1, 6), (0, 7), 'N'))
+        self.assertIsInstance(board.get_piece(0, 7), Knight)
+        board.unmake_move(undo)
+        self.assertIsInstance(board.get_piece(1, 6), Pawn)
+        self.assertIsInstance(board.get_piece(0, 7), Rook)
+        undo = board.make_move(((1, 6), (0, 6)))
+        self.assertIsInstance(board.get_piece(0, 6), Queen)
+        board.unmake_move(undo)
+        self.assertRoundTrip(board, ((1, 6), (0, 7)))
+
+    def test_pins_and_checks_restrict_moves(self):
+        board = empty_board()
+        board.set_piece(King(WHITE), 7, 4)
+        board.set_piece(Knight(WHITE), 6, 4)
+        board.set_piece(Rook(WHITE), 7, 0)
+        board.set_piece(Rook(BLACK), 0, 4)
+        board.set_piece(King(BLACK), 0, 0)
+        legality_info = board.get_legality_info(WHITE)
+        self.assertEqual(legality_info.checkers, [])
+        self.assertIn((6, 4), legality_info.pins)
+        self.assertEqual(board.get_piece(6, 4).get_possible_moves(board, (6, 4)), [])
+
+        board.set_piece(None, 6, 4)
+        board.set_piece(Knight(WHITE), 5, 6)
+        moves = board.get_all_moves(WHITE)
+        self.assertEqual(board.get_legality_info(WHITE).checkers, [(0, 4)])
+        self.assertIn(((5, 6), (6, 4)), moves)
+        self.assertNotIn(((7, 0), (7, 1)), moves)
+        self.assertNotIn(((7, 4), (6, 4)), moves)
+
+    def test_piece_sets_follow_moves(self):
+        board = classic_board()
+        self.assertEqual(len(board.get_piece_positions(BLACK)), 16)
+        for move in [((6, 4), (4, 4)), ((1, 3), (3, 3)), ((4, 4), (3, 3)), ((0, 3), (3, 3))]:
+            board.make_move(move)
+        self.assertEqual(len(board.get_piece_positions(WHITE)), 15)
+        self.assertEqual(board.get_piece_positions(BLACK, Queen), [(3, 3)])
+        board.make_move(((7, 4), (6, 4)))
+        self.assertEqual(board.get_king_position(WHITE), (6, 4))
+        for color in (WHITE, BLACK):
+            scanned = sorted((row, col) for row in range(8) for col in range(8)
+                             if board.get_piece(row, col) is not None and board.get_piece(row, col).color == color)
+            self.assertEqual(sorted(board.get_piece_positions(color)), scanned)
+
+    def test_attackers_stop_at_first_blocker(self):
+        board = empty_board()
+        board.set_piece(King(WHITE), 7, 4)
+        board.set_piece(King(BLACK), 0, 0)
+        board.set_piece(Rook(BLACK), 4, 4)
+        board.set_piece(Queen(BLACK), 0, 4)
+        board.set_piece(Knight(BLACK), 5, 3)
+        board.set_piece(Pawn(BLACK), 6, 3)
+        self.assertEqual(sorted(board.get_attackers((7, 4), BLACK)), [(4, 4), (5, 3), (6, 3)])
+        self.assertTrue(board.is_in_check(WHITE))
+        self.assertFalse(board.is_attacked((5, 0), WHITE))
+        bitboard = convert_board(board, "bitboard")
+        self.assertEqual(sorted(bitboard.get_attackers((7, 4), BLACK)), [(4, 4), (5, 3), (6, 3)])
+
+    def test_copies_share_pieces_but_not_squares(self):
+        board = classic_board()
+        copy = board.copy()
+        copy.make_move(((6, 4), (4, 4)))
+        self.assertIs(board.get_piece(6, 4), Pawn(WHITE))
+        self.assertIs(copy.get_piece(4, 4), board.get_piece(6, 4))
+        self.assertIsNone(copy.get_piece(6, 4))
+        self.assertEqual(len(board.get_piece_positions(WHITE, Pawn)), 8)
+        with self.assertRaises(AttributeError):
+            Pawn(WHITE).color = BLACK
+
+    def test_backends_generate_the_same_moves(self):
+        board = classic_board()
+        bitboard = convert_board(board, "bitboard")
+        for move in [((6, 4), (4, 4)), ((1, 4), (3, 4)), ((7, 6), (5, 5)), ((0, 1), (2, 2))]:
+            board.make_move(move)
+            bitboard.make_move(move)
+        for color in (WHITE, BLACK):
+            self.assertEqual(sorted(board.get_all_moves(color)), sorted(bitboard.get_all_moves(color)))
+
+    def test_piece_moves_include_en_passant_on_both_backends(self):
+        board = board_from_fen("4k3/8/8/3pP3/8/8/8/4K3 w - d6 0 1")
+        for backend in ("list", "bitboard"):
+            position = convert_board(board, backend)
+            self.assertEqual(position.get_en_passant_square(), (2, 3))
+            self.assertEqual(sorted(position.get_piece(3, 4).get_possible_moves(position, (3, 4))), [(2, 3), (2, 4)])
+            # The piece-level moves are the legal moves of each piece.
+            moves = sorted((square, target) for square in position.get_piece_positions(WHITE)
+                           for target in position.get_piece(*square).get_possible_moves(position, square))
+            self.assertEqual(moves, sorted(position.get_all_moves(WHITE)))
+
+
+class TestAttackTables(unittest.TestCase):
+    def test_step_tables_stay_on_board(self):
+        self.assertEqual(sorted(KNIGHT_TARGETS[0][0]), [(1, 2), (2, 1)])
+        self.assertEqual(len(KNIGHT_TARGETS[4][4]), 8)
+        self.assertEqual(len(KING_TARGETS[7][7]), 3)
+        self.assertEqual(PAWN_ATTACKS[WHITE][6][0], ((5, 1),))
+        self.assertEqual(sorted(PAWN_ATTACKS[BLACK][1][4]), [(2, 3), (2, 5)])
+        self.assertEqual(PAWN_PUSHES[WHITE][6][3], ((5, 3), (4, 3)))
+        self.assertEqual(PAWN_PUSHES[BLACK][5][3], ((6, 3),))
+        self.assertEqual(PAWN_PUSHES[WHITE][0][3], ())
+
+    def test_rays_run_to_the_edge_nearest_first(self):
+        ray = RAYS[7][0][DIRECTIONS.index((-1, 1))]
+        self.assertEqual(ray, tuple((7 - i, i) for i in range(1, 8)))
+        self.assertEqual(RAYS[0][0][DIRECTIONS.index((-1, 0))], ())
+
+
+class TestZobristKey(unittest.TestCase):
+    def test_transpositions_share_a_key(self):
+        first, second = classic_board(), classic_board()
+        for move in [((7, 6), (5, 5)), ((0, 6), (2, 5)), ((7, 1), (5, 2))]:
+            first.make_move(move)
+        for move in [((7, 1), (5, 2)), ((0, 6), (2, 5)), ((7, 6), (5, 5))]:
+            second.make_move(move)
+        self.assertEqual(first.zobrist_key, second.zobrist_key)
+        self.assertEqual(first, second)
+        self.assertEqual(first.zobrist_key, convert_board(first, "bitboard").zobrist_key)
+
+    def test_key_covers_side_castling_and_en_passant(self):
+        board = classic_board()
+        start_key = board.zobrist_key
+        undo = board.make_move(((6, 4), (4, 4)))
+        self.assertEqual(board.turn, BLACK)
+        pushed_key = board.zobrist_key
+        board.en_passant = None
+        self.assertNotEqual(board.zobrist_key, pushed_key)
+        board.castling_rights = 0
+        self.assertNotEqual(board.zobrist_key, pushed_key)
+        board.unmake_move(undo)
+        self.assertEqual(board.zobrist_key, start_key)
+
+    def test_bytes_round_trip_on_both_backends(self):
+        board = classic_board()
+        for move in [((6, 4), (4, 4)), ((1, 0), (2, 0)), ((4, 4), (3, 4)), ((1, 3), (3, 3))]:
+            board.make_move(move)
+        data = board.to_bytes()
+        self.assertEqual(len(data), 70)
+        for backend in ("list", "bitboard"):
+            restored = board_from_bytes(data, backend)
+            self.assertEqual(restored.zobrist_key, board.zobrist_key)
+            self.assertEqual(restored.get_en_passant_square(), (2, 3))
+            self.assertEqual(restored.last_move_to, (3, 3))
+            self.assertEqual(sorted(restored.get_all_moves(WHITE)), sorted(board.get_all_moves(WHITE)))
+            self.assertEqual(restored.to_bytes(), data)
+        board.make_move(((3, 4), (2, 3)))
+        board.load_bytes(data)
+        self.assertEqual(board.to_bytes(), data)
+        self.assertEqual(sorted(board.get_piece_positions(BLACK)), sorted(board_from_bytes(data).get_piece_positions(BLACK)))
+
+    def test_backends_encode_the_halfmove_clock_alike(self):
+        board = classic_board()
+        bitboard = convert_board(board, "bitboard")
+        undos = []
+        # Quiet knight moves count, the pawn move resets the clock.
+        for move in [((7, 6), (5, 5)), ((0, 6), (2, 5)), ((5, 5), (7, 6)), ((1, 4), (3, 4)), ((7, 6), (5, 5))]:
+            board.make_move(move)
+            undos.append(bitboard.make_move(move))
+            self.assertEqual(bitboard.halfmove_clock, board.halfmove_clock)
+            self.assertEqual(bitboard.to_bytes(), board.to_bytes())
+        self.assertEqual(board_from_bytes(bitboard.to_bytes(), "bitboard").halfmove_clock, 1)
+        bitboard.unmake_move(undos.pop())
+        bitboard.unmake_move(undos.pop())
+        self.assertEqual(bitboard.halfmove_clock, 3)
+
+    def test_tracker_undo_restores_snapshots(self):
+        referee = Referee(classic_board())
+        start = referee.board.to_bytes()
+        referee.make_move((6, 4), (4, 4))
+        referee.make_move((1, 4), (3, 4))
+        referee.board_tracker.undo()
+        referee.board_tracker.undo()
+        self.assertEqual(referee.board.to_bytes(), start)
+        referee.board_tracker.redo()
+        self.assertEqual(referee.board.get_piece(4, 4), Pawn(WHITE))
+        self.assertEqual(referee.board.turn, BLACK)
+
+    def test_threefold_repetition_is_detected(self):
+        referee = Referee(classic_board())
+        shuffle = [((7, 6), (5, 5)), ((0, 6), (2, 5)), ((5, 5), (7, 6)), ((2, 5), (0, 6))]
+        for move in shuffle * 2:
+            self.assertEqual(referee.state, "ongoing")
+            referee.make_move(*move)
+        self.assertEqual(referee.state, "repetition")
+
+
+class TestPieceSquareScore(unittest.TestCase):
+    def test_start_position_is_balanced(self):
+        board = classic_board()
+        self.assertEqual(board.pst_score, 0)
+        self.assertEqual(board.get_mobility(WHITE), board.get_mobility(BLACK))
+
+    def test_score_follows_captures_promotions_and_undo(self):
+        # White takes on d5 and black promotes on a1, on both backends.
+        board = empty_board()
+        for piece, row, col in [(King(WHITE), 7, 4), (King(BLACK), 0, 4), (Knight(WHITE), 5, 4),
+                                (Queen(BLACK), 3, 3), (Pawn(BLACK), 6, 0)]:
+            board.set_piece(piece, row, col)
+        bitboard = convert_board(board, "bitboard")
+        start = board.pst_score
+        for move in [((5, 4), (3, 3)), ((6, 0), (7, 0), 'Q')]:
+            undo = board.make_move(move)
+            bitboard.make_move(move)
+            self.assertEqual(board.pst_score, rebuilt_board(board).pst_score)
+            self.assertEqual(bitboard.pst_score, board.pst_score)
+            self.assertEqual(bitboard.get_mobility(WHITE), board.get_mobility(WHITE))
+        board.unmake_move(undo)
+        self.assertGreater(board.pst_score, start)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,262 @@
+import sys
+import os
+
+# Get the parent directory
+parent_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+
+# Add parent directory to sys.path
+sys.path.append(parent_dir)
+import time
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from chess_AI import ChessAI, MATE_SCORE
+from bitboard import BitBoard
+from chess_rules import Referee
+from fen import board_from_fen
+from move_ordering import MoveOrderer
+from perft import POSITIONS
+
+MATE_IN_ONE = "6k1/5ppp/8/8/8/8/8/R5K1 w - - 0 1"
+ITALIAN = "r1bqkbnr/pppp1ppp/2n5/4p3/2B1P3/5N2/PPPP1PPP/RNBQK2R b KQkq - 3 3"
+KIWIPETE = "r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1P/PPPBBPpP/R3K2R w KQkq - 0 1"
+
+
+def make_ai(fen, color, **kwargs):
+    board = board_from_fen(fen)
+    return ChessAI(Referee(board, start_player=board.turn), color=color, **kwargs)
+
+
+class TestIterativeDeepening(unittest.TestCase):
+    def test_finds_mate_in_one(self):
+        ai = make_ai(MATE_IN_ONE, 'white', depth=3)
+        self.assertEqual(ai.best_move(), ((7, 0), (0, 0)))
+        self.assertEqual(ai.last_score, MATE_SCORE - 1)
+
+    def test_node_budget_keeps_last_completed_depth(self):
+        ai = make_ai(ITALIAN, 'black')
+        move = ai.best_move(node_limit=400)
+        self.assertLessEqual(ai.nodes, 400)
+        self.assertGreaterEqual(ai.completed_depth, 1)
+        self.assertIn(move, ai.referee.board.get_all_moves('black'))
+
+    def test_time_budget_is_respected(self):
+        ai = make_ai(ITALIAN, 'black')
+        start = time.perf_counter()
+        move = ai.best_move(time_limit_ms=300)
+        self.assertLess(time.perf_counter() - start, 1.0)
+        self.assertIsNotNone(move)
+        # The referee's board is never touched by the search.
+        self.assertEqual(ai.referee.board.zobrist_key, board_from_fen(ITALIAN).zobrist_key)
+
+    def test_stop_ends_a_search_running_in_another_thread(self):
+        ai = make_ai(ITALIAN, 'black')
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            future = executor.submit(ai.best_move, time_limit_ms=10000)
+            time.sleep(0.2)
+            start = time.perf_counter()
+            ai.stop()
+            self.assertIn(future.result(timeout=1), ai.referee.board.get_all_moves('black'))
+            self.assertLess(time.perf_counter() - start, 0.5)
+            # A stop requested before the search starts is not lost.
+            ai.stop()
+            future = executor.submit(ai.best_move, time_limit_ms=10000)
+            future.result(timeout=1)
+            self.assertEqual(ai.completed_depth, 0)
+
+
+class TestParallelSearch(unittest.TestCase):
+    def test_same_move_and_score_as_serial_search(self):
+        for fen, color in [(ITALIAN, 'black'), (MATE_IN_ONE, 'white')]:
+            serial = make_ai(fen, color, depth=3)
+            parallel = make_ai(fen, color, depth=3, workers=2)
+            try:
+                self.assertEqual(parallel.best_move(), serial.best_move())
+                self.assertEqual(parallel.last_score, serial.last_score)
+            finally:
+                parallel.close()
+
+    def test_same_move_in_a_tactical_position(self):
+        fen = POSITIONS["promotion_check"].fen
+        serial = make_ai(fen, 'white', depth=4)
+        parallel = make_ai(fen, 'white', depth=4, workers=2)
+        try:
+            self.assertEqual(parallel.best_move(), serial.best_move())
+            self.assertEqual(parallel.last_score, serial.last_score)
+        finally:
+            parallel.close()
+
+    def test_same_move_and_score_between_close_moves(self):
+        # At depth 4 Nf6 and Bb4 are a centipawn apart, and the workers' own scores can put Bb4 first.
+        serial = make_ai(ITALIAN, 'black', depth=4)
+        parallel = make_ai(ITALIAN, 'black', depth=4, workers=2)
+        try:
+            self.assertEqual(parallel.best_move(), serial.best_move())
+            self.assertEqual(parallel.last_score, serial.last_score)
+        finally:
+            parallel.close()
+
+    def test_workers_share_the_node_budget(self):
+        ai = make_ai(KIWIPETE, 'white', workers=4)
+        try:
+            move = ai.best_move(node_limit=3000)
+            self.assertLessEqual(ai.nodes, 3000)
+            self.assertGreaterEqual(ai.completed_depth, 1)
+            self.assertEqual(move, ai.iterations[-1]["move"])
+        finally:
+            ai.close()
+
+    def test_lazy_smp_helpers_share_the_table(self):
+        ai = make_ai(ITALIAN, 'black', depth=3, workers=2, parallel="smp")
+        try:
+            self.assertIn(ai.best_move(), ai.referee.board.get_all_moves('black'))
+            self.assertGreater(ai.helper_nodes, 0)
+        finally:
+            ai.close()
+
+
+class TestPondering(unittest.TestCase):
+    def ponder_after_first_move(self):
+        ai = make_ai(ITALIAN, 'black', depth=2)
+        ai.referee.make_move(*ai.best_move())
+        self.assertTrue(ai.start_pondering())
+        time.sleep(0.3)
+        return ai
+
+    def test_ponder_hit_answers_at_once(self):
+        ai = self.ponder_after_first_move()
+        ai.referee.make_move(*ai.ponder_move)
+        start = time.perf_counter()
+        move = ai.best_move()
+        self.assertLess(time.perf_counter() - start, 0.1)
+        self.assertIn(move, ai.referee.board.get_all_moves('black'))
+        self.assertEqual(ai.ponder_stats()["hits"], 1)
+
+    def test_ponder_miss_is_cancelled(self):
+        ai = self.ponder_after_first_move()
+        other = next(move for move in ai.referee.board.get_all_moves('white') if move != ai.ponder_move)
+        ai.referee.make_move(*other)
+        self.assertIn(ai.best_move(), ai.referee.board.get_all_moves('black'))
+        self.assertEqual((ai.ponder_hits, ai.ponder_misses), (0, 1))
+        self.assertEqual(ai.completed_depth, 2)
+
+
+class TestQuiescence(unittest.TestCase):
+    def test_does_not_take_a_defended_pawn_with_the_queen(self):
+        # At depth 1 without quiescence Qxd5 looks like a free pawn; cxd5 only shows up past the horizon.
+        ai = make_ai("4k3/8/2p5/3p4/8/8/8/3QK3 w - - 0 1", 'white', depth=1)
+        self.assertNotEqual(ai.best_move(), ((7, 3), (3, 3)))
+        self.assertGreater(ai.quiescence_nodes, 0)
+        self.assertLessEqual(ai.quiescence_nodes, ai.nodes)
+
+
+class TestMoveOrdering(unittest.TestCase):
+    def test_band_order(self):
+        # White can take the queen with the knight (Nxd5) or a pawn with the queen (Qxe5).
+        board = board_from_fen("4k3/8/8/3qp3/8/4N3/7Q/4K3 w - - 0 1")
+        orderer = MoveOrderer()
+        killer = ((7, 4), (7, 5))
+        orderer.record_cutoff(board, killer, 2, 3, 1)
+        hash_move = ((6, 7), (7, 7))
+        moves = orderer.order_moves(board, board.get_all_moves('white'), 2, hash_move)
+        self.assertEqual(moves[:4], [hash_move, ((5, 4), (3, 3)), ((6, 7), (3, 4)), killer])
+        self.assertEqual(orderer.stats()["cutoffs"], 1)
+
+    def test_same_result_with_fewer_nodes_than_scan_order(self):
+        ai = make_ai(ITALIAN, 'black', depth=3)
+        move = ai.best_move()
+        self.assertEqual(move, ((0, 6), (2, 5)))
+        self.assertLess(ai.nodes, 4000)
+        self.assertGreater(ai.move_orderer.stats()["first_move_rate"], 0.5)
+
+
+class TestSelectiveSearch(unittest.TestCase):
+    def test_null_move_passes_the_turn(self):
+        for board in (board_from_fen(KIWIPETE), BitBoard.from_board(board_from_fen(KIWIPETE))):
+            key = board.zobrist_key
+            undo = board.make_null_move()
+            self.assertEqual(board.turn, 'black')
+            self.assertNotEqual(board.zobrist_key, key)
+            board.unmake_null_move(undo)
+            self.assertEqual(board.zobrist_key, key)
+
+    def test_late_move_reductions_save_nodes(self):
+        full = make_ai(KIWIPETE, 'white', depth=4, null_move=False, late_move_reductions=False)
+        reduced = make_ai(KIWIPETE, 'white', depth=4, null_move=False)
+        self.assertEqual(reduced.best_move(), full.best_move())
+        self.assertGreater(reduced.reductions, 0)
+        self.assertEqual(full.reductions, 0)
+        self.assertLess(reduced.nodes, full.nodes)
+
+    def test_null_move_is_verified_in_endings(self):
+        # White has a rook and pawns only: a null-move cutoff is checked by a real search first.
+        fen = "6k1/5ppp/8/8/8/8/5PPP/3R2K1 b - - 0 1"
+        ai = make_ai(fen, 'black', depth=4)
+        ai.best_move()
+        self.assertGreater(ai.null_move_verifications, 0)
+        self.assertGreater(ai.null_move_cutoffs, 0)
+        ai = make_ai(fen, 'black', depth=4, null_move=False)
+        ai.best_move()
+        self.assertEqual(ai.null_move_cutoffs, 0)
+
+    def test_iterations_report_the_branching_factor(self):
+        ai = make_ai(ITALIAN, 'black', depth=3)
+        ai.best_move()
+        self.assertEqual([iteration["depth"] for iteration in ai.iterations], [1, 2, 3])
+        self.assertIsNone(ai.iterations[0]["branching_factor"])
+        self.assertEqual(ai.iterations[2]["branching_factor"], ai.iterations[2]["nodes"] / ai.iterations[1]["nodes"])
+        self.assertEqual(sum(iteration["nodes"] for iteration in ai.iterations), ai.nodes)
+
+
+class TestPrincipalVariation(unittest.TestCase):
+    def test_each_depth_reports_a_legal_line(self):
+        ai = make_ai(ITALIAN, 'black', depth=3)
+        move = ai.best_move()
+        self.assertEqual(ai.principal_variation, ai.iterations[-1]["pv"])
+        self.assertEqual(len(ai.principal_variation), 3)
+        for iteration in ai.iterations:
+            self.assertEqual(iteration["pv"][0], iteration["move"])
+            board = board_from_fen(ITALIAN)
+            for pv_move in iteration["pv"]:
+                self.assertIn(pv_move, board.get_all_moves(board.turn))
+                board.make_move(pv_move)
+        self.assertEqual(ai.iterations[-1]["move"], move)
+
+    def test_failed_aspiration_window_is_widened(self):
+        ai = make_ai(ITALIAN, 'black', depth=2)
+        expected = ai.best_move()
+        score = ai.last_score
+        ai._prepare_search(ai.referee.board.to_bytes(), None, None, 2)
+        moves = ai.get_all_moves('black')
+        # A guess far above the real score fails low until the window opens.
+        self.assertEqual(ai._aspiration_search(2, moves, score + 2000), (expected, score))
+        self.assertGreater(ai.aspiration_failures, 0)
+
+
+class TestSearchStats(unittest.TestCase):
+    def test_callback_sees_each_completed_depth(self):
+        seen = []
+        ai = make_ai(ITALIAN, 'black', depth=3, on_iteration=lambda stats: seen.append((stats.depth, stats.nodes)))
+        ai.best_move()
+        self.assertEqual(seen, [(1, ai.iterations[0]["nodes"]),
+                                (2, ai.iterations[0]["nodes"] + ai.iterations[1]["nodes"]), (3, ai.nodes)])
+
+    def test_last_stats_match_the_search_counters(self):
+        ai = make_ai(ITALIAN, 'black', depth=3)
+        self.assertIsNone(ai.last_stats)
+        ai.best_move()
+        stats = ai.last_stats
+        self.assertEqual((stats.nodes, stats.quiescence_nodes, stats.depth), (ai.nodes, ai.quiescence_nodes, 3))
+        self.assertEqual(stats.cutoffs, ai.move_orderer.cutoffs)
+        self.assertEqual(stats.first_move_cutoff_rate, ai.move_orderer.stats()["first_move_rate"])
+        self.assertEqual(stats.hash_hit_rate, ai.transposition_table.stats()["hit_rate"])
+        # Quiescence goes past the nominal depth.
+        self.assertGreater(stats.selective_depth, 3)
+        self.assertGreater(stats.nodes_per_second, 0)
+        self.assertEqual(len(stats.iterations), 3)
+        self.assertLessEqual(sum(iteration["time"] for iteration in stats.iterations), stats.elapsed)
+        # Built when read, but the time stays that of the finished search.
+        self.assertEqual(ai.last_stats.elapsed, stats.elapsed)
+
+
+if __name__ == '__main__':
+    unittest.main()
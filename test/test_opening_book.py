@@ -0,0 +1,78 @@
+import sys
+import os
+
+# Get the parent directory
+parent_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+
+# Add parent directory to sys.path
+sys.path.append(parent_dir)
+import random
+import tempfile
+import unittest
+from chess_AI import ChessAI
+from chess_rules import Referee
+from chess_scriber import parse_san, read_pgn_games
+from fen import START_FEN, board_from_fen
+from opening_book import OpeningBook, count_book_moves, write_book, encode_move, decode_move
+
+GAMES = """[Event "one"]
+1. e4 e5 2. Nf3 {main line} Nc6 (2... d6) 3. Bc4 Bc5 4. O-O Nf6 1-0
+
+[Event "two"]
+1. e4 c5 2. Nf3 d6 0-1
+
+[Event "three"]
+1. d4 d5 2. c4 e6 *
+"""
+
+
+class TestPgn(unittest.TestCase):
+    def test_games_skip_comments_and_variations(self):
+        games = read_pgn_games(GAMES)
+        self.assertEqual(len(games), 3)
+        self.assertEqual(games[0], ['e4', 'e5', 'Nf3', 'Nc6', 'Bc4', 'Bc5', 'O-O', 'Nf6'])
+
+    def test_san_moves(self):
+        board = board_from_fen("4k3/1P6/8/8/8/8/8/R3K2R w KQ - 0 1")
+        self.assertEqual(parse_san(board, "b8=N+"), ((1, 1), (0, 1), 'N'))
+        self.assertEqual(parse_san(board, "O-O-O"), ((7, 4), (7, 2)))
+        self.assertEqual(parse_san(board, "Rad1"), ((7, 0), (7, 3)))
+        with self.assertRaises(ValueError):
+            parse_san(board_from_fen("4k3/8/8/8/8/8/4K3/R6R w - - 0 1"), "Rd1")
+
+
+class TestOpeningBook(unittest.TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        pgn_path, self.book_path = os.path.join(directory.name, "games.pgn"), os.path.join(directory.name, "book.bin")
+        with open(pgn_path, "w") as pgn_file:
+            pgn_file.write(GAMES)
+        write_book(self.book_path, count_book_moves([pgn_path]))
+
+    def test_probe_returns_weighted_legal_moves(self):
+        with OpeningBook(self.book_path) as book:
+            self.assertEqual(sorted(book.probe(board_from_fen(START_FEN))), [(((6, 3), (4, 3)), 1), (((6, 4), (4, 4)), 2)])
+            castling = board_from_fen("r1bqk1nr/pppp1ppp/2n5/2b1p3/2B1P3/5N2/PPPP1PPP/RNBQK2R w KQkq - 4 4")
+            self.assertEqual(book.probe(castling), [(((7, 4), (7, 6)), 1)])
+            self.assertEqual(book.probe(board_from_fen("4k3/8/8/8/8/8/8/4K3 w - - 0 1")), [])
+
+    def test_move_codes_round_trip(self):
+        board = board_from_fen("4k3/1P6/8/8/8/8/8/R3K2R w KQ - 0 1")
+        for move in [((1, 1), (0, 1), 'N'), ((7, 4), (7, 6)), ((7, 4), (7, 2)), ((7, 0), (6, 0))]:
+            self.assertEqual(decode_move(board, encode_move(board, move)), move)
+        # Polyglot writes e1g1 as e1h1.
+        self.assertEqual(encode_move(board, ((7, 4), (7, 6))) & 0x3F, 7)
+
+    def test_ai_plays_from_the_book_first(self):
+        with OpeningBook(self.book_path) as book:
+            board = board_from_fen(START_FEN)
+            ai = ChessAI(Referee(board), color='white', book=book)
+            ai.book_random = random.Random(1)
+            self.assertIn(ai.best_move(), [((6, 4), (4, 4)), ((6, 3), (4, 3))])
+            self.assertTrue(ai.from_book)
+            self.assertEqual(ai.nodes, 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,42 @@
+import sys
+import os
+
+# Get the parent directory
+parent_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+
+# Add parent directory to sys.path
+sys.path.append(parent_dir)
+import unittest
+from bitboard import convert_board, BACKENDS
+from fen import START_FEN, board_from_fen, board_to_fen
+from perft import POSITIONS, perft, divide
+
+# Shallow enough to keep the suite fast; `python perft.py` runs the deeper check.
+TEST_DEPTHS = {"startpos": 3, "kiwipete": 2, "en_passant": 3, "promotion": 2, "promotion_check": 2}
+
+
+class TestPerft(unittest.TestCase):
+    def test_known_node_counts(self):
+        for backend in BACKENDS:
+            for name, depth in TEST_DEPTHS.items():
+                with self.subTest(backend=backend, position=name):
+                    board = convert_board(board_from_fen(POSITIONS[name].fen), backend)
+                    self.assertEqual(perft(board, depth), POSITIONS[name].counts[depth - 1])
+
+    def test_divide_adds_up_and_restores_the_board(self):
+        board = board_from_fen(POSITIONS["kiwipete"].fen)
+        key = board.zobrist_key
+        counts = divide(board, 2)
+        self.assertEqual(len(counts), 48)
+        self.assertEqual(sum(counts.values()), 2039)
+        self.assertEqual(board.zobrist_key, key)
+
+    def test_fen_round_trip(self):
+        for fen in [START_FEN] + [position.fen for position in POSITIONS.values()]:
+            board = board_from_fen(fen)
+            self.assertEqual(board_to_fen(board).split()[:5], fen.split()[:5])
+            self.assertEqual(board_to_fen(convert_board(board, "bitboard")).split()[:5], fen.split()[:5])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,92 @@
+import sys
+import os
+
+# Get the parent directory
+parent_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+
+# Add parent directory to sys.path
+sys.path.append(parent_dir)
+import random
+import tempfile
+import unittest
+from chess_AI import ChessAI, MATE_THRESHOLD
+from chess_rules import Referee
+from fen import board_from_fen
+from tablebase import Tablebases, generate, WIN, DRAW, LOSS, INVALID
+
+MATE_IN_ONE = "k7/8/1K6/8/8/8/7Q/8 w - - 0 1"
+
+
+class TestTablebase(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.directory = tempfile.TemporaryDirectory()
+        generate(cls.directory.name, ("KQK",), workers=1)
+        cls.tablebases = Tablebases(cls.directory.name)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.tablebases.close()
+        cls.directory.cleanup()
+
+    def probe(self, fen):
+        return self.tablebases.probe(board_from_fen(fen))
+
+    def test_known_positions(self):
+        self.assertEqual(self.probe(MATE_IN_ONE), (WIN, 1))
+        self.assertEqual(self.probe("k6Q/8/1K6/8/8/8/8/8 b - - 0 1"), (LOSS, 0))
+        self.assertEqual(self.probe("k7/2Q5/1K6/8/8/8/8/8 b - - 0 1"), (DRAW, 0))
+        # Black's queen is looked up in the mirrored table.
+        self.assertEqual(self.probe("8/7q/8/8/8/1k6/8/K7 b - - 0 1"), (WIN, 1))
+        # The longest KQK mate is 10 moves.
+        values = self.tablebases.tables["KQK"].values[:1 << 18]
+        self.assertEqual(max(value for value in values if value != INVALID) - 1, 19)
+
+    def test_uncovered_positions(self):
+        self.assertEqual(self.probe("k7/8/1K6/8/8/8/8/7B w - - 0 1"), (DRAW, 0))
+        self.assertIsNone(self.probe("k7/8/1K6/8/8/8/8/7R w - - 0 1"))
+        self.assertIsNone(self.probe("k7/8/1K6/8/8/8/r6Q/8 w - - 0 1"))
+
+    def test_values_follow_from_the_moves(self):
+        def rank(result):
+            outcome, plies = result
+            return outcome, -plies if outcome == WIN else plies
+
+        rng = random.Random(1)
+        checked = 0
+        while checked < 100:
+            pieces = dict(zip(rng.sample(range(64), 3), "Kkq"))
+            rows = ["".join(pieces.get(row * 8 + col, "1") for col in range(8)) for row in range(8)]
+            board = board_from_fen("/".join(rows) + " " + rng.choice("wb") + " - - 0 1")
+            result = self.tablebases.probe(board)
+            if result is None:
+                continue
+            checked += 1
+            children = []
+            for move in board.get_all_moves(board.turn):
+                undo = board.make_move(move)
+                outcome, plies = self.tablebases.probe(board)
+                board.unmake_move(undo)
+                children.append((-outcome, plies + 1) if outcome != DRAW else (DRAW, 0))
+            if not children:
+                children.append((LOSS, 0) if board.is_in_check(board.turn) else (DRAW, 0))
+            self.assertEqual(result, max(children, key=rank), rows)
+
+    def test_ai_plays_from_the_tablebases(self):
+        ai = ChessAI(Referee(board_from_fen(MATE_IN_ONE)), color='white', tablebases=self.tablebases)
+        board = board_from_fen(MATE_IN_ONE)
+        board.make_move(ai.best_move())
+        self.assertTrue(ai.from_tablebase)
+        self.assertEqual(ai.nodes, 0)
+        self.assertEqual(self.tablebases.probe(board), (LOSS, 0))
+
+    def test_search_probes_simplified_positions(self):
+        ai = ChessAI(Referee(board_from_fen("4k3/8/8/8/8/8/r6Q/4K3 w - - 0 1")), depth=2, color='white',
+                     tablebases=self.tablebases)
+        self.assertEqual(ai.best_move(), ((6, 7), (6, 0)))
+        self.assertFalse(ai.from_tablebase)
+        self.assertGreater(ai.tablebase_hits, 0)
+        self.assertGreater(ai.last_score, MATE_THRESHOLD)
+
+if __name__ == '__main__':
+    unittest.main()
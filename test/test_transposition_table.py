@@ -0,0 +1,76 @@
+import sys
+import os
+
+# Get the parent directory
+parent_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+
+# Add parent directory to sys.path
+sys.path.append(parent_dir)
+import multiprocessing
+import unittest
+from transposition_table import TranspositionTable, SharedTranspositionTable, EXACT, LOWER_BOUND, UPPER_BOUND, encode_move, decode_move
+
+
+class TestTranspositionTable(unittest.TestCase):
+    def test_size_stays_under_the_cap(self):
+        for size_mb in (0.5, 1, 3):
+            table = TranspositionTable(size_mb)
+            self.assertLessEqual(table.size_bytes, size_mb * 1024 * 1024)
+            self.assertGreater(table.size_bytes, size_mb * 1024 * 1024 / 2)
+
+    def test_store_and_probe(self):
+        table = TranspositionTable(1)
+        move = ((1, 6), (0, 7), 'N')
+        table.store(0xDEADBEEF, 5, -250, LOWER_BOUND, move)
+        entry = table.probe(0xDEADBEEF)
+        self.assertEqual((entry.depth, entry.score, entry.bound, entry.move), (5, -250, LOWER_BOUND, move))
+        self.assertIsNone(table.probe(0xDEADBEEF + 1 + table.bucket_mask))
+        self.assertEqual((table.probes, table.hits, table.collisions), (2, 1, 1))
+        self.assertEqual(decode_move(encode_move(((6, 4), (4, 4)))), ((6, 4), (4, 4)))
+
+    def test_depth_preferred_and_always_replace_slots(self):
+        table = TranspositionTable(1)
+        stride = table.bucket_mask + 1
+        deep, shallow, newer = 7, 7 + stride, 7 + 2 * stride
+        table.store(deep, 6, 10, EXACT, None)
+        table.store(shallow, 2, 20, UPPER_BOUND, None)
+        table.store(newer, 1, 30, EXACT, None)
+        # The deep entry keeps its slot, the shallow ones share the other.
+        self.assertEqual(table.probe(deep).score, 10)
+        self.assertIsNone(table.probe(shallow))
+        self.assertEqual(table.probe(newer).score, 30)
+        # Entries of an older search give way.
+        table.new_search()
+        table.store(shallow, 1, 40, EXACT, None)
+        self.assertEqual(table.probe(shallow).score, 40)
+        self.assertEqual(table.probe(deep).score, 10)
+
+
+def store_in_child(table):
+    table.store(42, 4, 123, EXACT, ((6, 4), (4, 4)))
+
+
+class TestSharedTranspositionTable(unittest.TestCase):
+    def test_entries_are_shared_between_processes(self):
+        table = SharedTranspositionTable(1)
+        try:
+            process = multiprocessing.Process(target=store_in_child, args=(table,))
+            process.start()
+            process.join()
+            self.assertEqual(table.probe(42), (4, 123, EXACT, ((6, 4), (4, 4))))
+        finally:
+            table.close()
+
+    def test_torn_entry_is_ignored(self):
+        table = TranspositionTable(1)
+        stride = table.bucket_mask + 1
+        table.store(5, 3, 10, EXACT, None)
+        table.store(5 + stride, 1, 20, EXACT, None)
+        # Another process wrote its data word but not yet its key word.
+        table.words[4 * 5 + 1] = table.words[4 * 5 + 3]
+        self.assertIsNone(table.probe(5))
+        self.assertEqual(table.probe(5 + stride).score, 20)
+
+
+if __name__ == '__main__':
+    unittest.main()
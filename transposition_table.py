@@ -0,0 +1,179 @@
+from array import array
+from multiprocessing import resource_tracker, shared_memory
+from typing import NamedTuple
+
+EXACT, LOWER_BOUND, UPPER_BOUND = 1, 2, 3
+PROMOTION_CODES = {None: 0, 'Q': 1, 'R': 2, 'B': 3, 'N': 4}
+CODE_PROMOTIONS = {code: letter for letter, code in PROMOTION_CODES.items()}
+
+# An entry is two 64-bit words: the Zobrist key XOR the packed data, then the packed data
+#   bits  0-15 move (from square, to square, promotion), 0 for no move
+#   bits 16-23 depth
+#   bits 24-25 bound type
+#   bits 26-31 search generation
+#   bits 32-63 score + SCORE_OFFSET
+# A bucket holds two entries: slot 0 is depth-preferred, slot 1 is always replaced.
+# Each word is written in one 8-byte store, but an entry takes two. Storing key ^ data means an
+# entry half-overwritten by another process no longer matches its key, so readers never need a lock.
+WORDS_PER_ENTRY = 2
+ENTRIES_PER_BUCKET = 2
+BUCKET_BYTES = WORDS_PER_ENTRY * ENTRIES_PER_BUCKET * 8
+SCORE_OFFSET = 1 << 31
+GENERATION_MASK = 0x3F
+
+
+class TTEntry(NamedTuple):
+    depth: int
+    score: int
+    bound: int
+    move: tuple|None
+
+
+def encode_move(move) -> int:
+    """16-bit form of a ((row, col), (row, col)[, promotion]) move."""
+    if move is None:
+        return 0
+    (from_row, from_col), (to_row, to_col) = move[0], move[1]
+    promotion = move[2] if len(move) > 2 else None
+    return from_row * 8 + from_col | (to_row * 8 + to_col) << 6 | PROMOTION_CODES[promotion] << 12
+
+
+def decode_move(code: int) -> tuple|None:
+    if code == 0:
+        return None
+    from_square, to_square, promotion = code & 0x3F, code >> 6 & 0x3F, CODE_PROMOTIONS[code >> 12 & 0x7]
+    move = (divmod(from_square, 8), divmod(to_square, 8))
+    return move if promotion is None else move + (promotion,)
+
+
+def bucket_count(size_mb: float) -> int:
+    """Largest power of two of buckets fitting in `size_mb` megabytes."""
+    buckets = 1
+    while (buckets * 2) * BUCKET_BYTES <= size_mb * 1024 * 1024:
+        buckets *= 2
+    return buckets
+
+
+class TranspositionTable:
+    """Fixed-size hash table of search results, keyed by Zobrist key and capped at `size_mb` megabytes."""
+
+    def __init__(self, size_mb: float = 16):
+        buckets = bucket_count(size_mb)
+        self.bucket_mask = buckets - 1
+        self.words = self._allocate(buckets * BUCKET_BYTES)
+        self.generation = 0
+        self.reset_stats()
+
+    def _allocate(self, size: int):
+        return array('Q', bytes(size))
+
+    @property
+    def size_bytes(self) -> int:
+        return len(self.words) * self.words.itemsize
+
+    def reset_stats(self) -> None:
+        self.probes = 0
+        self.hits = 0
+        # Probes that found their bucket filled by other positions.
+        self.collisions = 0
+        self.stores = 0
+
+    def new_search(self) -> None:
+        """Age the stored entries so the depth-preferred slots can be reclaimed by the next search."""
+        self.generation = (self.generation + 1) & GENERATION_MASK
+
+    def clear(self) -> None:
+        self.words[:] = array('Q', bytes(self.size_bytes))
+        self.generation = 0
+
+    def _bucket_index(self, key: int) -> int:
+        return (key & self.bucket_mask) * WORDS_PER_ENTRY * ENTRIES_PER_BUCKET
+
+    def probe(self, key: int) -> TTEntry|None:
+        """Return the entry stored for `key`, or None."""
+        self.probes += 1
+        words = self.words
+        index = self._bucket_index(key)
+        for slot in range(index, index + WORDS_PER_ENTRY * ENTRIES_PER_BUCKET, WORDS_PER_ENTRY):
+            data = words[slot + 1]
+            if data and words[slot] ^ data == key:
+                self.hits += 1
+                return TTEntry(data >> 16 & 0xFF, (data >> 32) - SCORE_OFFSET, data >> 24 & 0x3,
+                               decode_move(data & 0xFFFF))
+        if words[index + 1]:
+            self.collisions += 1
+        return None
+
+    def store(self, key: int, depth: int, score: int, bound: int, move) -> None:
+        """Keep a search result; the depth-preferred slot only yields to deeper or newer results."""
+        self.stores += 1
+        words = self.words
+        index = self._bucket_index(key)
+        data = (encode_move(move) | min(depth, 0xFF) << 16 | bound << 24 | self.generation << 26
+                | (score + SCORE_OFFSET) << 32)
+        stored = words[index + 1]
+        stored_key = words[index] ^ stored
+        if (stored_key == key or not stored or depth >= (stored >> 16 & 0xFF)
+                or (stored >> 26 & GENERATION_MASK) != self.generation):
+            if stored_key != key and stored:
+                # The displaced entry still gets a chance in the always-replace slot.
+                words[index + 2], words[index + 3] = words[index], stored
+            words[index], words[index + 1] = key ^ data, data
+        else:
+            words[index + 2], words[index + 3] = key ^ data, data
+
+    def stats(self) -> dict:
+        return {"probes": self.probes, "hits": self.hits, "collisions": self.collisions, "stores": self.stores,
+                "hit_rate": self.hits / self.probes if self.probes else 0.0}
+
+
+class SharedTranspositionTable(TranspositionTable):
+    """Transposition table in `multiprocessing.shared_memory`, probed and filled by several processes at once.
+
+    Pickling sends the segment name, so pool workers attach to the same memory. The creating process
+    owns the segment and must `unlink()` it; the others only `close()` their mapping.
+    """
+
+    def __init__(self, size_mb: float = 16):
+        self.memory = None
+        self.owner = True
+        super().__init__(size_mb)
+
+    def _allocate(self, size: int):
+        self.memory = shared_memory.SharedMemory(create=True, size=size)
+        words = self._map(size)
+        words[:] = array('Q', bytes(size))
+        return words
+
+    def _map(self, size: int):
+        # The segment can be rounded up to whole pages; both views must be released before closing it.
+        self._view = self.memory.buf.cast('Q')
+        return self._view[:size // 8]
+
+    @property
+    def size_bytes(self) -> int:
+        return len(self.words) * 8
+
+    def __getstate__(self):
+        return {"name": self.memory.name, "size": self.size_bytes, "generation": self.generation}
+
+    def __setstate__(self, state):
+        self.memory = shared_memory.SharedMemory(name=state["name"])
+        # Attaching registers the segment with this process's resource tracker, which would then
+        # destroy it when the process exits; only the creating process may do that.
+        resource_tracker.unregister(self.memory._name, "shared_memory")
+        self.owner = False
+        self.words = self._map(state["size"])
+        self.bucket_mask = state["size"] // BUCKET_BYTES - 1
+        self.generation = state["generation"]
+        self.reset_stats()
+
+    def close(self) -> None:
+        """Release this process's mapping; the table can no longer be used here."""
+        if self.memory is not None:
+            self.words.release()
+            self._view.release()
+            self.memory.close()
+            if self.owner:
+                self.memory.unlink()
+            self.memory = None
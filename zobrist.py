@@ -0,0 +1,41 @@
+from typing import List
+
+# Keys come from a fixed-seed splitmix64 sequence: identical from one run to the next so they can
+# be stored (opening book, shared transposition tables). Python's Mersenne Twister is avoided on
+# purpose: its output is linear over GF(2), so XORs of a few keys can cancel in the low bits that
+# index the transposition table.
+_MASK64 = (1 << 64) - 1
+_state = 0x2F6B3A9D
+
+
+def _splitmix64() -> int:
+    global _state
+    _state = (_state + 0x9E3779B97F4A7C15) & _MASK64
+    z = _state
+    z = (z ^ (z >> 30)) * 0xBF58476D1CE4E5B9 & _MASK64
+    z = (z ^ (z >> 27)) * 0x94D049BB133111EB & _MASK64
+    return z ^ (z >> 31)
+
+
+def _random_keys(count: int) -> List[int]:
+    return [_splitmix64() for _ in range(count)]
+
+
+# PIECE_KEYS[color * 6 + piece type][square], colors (white, black), piece types
+# (pawn, knight, bishop, rook, queen, king) and squares row * 8 + col, as in `bitboard.BitBoard`.
+PIECE_KEYS = [_random_keys(64) for _ in range(12)]
+# Indexed by the castling rights bitmask, so a whole rights change is a single lookup.
+CASTLING_KEYS = _random_keys(16)
+# Indexed by the file of the en passant target square.
+EN_PASSANT_KEYS = _random_keys(8)
+BLACK_TO_MOVE_KEY = _random_keys(1)[0]
+
+
+def state_key(castling_rights: int, en_passant_col: int, black_to_move: bool) -> int:
+    """Key of everything but the pieces; `en_passant_col` is -1 without an en passant square."""
+    key = CASTLING_KEYS[castling_rights]
+    if en_passant_col >= 0:
+        key ^= EN_PASSANT_KEYS[en_passant_col]
+    if black_to_move:
+        key ^= BLACK_TO_MOVE_KEY
+    return key